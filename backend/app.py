@@ -3,6 +3,7 @@ from flask_cors import CORS
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import hashlib
+import secrets
 import os
 from datetime import timedelta, datetime
 import re
@@ -10,9 +11,13 @@ import threading
 import time
 import sys
 import os
+from collections import OrderedDict
 from security.security_logger import security_logger
-from security.attack_detector import FixedAttackDetector  # Sans start_fixed_cleanup_thread
+from security.attack_detector import FixedAttackDetector, start_warmup_thread  # Sans start_fixed_cleanup_thread
+from security.model_manager import ModelManager
+from security.log_pipeline import configure_log_pipeline
 from blockchain.blockchain_client import blockchain_logger
+from config import MODEL_CONFIG, LOGGING_CONFIG, GEO_CONFIG
 
 FRONTEND_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend')
 
@@ -27,15 +32,73 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Lax pour développement local
 
 CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 
+# Taille maximale d'un lot pour /api/security/analyze-batch
+MAX_BATCH_EVENTS = 10000
+
+# ✅ Sessions actives (sid -> email, ip, ouverture) pour pouvoir les révoquer après une escalade
+# Ordre d'insertion = ordre chronologique: les entrées plus anciennes que
+# PERMANENT_SESSION_LIFETIME (cookie expiré) sont purgées en tête de table
+active_sessions = OrderedDict()
+revoked_sessions = OrderedDict()  # sid -> date de révocation
+sessions_lock = threading.Lock()
+
+def prune_sessions(now):
+    """Supprime les sessions ouvertes / révoquées depuis plus que la durée de vie (sous sessions_lock)"""
+    cutoff = now - app.config['PERMANENT_SESSION_LIFETIME'].total_seconds()
+    while active_sessions and next(iter(active_sessions.values()))['opened_at'] <= cutoff:
+        active_sessions.popitem(last=False)
+    while revoked_sessions and next(iter(revoked_sessions.values())) <= cutoff:
+        revoked_sessions.popitem(last=False)
+
+def register_session(sid, email, ip_address):
+    """Enregistre une session ouverte"""
+    now = time.time()
+    with sessions_lock:
+        prune_sessions(now)
+        active_sessions[sid] = {'email': email, 'ip': ip_address, 'opened_at': now}
+
+def revoke_sessions_for_escalation(log_data, escalation):
+    """Révoque les sessions du compte visé par un événement escaladé a posteriori
+    
+    Par compte uniquement: une IP partagée (NAT / proxy de l'hôpital) porte
+    les sessions d'autres soignants. L'IP est bloquée par le détecteur
+    (escalate), ce qui refuse les nouvelles connexions sans fermer les leurs.
+    """
+    email = log_data.get('email')
+    ip_address = log_data.get('IP Address')
+    if not email:
+        return
+    
+    now = time.time()
+    with sessions_lock:
+        prune_sessions(now)
+        targets = [sid for sid, info in active_sessions.items() if info['email'] == email]
+        for sid in targets:
+            del active_sessions[sid]
+            revoked_sessions[sid] = now
+    
+    if targets:
+        print(f"🔒 {len(targets)} session(s) révoquée(s) suite à {escalation['attack_type']} ({email} / {ip_address})")
+
+@app.before_request
+def enforce_session_revocation():
+    """Ferme les sessions révoquées par une escalade"""
+    sid = session.get('sid')
+    if sid is None:
+        return
+    with sessions_lock:
+        revoked = revoked_sessions.pop(sid, None) is not None
+    if revoked:
+        session.clear()
+
 # ✅ Fonction de nettoyage définie localement
-def start_fixed_cleanup_thread(detector, interval_minutes=5):
-    """Démarre le thread de nettoyage des événements anciens"""
+def start_fixed_cleanup_thread(detector, interval_seconds=1.0):
+    """Démarre le thread d'expiration incrémentale des événements anciens"""
     def cleanup_loop():
         while True:
-            time.sleep(interval_minutes * 60)
+            time.sleep(interval_seconds)
             try:
                 detector.cleanup_old_events()
-                detector.logger.info("🧹 Nettoyage des anciens événements effectué")
             except Exception as e:
                 print(f"❌ Erreur nettoyage: {e}")
     
@@ -43,54 +106,161 @@ def start_fixed_cleanup_thread(detector, interval_minutes=5):
     thread.start()
     return thread
 
-# Initialiser le détecteur BERT
-print("🔄 Chargement du modèle de détection d'attaques BERT...")
-try:
-    # ✅ Chemin relatif depuis backend/ vers le modèle
-    model_path = "../bert_attack_detector/final_model"
+# Détecteur et gestionnaire de modèles (créés par init_services)
+detector = None
+model_manager = None
+services_initialized = False
+services_lock = threading.Lock()
+
+def ensure_services():
+    """Initialise les services une seule fois par processus serveur (sous verrou)"""
+    global services_initialized
+    if services_initialized:
+        return
+    with services_lock:
+        if not services_initialized:
+            init_services()
+            services_initialized = True
+
+@app.before_request
+def init_services_on_first_request():
+    """Serveurs WSGI (gunicorn, flask run): initialisation à la première requête du processus"""
+    ensure_services()
+
+def init_services():
+    """Initialise journalisation, géolocalisation, détecteur et blockchain
     
-    # Vérifier si le modèle existe
-    if not os.path.exists(model_path):
-        # Essayer un autre chemin possible
-        model_path = "../models/distilbert_attack_detector"
-        if not os.path.exists(model_path):
-            print(f"⚠️ Modèle introuvable. Chemins essayés:")
-            print(f"   - ../bert_attack_detector/final_model")
-            print(f"   - ../models/distilbert_attack_detector")
+    Via ensure_services: au démarrage (__main__) ou à la première requête
+    de chaque processus WSGI, pas à l'import du module. Les processus
+    d'inférence du pool sont lancés par security.inference_worker et
+    n'importent pas ce module.
+    """
+    global detector, model_manager
     
-    detector = FixedAttackDetector(
-        model_path=model_path,
-        time_window_minutes=2,
-        threshold=0.6
+    # Journalisation asynchrone partagée (détecteur + security_logger)
+    configure_log_pipeline(
+        max_queue_size=LOGGING_CONFIG['queue_size'],
+        console_rate=LOGGING_CONFIG['console_rate'],
+        console_burst=LOGGING_CONFIG['console_burst']
     )
-    
-    # Démarrer le thread de nettoyage
-    cleanup_thread = start_fixed_cleanup_thread(detector, interval_minutes=5)
-    print("✅ Détecteur BERT initialisé avec succès!")
-    
-except Exception as e:
-    print(f"❌ Erreur initialisation détecteur BERT: {e}")
-    detector = None
-
-# Initialiser la blockchain
-print("🔗 Initialisation de la connexion blockchain...")
-try:
-    contract_address = "0xB4D6018A9F2c3aF5d3Aa3D88D791299BdD57D729"
-    
-    # ✅ CHEMIN CORRIGÉ - Depuis backend/ vers blockchain/
-    abi_path = "../blockchain/build/contracts/AttackLogger.json"
-    
-    # Vérifier que le fichier existe
-    if os.path.exists(abi_path):
-        blockchain_logger.setup_contract(contract_address, abi_path)
-        print(f"✅ Connexion blockchain initialisée: {abi_path}")
-    else:
-        print(f"⚠️ Fichier blockchain introuvable: {abi_path}")
-        print("   L'application fonctionnera sans blockchain")
+
+    # Géolocalisation hors ligne (recharge automatique quand la base est reconstruite)
+    security_logger.configure_geoip(
+        GEO_CONFIG['geoip_db_path'],
+        online_lookup=GEO_CONFIG['online_lookup'],
+        check_interval_seconds=GEO_CONFIG['check_interval_seconds']
+    )
+    security_logger.configure_user_agent_cache(GEO_CONFIG['ua_cache_size'], GEO_CONFIG['ua_cache_ttl_seconds'])
+    if GEO_CONFIG['online_lookup'] and GEO_CONFIG['async_enrichment']:
+        # IP froides résolues en arrière-plan (budget global + cache positif / négatif)
+        security_logger.configure_geo_enrichment(
+            workers=GEO_CONFIG['enrichment_workers'],
+            max_queue_size=GEO_CONFIG['enrichment_queue_size'],
+            cache_size=GEO_CONFIG['cache_size'],
+            positive_ttl_seconds=GEO_CONFIG['positive_ttl_seconds'],
+            negative_ttl_seconds=GEO_CONFIG['negative_ttl_seconds'],
+            lookups_per_second=GEO_CONFIG['lookups_per_second']
+        )
+
+    # Initialiser le détecteur BERT
+    print("🔄 Chargement du modèle de détection d'attaques BERT...")
+    try:
+        # ✅ Chemin relatif depuis backend/ vers le modèle
+        model_path = "../bert_attack_detector/final_model"
         
-except Exception as e:
-    print(f"❌ Erreur initialisation blockchain: {e}")
-    print("   L'application fonctionnera sans blockchain")
+        # Vérifier si le modèle existe
+        if not os.path.exists(model_path):
+            # Essayer un autre chemin possible
+            model_path = "../models/distilbert_attack_detector"
+            if not os.path.exists(model_path):
+                print(f"⚠️ Modèle introuvable. Chemins essayés:")
+                print(f"   - ../bert_attack_detector/final_model")
+                print(f"   - ../models/distilbert_attack_detector")
+        
+        detector = FixedAttackDetector(
+            model_path=model_path,
+            time_window_minutes=2,
+            threshold=0.6,
+            batching=MODEL_CONFIG['batching'],
+            max_batch_size=MODEL_CONFIG['max_batch_size'],
+            max_wait_ms=MODEL_CONFIG['max_wait_ms'],
+            max_queue_size=MODEL_CONFIG['max_queue_size'],
+            cache_size=MODEL_CONFIG['cache_size'],
+            cache_ttl_seconds=MODEL_CONFIG['cache_ttl_seconds'],
+            inference_backend=MODEL_CONFIG['inference_backend'],
+            onnx_path=MODEL_CONFIG['onnx_path'],
+            quantization=MODEL_CONFIG['quantization'],
+            max_length=MODEL_CONFIG['max_length'],
+            bucket_size=MODEL_CONFIG['bucket_size'],
+            inference_workers=MODEL_CONFIG['inference_workers'],
+            threads_per_worker=MODEL_CONFIG['threads_per_worker'],
+            cascade=MODEL_CONFIG['cascade'],
+            bert_weight=MODEL_CONFIG['bert_weight'],
+            behavioral_weight=MODEL_CONFIG['behavioral_weight'],
+            async_scoring=MODEL_CONFIG['async_scoring'],
+            async_queue_size=MODEL_CONFIG['async_queue_size'],
+            block_duration_minutes=MODEL_CONFIG['block_duration_minutes'],
+            hashed_model_path=MODEL_CONFIG['hashed_model_path'],
+            first_stage=MODEL_CONFIG['first_stage'],
+            first_stage_low=MODEL_CONFIG['first_stage_low'],
+            first_stage_high=MODEL_CONFIG['first_stage_high'],
+            velocity_window_seconds=MODEL_CONFIG['velocity_window_seconds'],
+            max_tracked_users=MODEL_CONFIG['max_tracked_users'],
+            max_tracked_ips=MODEL_CONFIG['max_tracked_ips'],
+            sketch_window_seconds=MODEL_CONFIG['sketch_window_seconds'],
+            sketch_max_keys=MODEL_CONFIG['sketch_max_keys'],
+            attack_log_queue_size=MODEL_CONFIG['attack_log_queue_size'],
+            attack_log_batch_size=MODEL_CONFIG['attack_log_batch_size'],
+            attack_log_flush_ms=MODEL_CONFIG['attack_log_flush_ms'],
+            attack_log_fsync=MODEL_CONFIG['attack_log_fsync'],
+            attack_log_fsync_interval_seconds=MODEL_CONFIG['attack_log_fsync_interval_seconds'],
+            attack_log_block_ms=MODEL_CONFIG['attack_log_block_ms']
+        )
+        detector.add_escalation_callback(revoke_sessions_for_escalation)
+        if security_logger.geo_enricher is not None:
+            security_logger.geo_enricher.add_listener(detector.backfill_geo)
+        
+        # Warmup optionnel: le détecteur n'est déclaré prêt qu'après chargement du modèle
+        if MODEL_CONFIG['warmup_on_startup']:
+            warmup_thread = start_warmup_thread(detector, passes=MODEL_CONFIG['warmup_passes'])
+        else:
+            detector.ready.set()
+        
+        # Gestionnaire de versions pour le remplacement à chaud du modèle
+        model_manager = ModelManager(
+            detector,
+            registry_dir=MODEL_CONFIG['registry_dir'],
+            warmup_passes=MODEL_CONFIG['warmup_passes']
+        )
+        
+        # Démarrer le thread de nettoyage
+        cleanup_thread = start_fixed_cleanup_thread(detector, interval_seconds=MODEL_CONFIG['expiry_tick_seconds'])
+        print("✅ Détecteur BERT initialisé avec succès!")
+        
+    except Exception as e:
+        print(f"❌ Erreur initialisation détecteur BERT: {e}")
+        detector = None
+        model_manager = None
+
+    # Initialiser la blockchain
+    print("🔗 Initialisation de la connexion blockchain...")
+    try:
+        contract_address = "0xB4D6018A9F2c3aF5d3Aa3D88D791299BdD57D729"
+        
+        # ✅ CHEMIN CORRIGÉ - Depuis backend/ vers blockchain/
+        abi_path = "../blockchain/build/contracts/AttackLogger.json"
+        
+        # Vérifier que le fichier existe
+        if os.path.exists(abi_path):
+            blockchain_logger.setup_contract(contract_address, abi_path)
+            print(f"✅ Connexion blockchain initialisée: {abi_path}")
+        else:
+            print(f"⚠️ Fichier blockchain introuvable: {abi_path}")
+            print("   L'application fonctionnera sans blockchain")
+            
+    except Exception as e:
+        print(f"❌ Erreur initialisation blockchain: {e}")
+        print("   L'application fonctionnera sans blockchain")
 
 # Configuration PostgreSQL
 INIT_DB_CONFIG = {
@@ -199,23 +369,42 @@ def validate_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
-def analyze_login_attempt(login_data, client_info):
-    """Analyse une tentative de login avec BERT et blockchain"""
+def build_analysis_data(login_data, client_info):
+    """Entrée de log du détecteur pour une tentative de login"""
+    return {
+        **login_data,
+        'IP Address': client_info['ip_address'],
+        'Country': client_info['country'],
+        'Browser Name and Version': client_info['browser_name_version'],
+        'OS Name and Version': client_info['os_name_version'],
+        'Device Type': client_info['device_type'],
+        # Résolution réellement en cours (file pleine = pays inconnu, pénalisé)
+        'Geo Pending': client_info.get('geo_status') == 'pending',
+        'timestamp': datetime.now().isoformat()
+    }
+
+def record_login_outcome(login_data, client_info):
+    """Enregistre l'issue d'une tentative sans la ré-analyser (vitesses, sketches, historiques)"""
+    if detector is None:
+        return
+    try:
+        detector.update_activity_tracking(build_analysis_data(login_data, client_info))
+    except Exception as e:
+        print(f"❌ Erreur suivi login: {e}")
+
+def analyze_login_attempt(login_data, client_info, track=True):
+    """Analyse une tentative de login avec BERT et blockchain
+    
+    track=False pour le contrôle avant authentification: l'issue n'est pas
+    encore connue, seule l'analyse finale (ou record_login_outcome) l'enregistre.
+    """
     if detector is None:
         return {'is_attack': False, 'confidence': 0.0, 'attack_type': 'system_offline'}
     
     try:
-        analysis_data = {
-            **login_data,
-            'IP Address': client_info['ip_address'],
-            'Country': client_info['country'],
-            'Browser Name and Version': client_info['browser_name_version'],
-            'OS Name and Version': client_info['os_name_version'],
-            'Device Type': client_info['device_type'],
-            'timestamp': datetime.now().isoformat()
-        }
+        analysis_data = build_analysis_data(login_data, client_info)
         
-        result = detector.process_log_entry(analysis_data)
+        result = detector.process_log_entry(analysis_data, track=track)
         
         # Logger sur blockchain si attaque détectée ET blockchain disponible
         if result.get('is_attack', False) and blockchain_logger.contract:
@@ -227,8 +416,8 @@ def analyze_login_attempt(login_data, client_info):
                 'country': client_info['country'],
                 'attack_type': result.get('attack_type', 'unknown'),
                 'confidence': result.get('confidence', 0.0),
-                'bert_probability': result.get('bert_probability', 0.0),
-                'bert_used': True,
+                'bert_probability': result.get('bert_probability') or 0.0,
+                'bert_used': result.get('bert_used', True),
                 'login_successful': login_data.get('Login Successful', False)
             }
             
@@ -281,7 +470,11 @@ def home():
             'register': 'POST /api/register',
             'login': 'POST /api/login',
             'security_analyze': 'POST /api/security/analyze-login',
+            'security_analyze_batch': 'POST /api/security/analyze-batch',
             'security_stats': 'GET /api/security/stats',
+            'health_ready': 'GET /api/health/ready',
+            'model_versions': 'GET /api/security/model',
+            'model_swap': 'POST /api/security/model/swap',
             'blockchain_stats': 'GET /api/blockchain/stats',
             'profile': 'GET /api/user/profile'
         }
@@ -313,21 +506,24 @@ def login():
             )
             return jsonify({'success': False, 'message': 'Email et mot de passe requis'}), 400
         
-        # Analyse de sécurité avant l'authentification
+        # Analyse de sécurité avant l'authentification (issue inconnue: non comptée)
         client_info = security_logger.get_client_info()
         security_analysis = analyze_login_attempt(
             {'email': email, 'Login Successful': False}, 
-            client_info
+            client_info,
+            track=False
         )
         
         # Si attaque détectée, bloquer immédiatement
         if security_analysis.get('is_attack', False):
+            record_login_outcome({'email': email, 'Login Successful': False}, client_info)
             security_logger.log_login_attempt(
                 user_id=None,
                 email=email,
                 successful=False,
                 failure_reason=f"Attaque détectée: {security_analysis.get('attack_type', 'unknown')}",
-                is_attack_ip=True
+                is_attack_ip=True,
+                client_info=client_info
             )
             
             response_data = {
@@ -351,7 +547,8 @@ def login():
                 user_id=None,
                 email=email,
                 successful=False,
-                failure_reason='Base de données indisponible'
+                failure_reason='Base de données indisponible',
+                client_info=client_info
             )
             return jsonify({'success': False, 'message': 'Base de données indisponible'}), 500
         
@@ -367,11 +564,13 @@ def login():
             user = cur.fetchone()
             
             if not user:
+                record_login_outcome({'email': email, 'Login Successful': False}, client_info)
                 security_logger.log_login_attempt(
                     user_id=None,
                     email=email,
                     successful=False,
-                    failure_reason='Utilisateur non trouvé'
+                    failure_reason='Utilisateur non trouvé',
+                    client_info=client_info
                 )
                 return jsonify({'success': False, 'message': 'Email ou mot de passe incorrect'}), 401
             
@@ -386,7 +585,8 @@ def login():
                     email=email,
                     successful=False,
                     failure_reason='Mot de passe incorrect',
-                    is_attack_ip=failed_attempt_analysis.get('is_attack', False)
+                    is_attack_ip=failed_attempt_analysis.get('is_attack', False),
+                    client_info=client_info
                 )
                 return jsonify({'success': False, 'message': 'Email ou mot de passe incorrect'}), 401
             
@@ -400,7 +600,8 @@ def login():
                 user_id=user['id'],
                 email=email,
                 successful=True,
-                is_attack_ip=success_analysis.get('is_attack', False)
+                is_attack_ip=success_analysis.get('is_attack', False),
+                client_info=client_info
             )
             
             # Session
@@ -408,6 +609,8 @@ def login():
             session['user_nom'] = user['nom_complet']
             session['user_email'] = user['email']
             session['user_role'] = user['role']
+            session['sid'] = secrets.token_hex(16)
+            register_session(session['sid'], user['email'], client_info['ip_address'])
             
             response_data = {
                 'success': True, 
@@ -435,7 +638,8 @@ def login():
                 user_id=None,
                 email=email,
                 successful=False,
-                failure_reason=f'Erreur serveur: {str(e)}'
+                failure_reason=f'Erreur serveur: {str(e)}',
+                client_info=client_info
             )
             return jsonify({'success': False, 'message': 'Erreur lors de la connexion'}), 500
         finally:
@@ -567,6 +771,55 @@ def security_analyze_login():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/security/analyze-batch', methods=['POST'])
+def security_analyze_batch():
+    """Analyse un lot d'événements de login (résultats dans l'ordre d'entrée)"""
+    try:
+        data = request.get_json()
+        
+        if detector is None:
+            return jsonify({
+                'success': False,
+                'error': 'Système de détection BERT non disponible'
+            }), 503
+        
+        events = data.get('events') if isinstance(data, dict) else data
+        if not isinstance(events, list) or not all(isinstance(e, dict) for e in events):
+            return jsonify({
+                'success': False,
+                'error': "Format attendu: liste d'événements ou {'events': [...]}"
+            }), 400
+        
+        if len(events) > MAX_BATCH_EVENTS:
+            return jsonify({
+                'success': False,
+                'error': f'Lot trop volumineux (maximum {MAX_BATCH_EVENTS} événements)'
+            }), 413
+        
+        now = datetime.now().isoformat()
+        for event in events:
+            if 'timestamp' not in event:
+                event['timestamp'] = now
+        
+        results = detector.process_log_entries(events)
+        attack_count = sum(1 for r in results if r['is_attack'])
+        
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'attack_count': attack_count,
+            'results': [
+                {
+                    'detection_result': result,
+                    'action_recommended': 'block' if result['is_attack'] else 'allow'
+                }
+                for result in results
+            ]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/security/stats', methods=['GET'])
 def get_security_stats():
     """Retourne les statistiques de sécurité"""
@@ -577,6 +830,12 @@ def get_security_stats():
         }), 503
     
     stats = detector.get_statistics()
+    stats['client_info'] = security_logger.get_client_info_stats()
+    with sessions_lock:
+        prune_sessions(time.time())
+        stats['sessions'] = {'active': len(active_sessions), 'revoked': len(revoked_sessions)}
+    if model_manager is not None:
+        stats['model_manager'] = model_manager.get_statistics()
     
     return jsonify({
         'success': True,
@@ -585,6 +844,62 @@ def get_security_stats():
         'time_window_minutes': detector.time_window.total_seconds() / 60
     }), 200
 
+@app.route('/api/security/model', methods=['GET'])
+def get_model_info():
+    """Version active du modèle et versions disponibles dans le registre"""
+    if model_manager is None:
+        return jsonify({
+            'success': False,
+            'error': 'Système de détection BERT non disponible'
+        }), 503
+    
+    return jsonify({
+        'success': True,
+        'model': model_manager.get_statistics()
+    }), 200
+
+@app.route('/api/security/model/swap', methods=['POST'])
+def swap_model():
+    """Charge, chauffe puis bascule à chaud vers une version du registre"""
+    if model_manager is None:
+        return jsonify({
+            'success': False,
+            'error': 'Système de détection BERT non disponible'
+        }), 503
+    
+    data = request.get_json() or {}
+    version = data.get('version')
+    if not version:
+        return jsonify({'success': False, 'error': 'Champ "version" requis'}), 400
+    
+    try:
+        model_manager.swap_async(version)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    
+    return jsonify({
+        'success': True,
+        'message': f'Bascule vers la version {version} démarrée',
+        'model': model_manager.get_statistics()
+    }), 202
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Sonde de disponibilité pour le load balancer"""
+    if detector is None:
+        return jsonify({'ready': False, 'reason': 'detector_offline'}), 503
+    
+    ready = detector.is_ready()
+    
+    return jsonify({
+        'ready': ready,
+        'bert_available': detector._model_loaded,
+        'model_load_seconds': detector.model_load_seconds,
+        'warmup_seconds': detector.warmup_seconds
+    }), 200 if ready else 503
+
 @app.route('/api/blockchain/stats', methods=['GET'])
 def get_blockchain_stats():
     """Retourne les statistiques de la blockchain"""
@@ -613,6 +928,8 @@ def get_blockchain_stats():
 @app.route('/api/logout', methods=['POST'])
 def logout():
     """Déconnexion de l'utilisateur"""
+    with sessions_lock:
+        active_sessions.pop(session.get('sid'), None)
     session.clear()
     return jsonify({'success': True, 'message': 'Déconnexion réussie'}), 200
 
@@ -712,6 +1029,7 @@ def check_session():
 
 if __name__ == '__main__':
     print("🚀 Démarrage de MediConnect avec détection BERT & Blockchain...")
+    ensure_services()
     print("📊 Initialisation de la base de données...")
     if init_db():
         print("✅ Base de données prête")
@@ -44,7 +44,87 @@ MODEL_CONFIG = {
     'model_name': 'distilbert-base-uncased',
     'threshold': float(os.getenv('DETECTION_THRESHOLD', '0.6')),
     'time_window_minutes': int(os.getenv('TIME_WINDOW_MINUTES', '2')),
-    'max_length': 256
+    # Fenêtre des compteurs de vitesse (tentatives / échecs / emails distincts par IP)
+    'velocity_window_seconds': int(os.getenv('VELOCITY_WINDOW_SECONDS', '60')),
+    # Période du tick d'expiration incrémentale des historiques d'activité
+    'expiry_tick_seconds': float(os.getenv('ACTIVITY_EXPIRY_TICK_SECONDS', '1')),
+    # Plafond de clés suivies (éviction LRU) pour borner la mémoire du détecteur
+    'max_tracked_users': int(os.getenv('ACTIVITY_MAX_USERS', '100000')),
+    'max_tracked_ips': int(os.getenv('ACTIVITY_MAX_IPS', '200000')),
+    # Sketches probabilistes (HyperLogLog / Count-Min) pour le credential stuffing distribué
+    'sketch_window_seconds': int(os.getenv('SKETCH_WINDOW_SECONDS', '3600')),
+    'sketch_max_keys': int(os.getenv('SKETCH_MAX_KEYS', '50000')),
+    # Journal detected_attacks.jsonl: écriture groupée en arrière-plan
+    'attack_log_queue_size': int(os.getenv('ATTACK_LOG_QUEUE_SIZE', '10000')),
+    'attack_log_batch_size': int(os.getenv('ATTACK_LOG_BATCH_SIZE', '256')),
+    'attack_log_flush_ms': float(os.getenv('ATTACK_LOG_FLUSH_MS', '200')),
+    # fsync: 'always' (chaque lot), 'interval' (au plus toutes les N secondes) ou 'never'
+    'attack_log_fsync': os.getenv('ATTACK_LOG_FSYNC', 'interval'),
+    'attack_log_fsync_interval_seconds': float(os.getenv('ATTACK_LOG_FSYNC_INTERVAL_SECONDS', '1')),
+    # Attente max quand la file est pleine avant d'abandonner la ligne (0 = abandon immédiat)
+    'attack_log_block_ms': float(os.getenv('ATTACK_LOG_BLOCK_MS', '0')),
+    'max_length': int(os.getenv('BERT_MAX_LENGTH', '256')),
+    # Score combiné = bert_weight * P(attaque) + behavioral_weight * score comportemental
+    'bert_weight': float(os.getenv('BERT_WEIGHT', '0.7')),
+    'behavioral_weight': float(os.getenv('BEHAVIORAL_WEIGHT', '0.3')),
+    # Cascade: BERT n'est appelé que si sa sortie peut encore changer la décision.
+    # Exacte, elle ne saute BERT que si bert_weight <= seuil (0.6: connexions sans
+    # signal comportemental) ou behavioral_weight > seuil (attaques évidentes) ; avec
+    # les poids 0.7 / 0.3 BERT peut toujours inverser la décision et rien n'est sauté
+    'cascade': os.getenv('DETECTION_CASCADE', 'False').lower() == 'true',
+    # Scoring BERT asynchrone: login décidé par le chemin rapide, escalade a posteriori
+    'async_scoring': os.getenv('DETECTION_ASYNC', 'False').lower() == 'true',
+    'async_queue_size': int(os.getenv('DETECTION_ASYNC_QUEUE_SIZE', '10000')),
+    'block_duration_minutes': int(os.getenv('LOCKOUT_DURATION', '15')),
+    # Modèle haché léger (python -m security.hashed_model <logs.csv>)
+    'hashed_model_path': os.getenv('HASHED_MODEL_PATH', os.path.join(BASE_DIR, 'models/hashed_fallback.npz')),
+    'first_stage': os.getenv('DETECTION_FIRST_STAGE', 'False').lower() == 'true',
+    'first_stage_low': float(os.getenv('FIRST_STAGE_LOW', '0.05')),
+    'first_stage_high': float(os.getenv('FIRST_STAGE_HIGH', '0.95')),
+    'bucket_size': int(os.getenv('BERT_BUCKET_SIZE', '32')),
+    # Pool de processus d'inférence (0 = inférence dans les threads Flask)
+    'inference_workers': int(os.getenv('BERT_INFERENCE_WORKERS', '0')),
+    'threads_per_worker': int(os.getenv('BERT_THREADS_PER_WORKER', '1')),
+    # Regroupement des prédictions concurrentes (micro-batching)
+    'batching': os.getenv('BERT_BATCHING', 'False').lower() == 'true',
+    'max_batch_size': int(os.getenv('BERT_MAX_BATCH_SIZE', '16')),
+    'max_wait_ms': float(os.getenv('BERT_MAX_WAIT_MS', '5')),
+    'max_queue_size': int(os.getenv('BERT_MAX_QUEUE_SIZE', '1024')),
+    # Cache LRU+TTL des prédictions (0 = désactivé)
+    'cache_size': int(os.getenv('BERT_CACHE_SIZE', '4096')),
+    'cache_ttl_seconds': float(os.getenv('BERT_CACHE_TTL_SECONDS', '300')),
+    # Backend d'inférence: 'torch' ou 'onnx' (repli sur torch si le fichier manque ou ne se charge pas)
+    'inference_backend': os.getenv('BERT_BACKEND', 'torch'),
+    'onnx_path': os.getenv('BERT_ONNX_PATH') or None,
+    # Quantification: 'none' ou 'int8' (quantification dynamique, CPU, torch uniquement)
+    'quantization': os.getenv('BERT_QUANTIZATION', 'none'),
+    # Chargement + passages de chauffe au démarrage (sinon chargement paresseux)
+    'warmup_on_startup': os.getenv('BERT_WARMUP', 'False').lower() == 'true',
+    'warmup_passes': int(os.getenv('BERT_WARMUP_PASSES', '3')),
+    # Registre versionné pour le remplacement à chaud (un dossier HuggingFace par version)
+    'registry_dir': os.getenv('MODEL_REGISTRY_DIR', os.path.join(BASE_DIR, 'models/registry'))
+}
+
+# === GÉOLOCALISATION ===
+GEO_CONFIG = {
+    # Base GeoIP locale (cd backend && python -m security.geoip build <reseaux.csv>)
+    'geoip_db_path': os.getenv('GEOIP_DB_PATH', os.path.join(BASE_DIR, 'data/geoip.bin')),
+    # Appel ip-api.com si l'IP est absente de la base locale (False sur les nœuds isolés)
+    'online_lookup': os.getenv('GEOIP_ONLINE_LOOKUP', 'True').lower() == 'true',
+    'check_interval_seconds': float(os.getenv('GEOIP_CHECK_INTERVAL_SECONDS', '60')),
+    # Résolution en ligne en arrière-plan (la requête continue avec geo_status='pending',
+    # pénalité 'pays inconnu' appliquée à la résolution). Désactivé par défaut: appel synchrone
+    'async_enrichment': os.getenv('GEO_ASYNC', 'False').lower() == 'true',
+    'enrichment_workers': int(os.getenv('GEO_WORKERS', '2')),
+    'enrichment_queue_size': int(os.getenv('GEO_QUEUE_SIZE', '1000')),
+    'cache_size': int(os.getenv('GEO_CACHE_SIZE', '100000')),
+    'positive_ttl_seconds': float(os.getenv('GEO_CACHE_TTL_SECONDS', '86400')),
+    'negative_ttl_seconds': float(os.getenv('GEO_NEGATIVE_TTL_SECONDS', '900')),
+    # Budget global d'appels au backend (ip-api.com gratuit: 45 requêtes / minute)
+    'lookups_per_second': float(os.getenv('GEO_LOOKUPS_PER_SECOND', '0.75')),
+    # Cache LRU+TTL du parsing User-Agent (0 = désactivé)
+    'ua_cache_size': int(os.getenv('UA_CACHE_SIZE', '1024')),
+    'ua_cache_ttl_seconds': float(os.getenv('UA_CACHE_TTL_SECONDS', '3600'))
 }
 
 # === BLOCKCHAIN ===
@@ -62,7 +142,11 @@ LOGGING_CONFIG = {
     'detected_attacks_file': os.path.join(BASE_DIR, 'logs/detected_attacks.jsonl'),
     'security_logs_json': os.path.join(BASE_DIR, 'logs/security_logs.json'),
     'security_logs_csv': os.path.join(BASE_DIR, 'logs/security_logs.csv'),
-    'level': os.getenv('LOG_LEVEL', 'INFO')
+    'level': os.getenv('LOG_LEVEL', 'INFO'),
+    # Pipeline asynchrone (QueueHandler -> thread listener): file bornée, console limitée
+    'queue_size': int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+    'console_rate': float(os.getenv('LOG_CONSOLE_RATE', '20')),
+    'console_burst': int(os.getenv('LOG_CONSOLE_BURST', '50'))
 }
 
 # === SECURITY ===
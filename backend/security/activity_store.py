@@ -0,0 +1,237 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from security.concurrency import stripe_index
+from security.event_records import EVENT_BYTES, KeyEvents, SharedInterner, decode_event
+from security.timing_wheel import TimingWheel
+
+
+class _ActivityShard:
+    """Bande d'ActivityStore: clés, roue d'expiration et verrou propres (internement partagé)"""
+
+    def __init__(self, window_seconds, max_events_per_key, interner, max_keys=100000,
+                 resolution_seconds=1.0, expire_budget=256):
+        self.window_seconds = window_seconds
+        self.max_events_per_key = max_events_per_key
+        self.max_keys = max_keys
+        self.expire_budget = expire_budget
+
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.interner = interner
+        self.event_count = 0
+        self.wheel = TimingWheel(window_seconds, resolution_seconds)
+        self.stats = {
+            'evicted_events': 0,
+            'evicted_keys': 0,
+            'lru_evictions': 0,
+            'expiry_steps': 0,
+            'expiry_seconds': 0.0,
+            'max_step_ms': 0.0
+        }
+
+    def append(self, key, timestamp_ms, ip_address, email, success, now=None):
+        """Ajoute un événement à l'historique de la clé"""
+        now = time.time() if now is None else now
+        with self.lock:
+            self._expire_step(now, self.expire_budget)
+
+            events = self.entries.get(key)
+            if events is None:
+                events = KeyEvents(self.max_events_per_key)
+                self.entries[key] = events
+                if len(self.entries) > self.max_keys:
+                    self._evict_coldest()
+            else:
+                self.entries.move_to_end(key)
+
+            evicted = events.append(
+                timestamp_ms, self.interner.acquire(ip_address), self.interner.acquire(email), success
+            )
+            if evicted is None:
+                self.event_count += 1
+            else:
+                self._release(evicted)
+            self.wheel.schedule(key, events.oldest_timestamp_ms() / 1000 + self.window_seconds)
+
+    def _release(self, id_pair):
+        self.interner.release(id_pair[0])
+        self.interner.release(id_pair[1])
+
+    def _evict_coldest(self):
+        """Évince la clé la moins récemment active (plafond de clés atteint)"""
+        key, events = self.entries.popitem(last=False)
+        self.wheel.cancel(key)
+        for id_pair in events.id_pairs():
+            self._release(id_pair)
+        self.event_count -= len(events)
+        self.stats['lru_evictions'] += 1
+
+    def get(self, key):
+        """Événements récents de la clé (décodés en dictionnaires)"""
+        with self.lock:
+            events = self.entries.get(key)
+            if not events:
+                return []
+            lookup = self.interner.lookup
+            return [
+                decode_event(timestamp_ms, lookup(ip_id), lookup(email_id), success)
+                for timestamp_ms, ip_id, email_id, success in events.records()
+            ]
+
+    def _expire_step(self, now, budget):
+        """Expire au plus `budget` clés échues ; retourne le nombre traité"""
+        started = time.perf_counter()
+        self.wheel.advance(now)
+        due = self.wheel.pop_due(budget)
+        if not due:
+            return 0
+
+        cutoff_ms = (now - self.window_seconds) * 1000
+        for key in due:
+            events = self.entries.get(key)
+            if events is None:
+                continue
+            while events and events.oldest_timestamp_ms() <= cutoff_ms:
+                self._release(events.popleft())
+                self.event_count -= 1
+                self.stats['evicted_events'] += 1
+            if events:
+                self.wheel.schedule(key, events.oldest_timestamp_ms() / 1000 + self.window_seconds)
+            else:
+                del self.entries[key]
+                self.stats['evicted_keys'] += 1
+
+        elapsed = time.perf_counter() - started
+        self.stats['expiry_steps'] += 1
+        self.stats['expiry_seconds'] += elapsed
+        self.stats['max_step_ms'] = max(self.stats['max_step_ms'], elapsed * 1000)
+        return len(due)
+
+    def expire(self, now=None, budget=None):
+        """Tick: traite les échéances par lots en relâchant le verrou entre deux lots"""
+        now = time.time() if now is None else now
+        budget = budget or self.expire_budget
+        processed = 0
+        while True:
+            with self.lock:
+                step = self._expire_step(now, budget)
+            processed += step
+            if step < budget:
+                return processed
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def memory_usage(self):
+        """Estimation (octets) de la mémoire actuelle et du plafond théorique, hors internement"""
+        return {
+            'approx_bytes': len(self.entries) * KEY_OVERHEAD_BYTES + self.event_count * EVENT_BYTES,
+            'max_bytes': self.max_keys * (KEY_OVERHEAD_BYTES + self.max_events_per_key * EVENT_BYTES)
+        }
+
+    def get_statistics(self):
+        with self.lock:
+            stats = self.stats.copy()
+            stats['keys'] = len(self.entries)
+            stats['max_keys'] = self.max_keys
+            stats['events'] = self.event_count
+            stats['scheduled_keys'] = len(self.wheel)
+            stats['pending_expirations'] = self.wheel.pending_due()
+            stats.update(self.memory_usage())
+        stats['expiry_ms'] = stats.pop('expiry_seconds') * 1000
+        return stats
+
+
+class ActivityStore:
+    """Historique d'activité récent par clé (utilisateur ou IP) à expiration incrémentale
+
+    Remplace le `defaultdict(deque)` nettoyé toutes les 5 minutes par
+    reconstruction complète : chaque clé est planifiée dans une roue
+    temporelle à l'échéance de son plus vieil événement, et l'expiration
+    avance par petits pas (à chaque insertion et à chaque tick) avec un
+    budget de clés borné.
+
+    Le nombre de clés est plafonné (`max_keys`) : au-delà, la clé la moins
+    récemment active est évincée (LRU), ce qui borne la mémoire même face à
+    une rotation d'IP (proxies résidentiels, balayage d'un /16).
+
+    Les événements sont stockés en colonnes (KeyEvents) : horodatage en
+    millisecondes, IP et email internés, succès sur un octet. La table
+    d'internement est commune aux bandes : une valeur n'y figure qu'une fois.
+
+    Les clés sont réparties par hachage sur `stripes` bandes indépendantes :
+    les threads qui traitent des IP / utilisateurs différents ne prennent
+    pas le même verrou.
+    """
+
+    def __init__(self, window_seconds, max_events_per_key, max_keys=100000, stripes=16,
+                 resolution_seconds=1.0, expire_budget=256):
+        self.window_seconds = window_seconds
+        self.max_events_per_key = max_events_per_key
+        self.max_keys = max_keys
+        self.interner = SharedInterner(stripes)
+        self.shards = [
+            _ActivityShard(window_seconds, max_events_per_key, self.interner, -(-max_keys // stripes),
+                           resolution_seconds, expire_budget)
+            for _ in range(stripes)
+        ]
+
+    def _shard(self, key):
+        return self.shards[stripe_index(key, len(self.shards))]
+
+    def append(self, key, timestamp_ms, ip_address, email, success, now=None):
+        """Ajoute un événement à l'historique de la clé"""
+        self._shard(key).append(key, timestamp_ms, ip_address, email, success, now=now)
+
+    def get(self, key):
+        """Événements récents de la clé (décodés en dictionnaires)"""
+        return self._shard(key).get(key)
+
+    def expire(self, now=None, budget=None):
+        """Tick d'expiration sur toutes les bandes ; retourne le nombre de clés traitées"""
+        now = time.time() if now is None else now
+        return sum(shard.expire(now, budget) for shard in self.shards)
+
+    @property
+    def event_count(self):
+        return sum(shard.event_count for shard in self.shards)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def __contains__(self, key):
+        return key in self._shard(key)
+
+    def get_statistics(self):
+        totals = {}
+        for shard in self.shards:
+            for name, value in shard.get_statistics().items():
+                if name == 'max_step_ms':
+                    totals[name] = max(totals.get(name, 0.0), value)
+                else:
+                    totals[name] = totals.get(name, 0) + value
+        totals['max_keys'] = self.max_keys
+        totals['stripes'] = len(self.shards)
+        totals['interned_values'] = len(self.interner)
+        totals['approx_bytes'] += totals['interned_values'] * INTERNED_VALUE_BYTES
+        # Au plus deux valeurs (IP, email) internées par événement
+        totals['max_bytes'] += 2 * self.max_keys * self.max_events_per_key * INTERNED_VALUE_BYTES
+        return totals
+
+
+def _key_overhead():
+    """Coût d'une clé: objet KeyEvents + trois colonnes vides + entrées de dictionnaire / roue"""
+    events = KeyEvents(1)
+    columns = sys.getsizeof(events.timestamps) + sys.getsizeof(events.ids) + sys.getsizeof(events.successes)
+    return sys.getsizeof(events) + columns + 200
+
+
+KEY_OVERHEAD_BYTES = _key_overhead()
+# Chaîne internée typique (email / IP) + entrées de la table d'internement
+INTERNED_VALUE_BYTES = 120
@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+
+
+class _ScoringJob:
+    __slots__ = ('log_data', 'text', 'behavioral_analysis', 'fast_is_attack', 'enqueued_at')
+
+    def __init__(self, log_data, text, behavioral_analysis, fast_is_attack):
+        self.log_data = log_data
+        self.text = text
+        self.behavioral_analysis = behavioral_analysis
+        self.fast_is_attack = fast_is_attack
+        self.enqueued_at = time.perf_counter()
+
+
+class AsyncBertScorer:
+    """Score DistilBERT a posteriori, hors du chemin de la requête de login
+
+    Le login est décidé par le chemin rapide (règles + verdict en cache) ;
+    l'événement est ensuite scoré en arrière-plan par lots. Si BERT révèle
+    une attaque que le chemin rapide a laissé passer, le détecteur escalade
+    (blocage IP, journal des attaques, révocation de session).
+    """
+
+    def __init__(self, detector, max_queue_size=10000, batch_size=32):
+        self.detector = detector
+        self.batch_size = max(1, int(batch_size))
+        self._queue = queue.Queue(maxsize=int(max_queue_size))
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'enqueued': 0,
+            'dropped': 0,
+            'scored': 0,
+            'unscored': 0,
+            'escalations': 0,
+            'total_lag_ms': 0.0,
+            'max_lag_ms': 0.0
+        }
+
+        self._thread = threading.Thread(target=self._run, name='bert-async-scorer', daemon=True)
+        self._thread.start()
+
+    def submit(self, log_data, text, behavioral_analysis, fast_is_attack):
+        """Met l'événement en file pour scoring BERT (sans bloquer)"""
+        try:
+            self._queue.put_nowait(_ScoringJob(dict(log_data), text, behavioral_analysis, fast_is_attack))
+        except queue.Full:
+            with self._stats_lock:
+                self.stats['dropped'] += 1
+            return False
+
+        with self._stats_lock:
+            self.stats['enqueued'] += 1
+        return True
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._score_batch(batch)
+            except Exception as e:
+                self.detector.logger.error(f"❌ Erreur scoring BERT asynchrone: {e}")
+                with self._stats_lock:
+                    self.stats['unscored'] += len(batch)
+
+    def _score_batch(self, batch):
+        detector = self.detector
+        if not detector._load_model_if_needed():
+            with self._stats_lock:
+                self.stats['unscored'] += len(batch)
+            return
+
+        # Remplit aussi le cache: les événements identiques suivants auront un verdict immédiat
+        predictions = detector.bert_predict_batch([job.text for job in batch])
+        now = time.perf_counter()
+        escalations = 0
+
+        for job, prediction in zip(batch, predictions):
+            is_attack, confidence, attack_type = detector.combine_predictions(
+                prediction, job.behavioral_analysis, job.log_data
+            )
+            if is_attack and not job.fast_is_attack:
+                detector.escalate(job.log_data, confidence, attack_type, prediction, job.behavioral_analysis)
+                escalations += 1
+
+        with self._stats_lock:
+            self.stats['scored'] += len(batch)
+            self.stats['escalations'] += escalations
+            for job in batch:
+                lag_ms = (now - job.enqueued_at) * 1000
+                self.stats['total_lag_ms'] += lag_ms
+                self.stats['max_lag_ms'] = max(self.stats['max_lag_ms'], lag_ms)
+
+    def get_statistics(self):
+        """Compteurs de la file de scoring asynchrone"""
+        with self._stats_lock:
+            stats = self.stats.copy()
+        stats['enabled'] = True
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_lag_ms'] = stats['total_lag_ms'] / max(1, stats['scored'])
+        return stats
@@ -1,17 +1,99 @@
 import os
-import torch
 from datetime import datetime, timedelta
-import json
 from collections import defaultdict, deque
+from itertools import islice
 import threading
 import time
 import logging
+import hashlib
 from pathlib import Path
+from security.inference_batcher import MicroBatchScheduler
+from security.lru_cache import LRUTTLCache
+from security.onnx_export import default_onnx_path
+from security.bert_inference import PAD_MULTIPLE, bert_forward, load_model_bundle
+from security.inference_pool import InferencePool
+from security.async_scorer import AsyncBertScorer
+from security.hashed_model import HashedFeatureModel
+from security.velocity import VelocityTracker
+from security.activity_store import ActivityStore
+from security.event_records import EventRing
+from security.sketches import SketchTracker
+from security.concurrency import ThreadLocalCounters
+from security.jsonl_writer import BufferedJsonlWriter
+from security.log_pipeline import get_log_pipeline
+
+# Prédiction utilisée quand la cascade rend BERT inutile
+SKIPPED_BERT_PREDICTION = {'probability_attack': None, 'confidence': 0.0, 'skipped': True}
+
+# Prédiction en attente du scoring asynchrone
+PENDING_BERT_PREDICTION = {'probability_attack': None, 'confidence': 0.0, 'pending': True}
+
+# Contrôle avant authentification en mode asynchrone: seule l'issue réelle est scorée par BERT
+UNSCORED_BERT_PREDICTION = {'probability_attack': None, 'confidence': 0.0}
+
+# Événements factices utilisés pour chauffer le modèle
+WARMUP_LOGS = [
+    {'email': 'warmup@mediconnect.fr', 'IP Address': '127.0.0.1', 'Country': 'Local',
+     'Browser Name and Version': 'Chrome 120', 'OS Name and Version': 'Windows 10',
+     'User ID': '0', 'Login Successful': True},
+    {'email': 'admin@test.com', 'IP Address': '203.0.113.7', 'Country': 'Unknown',
+     'Browser Name and Version': 'Python Requests 2.31', 'OS Name and Version': 'Other',
+     'User ID': 'unknown', 'Login Successful': False}
+]
+
+# Seuils de vitesse (sur velocity_window_seconds) et poids ajoutés au score comportemental
+VELOCITY_RULES = (
+    ('ip_failures', 5, 0.3, 'ip_failure_burst'),
+    ('ip_failures', 20, 0.2, 'ip_brute_force'),
+    ('ip_distinct_emails', 4, 0.3, 'credential_spraying'),
+    ('user_failures', 5, 0.3, 'account_brute_force'),
+    ('ip_attempts', 30, 0.2, 'high_ip_velocity')
+)
+
+# Seuils des estimations probabilistes (credential stuffing distribué, sur sketch_window_seconds)
+SKETCH_RULES = (
+    ('ip_distinct_accounts', 10, 0.3, 'ip_many_accounts'),
+    ('account_distinct_ips', 5, 0.3, 'account_many_ips'),
+    ('account_failures_estimate', 20, 0.2, 'account_failure_frequency'),
+    ('ip_failures_estimate', 50, 0.2, 'ip_failure_frequency')
+)
+
+def country_penalty(country):
+    """(poids, flag) du pays dans le score comportemental"""
+    if country == 'Unknown':
+        return 0.3, 'unknown_country'
+    if country in ['RU', 'CN', 'KP', 'IR']:
+        return 0.2, 'suspicious_country'
+    return 0.0, None
+
+def account_key(log_data):
+    """Compte visé par une tentative: email normalisé (connu avant l'authentification, pas le User ID)"""
+    email = log_data.get('email')
+    if not isinstance(email, str):
+        return None
+    return email.strip().lower() or None
 
 class FixedAttackDetector:
-    def __init__(self, model_path, time_window_minutes=2, threshold=0.5):
+    def __init__(self, model_path, time_window_minutes=2, threshold=0.5,
+                 batching=False, max_batch_size=16, max_wait_ms=5.0, max_queue_size=1024,
+                 cache_size=4096, cache_ttl_seconds=300,
+                 inference_backend='torch', onnx_path=None, quantization=None,
+                 max_length=256, bucket_size=32,
+                 inference_workers=0, threads_per_worker=1,
+                 cascade=False, bert_weight=0.7, behavioral_weight=0.3,
+                 async_scoring=False, async_queue_size=10000, block_duration_minutes=15,
+                 hashed_model_path=None, first_stage=False, first_stage_low=0.05, first_stage_high=0.95,
+                 velocity_window_seconds=60, max_tracked_users=100000, max_tracked_ips=200000,
+                 sketch_window_seconds=3600, sketch_max_keys=50000,
+                 attack_log_queue_size=10000, attack_log_batch_size=256, attack_log_flush_ms=200,
+                 attack_log_fsync='interval', attack_log_fsync_interval_seconds=1.0, attack_log_block_ms=0):
         self.model_path = model_path
         self.threshold = threshold
+        
+        # ✅ Pondération du score combiné + mode cascade (BERT seulement si utile)
+        self.bert_weight = bert_weight
+        self.behavioral_weight = behavioral_weight
+        self.cascade = cascade
         self.time_window = timedelta(minutes=time_window_minutes)
         
         # ✅ Définir le dossier logs à la racine
@@ -20,56 +102,160 @@ class FixedAttackDetector:
         self.logs_dir.mkdir(exist_ok=True)
         
         # ✅ NE PAS charger le modèle immédiatement
-        self.model = None
-        self.tokenizer = None
-        self.device = None
+        # (tokenizer/modèle regroupés dans un LoadedModel remplaçable à chaud)
+        self.active_model = None
         self._model_loaded = False
         
+        # ✅ Chargement protégé par verrou + état de disponibilité (warmup)
+        self._load_lock = threading.Lock()
+        self.ready = threading.Event()
+        self.model_load_seconds = None
+        self.warmup_seconds = None
+        
+        # ✅ Backend d'inférence: 'torch' (défaut) ou 'onnx' (ONNX Runtime CPU)
+        self.inference_backend = inference_backend
+        self.onnx_path = onnx_path or default_onnx_path(model_path)
+        
+        # ✅ Quantification dynamique INT8 (CPU uniquement)
+        self.quantization = quantization if quantization not in (None, '', 'none') else None
+        
+        # ✅ Tokenisation regroupée par longueur + distribution des longueurs
+        self.max_length = max_length
+        self.bucket_size = max(1, int(bucket_size))
+        self.token_lengths = deque(maxlen=10000)
+        self.token_length_histogram = defaultdict(int)
+        self._token_stats_lock = threading.Lock()
+        
+        # ✅ Pool de processus d'inférence optionnel (contourne le GIL)
+        self.inference_workers = int(inference_workers)
+        self.threads_per_worker = int(threads_per_worker)
+        self.inference_pool = None
+        
         print(f"✅ Détecteur initialisé (modèle sera chargé à la première utilisation)")
         
         # Stockage des événements récents
-        self.recent_events = deque(maxlen=10000)
-        self.user_activity = defaultdict(lambda: deque(maxlen=50))
-        self.ip_activity = defaultdict(lambda: deque(maxlen=100))
+        self.recent_events = EventRing(capacity=10000)
+        # ✅ Historiques par utilisateur / IP à expiration incrémentale (roue temporelle)
+        window_seconds = self.time_window.total_seconds()
+        # (nombre de clés plafonné: éviction LRU des clés froides)
+        self.user_activity = ActivityStore(window_seconds, max_events_per_key=50, max_keys=max_tracked_users)
+        self.ip_activity = ActivityStore(window_seconds, max_events_per_key=100, max_keys=max_tracked_ips)
+        
+        # ✅ Compteurs de vitesse par IP / utilisateur (lecture O(1) pour le score)
+        self.velocity = VelocityTracker(
+            window_seconds=velocity_window_seconds, max_ips=max_tracked_ips, max_users=max_tracked_users
+        )
+        
+        # ✅ Sketches à mémoire fixe: comptes distincts par IP, IP distinctes par compte, fréquences
+        self.sketches = SketchTracker(window_seconds=sketch_window_seconds, max_keys=sketch_max_keys)
         
         # Statistiques - IMPORTANT: Initialisation correcte
-        self.stats = {
+        # (compteurs par thread agrégés à la lecture: pas de course sur les +=)
+        self.stats = ThreadLocalCounters({
             'total_requests': 0,
             'detected_attacks': 0,
             'false_positives': 0,
             'last_reset': datetime.now(),
             'bert_predictions': 0,
-            'fallback_predictions': 0
-        }
+            'fallback_predictions': 0,
+            'cascade_evaluations': 0,
+            'bert_skipped': 0,
+            'fast_path_decisions': 0,
+            'escalations': 0,
+            'hashed_predictions': 0,
+            'first_stage_decisions': 0
+        })
         
         # ✅ Ajouter un buffer pour les résultats récents
         self.recent_results = deque(maxlen=100)
         
+        # ✅ Agrégats tenus à jour à l'insertion (pas de parcours à la lecture)
+        self._results_lock = threading.Lock()
+        self.recent_attacks = deque(maxlen=100)
+        self.recent_attack_count = 0
+        self.attack_type_counts = ThreadLocalCounters({})
+        self.decision_path_counts = ThreadLocalCounters({})
+        
+        # ✅ Regroupement des prédictions concurrentes (optionnel)
+        self.batcher = None
+        if batching:
+            self.batcher = MicroBatchScheduler(
+                self._bert_forward,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                max_queue_size=max_queue_size
+            )
+        
+        # ✅ Cache des prédictions BERT (clé = empreinte du texte normalisé)
+        self.prediction_cache = LRUTTLCache(cache_size, cache_ttl_seconds) if cache_size > 0 else None
+        
+        # ✅ Scoring BERT asynchrone + escalade (blocage IP, callbacks de révocation)
+        self.block_duration = timedelta(minutes=block_duration_minutes)
+        self.blocked_ips = {}
+        self._blocked_lock = threading.Lock()
+        self.escalation_callbacks = []
+        self.async_scorer = AsyncBertScorer(self, max_queue_size=async_queue_size) if async_scoring else None
+        
+        # ✅ Modèle haché léger: repli si BERT indisponible + premier filtre optionnel
+        self.hashed_model = self._load_hashed_model(hashed_model_path)
+        self.first_stage = first_stage and self.hashed_model is not None
+        self.first_stage_low = first_stage_low
+        self.first_stage_high = first_stage_high
+        
         self.setup_logging()
+        if self.cascade and not self.cascade_can_skip():
+            self.logger.warning(
+                f"⚠️ Cascade sans effet: avec bert_weight={self.bert_weight} et "
+                f"behavioral_weight={self.behavioral_weight}, BERT peut toujours inverser la décision "
+                f"(il faut bert_weight <= {self.threshold} ou behavioral_weight > {self.threshold})"
+            )
+        
+        # ✅ Journal JSONL des attaques écrit par lots en arrière-plan (hors thread de requête)
+        self.attack_log = BufferedJsonlWriter(
+            self.logs_dir / 'detected_attacks.jsonl',
+            max_queue_size=attack_log_queue_size,
+            batch_size=attack_log_batch_size,
+            flush_interval_ms=attack_log_flush_ms,
+            fsync=attack_log_fsync,
+            fsync_interval_seconds=attack_log_fsync_interval_seconds,
+            block_timeout_ms=attack_log_block_ms,
+            logger=self.logger
+        )
     
     def _load_model_if_needed(self):
         """Charge le modèle seulement lors de la première utilisation"""
         if self._model_loaded:
             return True
         
+        # Un seul thread charge le modèle, les autres attendent le résultat
+        with self._load_lock:
+            if self._model_loaded:
+                return True
+            started = time.perf_counter()
+            loaded = self._load_model()
+            if loaded:
+                self.model_load_seconds = time.perf_counter() - started
+            return loaded
+    
+    def _load_model(self):
+        """Chargement effectif du tokenizer et du modèle (appelé sous verrou)"""
         print("🔄 Chargement du modèle DistilBERT (première utilisation)...")
+        if self.inference_workers > 0:
+            return self._start_inference_pool()
+        
         try:
-            # ⚠️ Import ici pour éviter le chargement au démarrage
-            from transformers import AutoTokenizer, AutoModelForSequenceClassification
-            import torch.nn.functional as F
-            
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
-            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-            self.model.to(self.device)
-            self.model.eval()
-            
+            self.active_model = self.load_model_bundle(self.model_path, 'default', onnx_path=self.onnx_path)
             self._model_loaded = True
             
-            print("✅ Modèle DistilBERT chargé avec succès!")
-            print(f"   📐 Modèle: {self.model.config.model_type}")
-            print(f"   🔢 Hidden size: {self.model.config.hidden_size}")
-            print(f"   🏷️ Labels: {self.model.config.id2label}")
+            if self.active_model.backend == 'onnx':
+                print("✅ Modèle DistilBERT chargé avec succès (ONNX Runtime)!")
+                print(f"   📦 Graphe: {self.onnx_path}")
+            else:
+                config = self.active_model.model.config
+                print("✅ Modèle DistilBERT chargé avec succès!")
+                print(f"   📐 Modèle: {config.model_type}")
+                print(f"   🔢 Hidden size: {config.hidden_size}")
+                print(f"   🏷️ Labels: {config.id2label}")
             
             return True
             
@@ -79,6 +265,105 @@ class FixedAttackDetector:
             self._model_loaded = False
             return False
     
+    def _start_inference_pool(self):
+        """Démarre les processus d'inférence (chacun charge sa copie du modèle)"""
+        try:
+            pool = InferencePool(
+                self.model_path,
+                num_workers=self.inference_workers,
+                threads_per_worker=self.threads_per_worker,
+                inference_backend=self.inference_backend,
+                onnx_path=self.onnx_path,
+                quantization=self.quantization,
+                max_length=self.max_length,
+                bucket_size=self.bucket_size,
+                warmup_texts=[self.prepare_text_for_bert(log_data) for log_data in WARMUP_LOGS]
+            )
+            if not pool.start():
+                pool.stop()
+                raise RuntimeError("aucun processus n'a pu charger le modèle")
+            
+            self.inference_pool = pool
+            self._model_loaded = True
+            print(f"✅ Pool d'inférence démarré: {self.inference_workers} processus "
+                  f"x {self.threads_per_worker} thread(s)")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Erreur démarrage pool d'inférence: {e}")
+            print("🔄 Utilisation du mode fallback...")
+            self._model_loaded = False
+            return False
+    
+    def load_model_bundle(self, model_path, version, onnx_path=None):
+        """Charge un modèle (torch, torch-int8 ou onnx) sans toucher au modèle actif"""
+        return load_model_bundle(
+            model_path, version,
+            inference_backend=self.inference_backend,
+            onnx_path=onnx_path or default_onnx_path(model_path),
+            quantization=self.quantization
+        )
+    
+    def swap_model(self, bundle):
+        """Installe atomiquement un nouveau modèle et retourne l'ancien"""
+        with self._load_lock:
+            previous = self.active_model
+            self.active_model = bundle
+            self._model_loaded = True
+        
+        # Les prédictions de l'ancienne version ne sont plus valides
+        if self.prediction_cache is not None:
+            self.prediction_cache.clear()
+        return previous
+    
+    @property
+    def model(self):
+        return self.active_model.model if self.active_model else None
+    
+    @property
+    def tokenizer(self):
+        return self.active_model.tokenizer if self.active_model else None
+    
+    @property
+    def active_backend(self):
+        return self.active_model.backend if self.active_model else None
+    
+    def warmup(self, passes=3):
+        """Charge le modèle et exécute quelques passages factices avant de déclarer le détecteur prêt"""
+        started = time.perf_counter()
+        
+        if self._load_model_if_needed():
+            # En mode pool, chaque processus s'est déjà chauffé au démarrage
+            if self.inference_pool is None:
+                self.warmup_bundle(self.active_model, passes)
+        else:
+            print("⚠️ Warmup sans modèle: le détecteur fonctionnera en mode fallback")
+        
+        self.warmup_seconds = time.perf_counter() - started
+        self.ready.set()
+        self.logger.info(f"🔥 Détecteur prêt (warmup {self.warmup_seconds:.2f}s)")
+        return self._model_loaded
+    
+    def warmup_bundle(self, bundle, passes=3):
+        """Passages factices sur un modèle donné (appel direct: ni cache ni file de regroupement)
+
+        Les longueurs de tokens des textes factices ne sont pas enregistrées:
+        elles fausseraient la distribution servant à régler bucket_size.
+        """
+        texts = [self.prepare_text_for_bert(log_data) for log_data in WARMUP_LOGS]
+        
+        for _ in range(max(1, passes)):
+            try:
+                bert_forward(bundle, texts[:1], self.max_length, self.bucket_size)
+                bert_forward(bundle, texts * 4, self.max_length, self.bucket_size)
+            except Exception as e:
+                print(f"⚠️ Erreur pendant le warmup: {e}")
+                break
+    
+    def is_ready(self):
+        """Indique si le détecteur peut recevoir du trafic"""
+        return self.ready.is_set()
+    
     def setup_logging(self):
         """Configuration du système de logging"""
         self.logger = logging.getLogger('fixed_attack_detector')
@@ -87,29 +372,48 @@ class FixedAttackDetector:
         if self.logger.handlers:
             self.logger.handlers.clear()
         
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        # ✅ Fichier logs/attack_detection.log + console (débit limité), écrits par le
+        # thread du pipeline: le thread de requête ne fait que mettre en file
+        self.log_pipeline = get_log_pipeline()
+        self.logger.addHandler(self.log_pipeline.handler('detector', self.logs_dir / 'attack_detection.log'))
+        self.logger.propagate = False
+    
+    def process_log_entry(self, log_data, track=True):
+        """Traite une entrée de log et détecte les attaques
         
-        # ✅ Fichier de log dans logs/
-        file_handler = logging.FileHandler(
-            self.logs_dir / 'attack_detection.log',
-            mode='a',
-            encoding='utf-8'
-        )
-        file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(formatter)
+        track=False: analyse seule (ex: contrôle avant authentification), la
+        tentative n'entre ni dans les compteurs de vitesse / sketches ni dans
+        les historiques - seule l'issue réelle de la connexion y est enregistrée.
+        """
+        result = self._evaluate_log_entry(log_data, score_async=track)
+        if track:
+            self.update_activity_tracking(log_data)
+        return result
+    
+    def _evaluate_log_entry(self, log_data, score_async=True):
+        """Décision pour une entrée (sans suivi d'activité)
         
-        # ✅ Garder aussi la console pour le débogage
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(formatter)
+        score_async=False: pas de mise en file BERT asynchrone (contrôle avant
+        authentification), sinon chaque connexion serait scorée - et
+        escaladée - deux fois.
+        """
+        self.stats.incr('total_requests')
         
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-        self.logger.propagate = False
-    
-    def process_log_entry(self, log_data):
-        """Traite une entrée de log et détecte les attaques"""
-        self.stats['total_requests'] += 1
+        # Cascade: l'analyse comportementale (peu coûteuse) passe en premier
+        behavioral_analysis = None
+        if self.cascade:
+            behavioral_analysis = self.analyze_behavioral_patterns(log_data)
+            if self._cascade_is_decisive(behavioral_analysis):
+                return self._finalize_result(log_data, dict(SKIPPED_BERT_PREDICTION), behavioral_analysis)
+        
+        # Premier filtre: le modèle haché tranche seul les cas évidents
+        if self.first_stage:
+            hashed_prediction = self._first_stage_prediction(log_data)
+            if hashed_prediction is not None:
+                return self._finalize_result(log_data, hashed_prediction, behavioral_analysis)
+        
+        if self.async_scorer is not None:
+            return self._process_fast_path(log_data, behavioral_analysis, score_async)
         
         # Préparer le texte pour BERT
         text = self.prepare_text_for_bert(log_data)
@@ -118,89 +422,405 @@ class FixedAttackDetector:
         try:
             if self._load_model_if_needed():
                 bert_prediction = self.bert_predict(text)
-                self.stats['bert_predictions'] += 1
+                self.stats.incr('bert_predictions')
             else:
-                bert_prediction = {'probability_attack': 0.3, 'confidence': 0.5}
-                self.stats['fallback_predictions'] += 1
+                bert_prediction = self._fallback_prediction(log_data, confidence=0.5)
         except Exception as e:
-            print(f"❌ Erreur prédiction BERT: {e}")
-            bert_prediction = {'probability_attack': 0.3, 'confidence': 0.0}
-            self.stats['fallback_predictions'] += 1
+            self.logger.error(f"❌ Erreur prédiction BERT: {e}")
+            bert_prediction = self._fallback_prediction(log_data)
+        
+        return self._finalize_result(log_data, bert_prediction, behavioral_analysis)
+    
+    def process_log_entries(self, log_entries):
+        """Traite un lot d'entrées de log (un seul passage BERT par sous-lot)"""
+        if not log_entries:
+            return []
+        
+        self.stats.incr('total_requests', len(log_entries))
+        
+        # Analyse comportementale dans l'ordre du lot: les compteurs de vitesse / sketches
+        # de chaque entrée sont enregistrés avant d'analyser la suivante (comme en flux)
+        now = time.time()
+        behavioral_analyses = []
+        for log_data in log_entries:
+            behavioral_analyses.append(self.analyze_behavioral_patterns(log_data))
+            self._record_counters(log_data, now)
+        
+        bert_predictions = [None] * len(log_entries)
+        if self.cascade:
+            for index, behavioral_analysis in enumerate(behavioral_analyses):
+                if self._cascade_is_decisive(behavioral_analysis):
+                    bert_predictions[index] = dict(SKIPPED_BERT_PREDICTION)
+        
+        if self.first_stage:
+            for index, log_data in enumerate(log_entries):
+                if bert_predictions[index] is None:
+                    bert_predictions[index] = self._first_stage_prediction(log_data)
         
-        # Analyse comportementale basique
-        behavioral_analysis = self.analyze_behavioral_patterns(log_data)
+        pending = [index for index, prediction in enumerate(bert_predictions) if prediction is None]
+        texts = [self.prepare_text_for_bert(log_entries[index]) for index in pending]
         
-        # Décision finale
-        is_attack, confidence, attack_type = self.combine_predictions(
-            bert_prediction, behavioral_analysis, log_data
+        # Prédictions BERT groupées (charge le modèle si nécessaire)
+        if texts:
+            try:
+                if self._load_model_if_needed():
+                    predictions = self.bert_predict_batch(texts)
+                    self.stats.incr('bert_predictions', len(texts))
+                else:
+                    predictions = [
+                        self._fallback_prediction(log_entries[index], confidence=0.5) for index in pending
+                    ]
+            except Exception as e:
+                self.logger.error(f"❌ Erreur prédiction BERT (lot): {e}")
+                predictions = [self._fallback_prediction(log_entries[index]) for index in pending]
+            
+            for index, prediction in zip(pending, predictions):
+                bert_predictions[index] = prediction
+        
+        results = [
+            self._finalize_result(log_data, bert_prediction, behavioral_analysis)
+            for log_data, bert_prediction, behavioral_analysis
+            in zip(log_entries, bert_predictions, behavioral_analyses)
+        ]
+        
+        # Historiques mis à jour une seule fois pour tout le lot (compteurs déjà à jour)
+        self.update_activity_tracking_batch(log_entries, counters=False)
+        
+        return results
+    
+    def _load_hashed_model(self, path):
+        """Charge le modèle haché s'il a été entraîné (sinon repli constant)"""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            model = HashedFeatureModel.load(path)
+            print(f"✅ Modèle haché de repli chargé: {path}")
+            return model
+        except Exception as e:
+            print(f"⚠️ Modèle haché illisible ({path}): {e}")
+            return None
+    
+    def _fallback_prediction(self, log_data, confidence=0.0):
+        """Prédiction de repli quand BERT est indisponible"""
+        self.stats.incr('fallback_predictions')
+        if self.hashed_model is not None:
+            self.stats.incr('hashed_predictions')
+            return self.hashed_model.predict(log_data)
+        return {'probability_attack': 0.3, 'confidence': confidence, 'source': 'constant'}
+    
+    def _first_stage_prediction(self, log_data):
+        """Score du modèle haché s'il est assez tranché pour se passer de BERT, sinon None"""
+        prediction = self.hashed_model.predict(log_data)
+        self.stats.incr('hashed_predictions')
+        
+        probability = prediction['probability_attack']
+        if probability < self.first_stage_low or probability > self.first_stage_high:
+            self.stats.incr('first_stage_decisions')
+            prediction['first_stage'] = True
+            return prediction
+        return None
+    
+    def _process_fast_path(self, log_data, behavioral_analysis=None, score_async=True):
+        """Décision immédiate (règles + verdict en cache), BERT scoré en arrière-plan si score_async"""
+        if behavioral_analysis is None:
+            behavioral_analysis = self.analyze_behavioral_patterns(log_data)
+        self.stats.incr('fast_path_decisions')
+        
+        # IP bloquée suite à une escalade précédente
+        if self.is_ip_blocked(log_data.get('IP Address')):
+            return self._finalize_result(
+                log_data, dict(UNSCORED_BERT_PREDICTION), behavioral_analysis,
+                decision=(True, 1.0, 'blocked_ip'), decision_path='blocked_ip'
+            )
+        
+        text = self.prepare_text_for_bert(log_data)
+        
+        # Verdict BERT déjà connu pour ce texte
+        if self.prediction_cache is not None and self._model_loaded:
+            cached = self.prediction_cache.get(self._cache_key(text))
+            if cached is not None:
+                self.stats.incr('bert_predictions')
+                return self._finalize_result(log_data, cached, behavioral_analysis, decision_path='cached_verdict')
+        
+        # Décision sur les règles (+ modèle haché si disponible), BERT mis en file
+        if self.hashed_model is not None:
+            self.stats.incr('hashed_predictions')
+            decision = self.combine_predictions(
+                self.hashed_model.predict(log_data), behavioral_analysis, log_data
+            )
+        else:
+            behavioral_score = behavioral_analysis['score']
+            is_attack = behavioral_score > self.threshold
+            decision = (is_attack, behavioral_score, 'behavioral_anomaly' if is_attack else 'normal')
+        
+        if not score_async:
+            return self._finalize_result(
+                log_data, dict(UNSCORED_BERT_PREDICTION), behavioral_analysis, decision=decision,
+                decision_path='fast_path'
+            )
+        
+        self.async_scorer.submit(log_data, text, behavioral_analysis, decision[0])
+        
+        return self._finalize_result(
+            log_data, dict(PENDING_BERT_PREDICTION), behavioral_analysis, decision=decision
         )
+    
+    def escalate(self, log_data, confidence, attack_type, bert_prediction, behavioral_analysis=None):
+        """Attaque révélée a posteriori par BERT: blocage IP, journalisation, callbacks"""
+        ip_address = log_data.get('IP Address')
+        if ip_address:
+            with self._blocked_lock:
+                self.blocked_ips[ip_address] = datetime.now() + self.block_duration
+        
+        # Résultat escaladé visible dans les attaques récentes (tableau de bord)
+        if behavioral_analysis is None:
+            behavioral_analysis = self.analyze_behavioral_patterns(log_data)
+        result = self._build_result(
+            log_data, bert_prediction, behavioral_analysis, (True, confidence, attack_type), 'escalation'
+        )
+        result['escalated'] = True
+        self._record_result(result)
         
-        # Mettre à jour les statistiques
-        self.update_activity_tracking(log_data)
+        self.stats.incr('escalations')
+        self.stats.incr('detected_attacks')
+        self.log_attack(log_data, confidence, attack_type, bert_prediction, escalated=True)
+        
+        for callback in self.escalation_callbacks:
+            try:
+                callback(log_data, {'confidence': confidence, 'attack_type': attack_type})
+            except Exception as e:
+                self.logger.error(f"❌ Erreur callback d'escalade: {e}")
+    
+    def add_escalation_callback(self, callback):
+        """Enregistre une fonction appelée à chaque escalade (ex: révocation de session)"""
+        self.escalation_callbacks.append(callback)
+    
+    def is_ip_blocked(self, ip_address):
+        """Vrai si l'IP est dans la liste de blocage (et non expirée)"""
+        if not ip_address:
+            return False
+        with self._blocked_lock:
+            expires_at = self.blocked_ips.get(ip_address)
+            if expires_at is None:
+                return False
+            if expires_at <= datetime.now():
+                del self.blocked_ips[ip_address]
+                return False
+            return True
+    
+    def _combined_score_bounds(self, behavioral_score):
+        """Bornes du score combiné quand la probabilité BERT parcourt [0, 1]"""
+        base = behavioral_score * self.behavioral_weight
+        return base, base + self.bert_weight
+    
+    def cascade_can_skip(self):
+        """Vrai si au moins un score comportemental rend BERT inutile (sinon la cascade ne saute rien)"""
+        low, _ = self._combined_score_bounds(1.0)
+        _, high = self._combined_score_bounds(0.0)
+        return low > self.threshold or high <= self.threshold
+    
+    def _cascade_is_decisive(self, behavioral_analysis):
+        """Vrai si le score combiné est du même côté du seuil quelle que soit la sortie de BERT"""
+        self.stats.incr('cascade_evaluations')
+        low, high = self._combined_score_bounds(behavioral_analysis['score'])
+        
+        if low > self.threshold or high <= self.threshold:
+            self.stats.incr('bert_skipped')
+            return True
+        return False
+    
+    @staticmethod
+    def _decision_path(bert_prediction):
+        """Chemin ayant produit la décision, déduit de la prédiction utilisée"""
+        if bert_prediction.get('skipped'):
+            return 'cascade'
+        if bert_prediction.get('pending'):
+            return 'fast_path'
+        if bert_prediction.get('first_stage'):
+            return 'first_stage'
+        source = bert_prediction.get('source')
+        if source == 'hashed':
+            return 'hashed_fallback'
+        if source == 'constant':
+            return 'constant_fallback'
+        return 'bert'
+    
+    def _finalize_result(self, log_data, bert_prediction, behavioral_analysis=None, decision=None,
+                         decision_path=None):
+        """Analyse comportementale, décision finale et enregistrement du résultat"""
+        # Analyse comportementale basique (déjà faite en mode cascade)
+        if behavioral_analysis is None:
+            behavioral_analysis = self.analyze_behavioral_patterns(log_data)
+        
+        # Décision finale (sauf si déjà prise par le chemin rapide)
+        if decision is None:
+            decision = self.combine_predictions(bert_prediction, behavioral_analysis, log_data)
+        is_attack, confidence, attack_type = decision
         
         # ✅ Stocker le résultat pour l'interface
-        result = {
+        result = self._build_result(
+            log_data, bert_prediction, behavioral_analysis, decision,
+            decision_path or self._decision_path(bert_prediction)
+        )
+        self._record_result(result)
+        
+        # ✅ Logger si attaque détectée (mais continuer à afficher dans la console)
+        if is_attack:
+            self.log_attack(log_data, confidence, attack_type, bert_prediction)
+            self.stats.incr('detected_attacks')
+        
+        return result
+    
+    def _build_result(self, log_data, bert_prediction, behavioral_analysis, decision, decision_path):
+        """Résultat exposé à l'interface pour une décision"""
+        is_attack, confidence, attack_type = decision
+        return {
             'is_attack': is_attack,
             'confidence': confidence,
             'attack_type': attack_type,
             'bert_probability': bert_prediction.get('probability_attack', 0.3),
             'behavioral_score': behavioral_analysis['score'],
-            'bert_used': self._model_loaded,
+            'behavioral_flags': behavioral_analysis['flags'],
+            'velocity': behavioral_analysis.get('velocity'),
+            'sketch': behavioral_analysis.get('sketch'),
+            # BERT réellement exécuté: ni sauté (cascade), ni en attente / non scoré (asynchrone)
+            'bert_used': (self._model_loaded and bert_prediction.get('probability_attack') is not None
+                          and bert_prediction.get('source') != 'hashed'),
+            'fallback_source': bert_prediction.get('source'),
+            'bert_skipped': bert_prediction.get('skipped', False),
+            'bert_pending': bert_prediction.get('pending', False),
+            'decision_path': decision_path,
             'timestamp': datetime.now().isoformat(),
             'email': log_data.get('email'),
             'ip': log_data.get('IP Address'),
             'country': log_data.get('Country'),
             'login_success': log_data.get('Login Successful', False)
         }
+    
+    def _record_result(self, result):
+        """Ajoute le résultat aux buffers et met à jour les agrégats incrémentaux"""
+        self.decision_path_counts.incr(result['decision_path'])
+        if result['is_attack']:
+            self.attack_type_counts.incr(result['attack_type'])
         
-        self.recent_results.append(result)
-        
-        # ✅ Logger si attaque détectée (mais continuer à afficher dans la console)
-        if is_attack:
-            self.log_attack(log_data, confidence, attack_type, bert_prediction)
-            self.stats['detected_attacks'] += 1
-            # ✅ Afficher aussi dans la console pour l'interface
-            print(f"🚨 ATTAQUE DÉTECTÉE: {attack_type} - Confiance: {confidence:.2%}")
-        
-        return result
+        with self._results_lock:
+            # Le résultat évincé du buffer sort du compte des attaques récentes
+            if len(self.recent_results) == self.recent_results.maxlen and self.recent_results[0]['is_attack']:
+                self.recent_attack_count -= 1
+            self.recent_results.append(result)
+            if result['is_attack']:
+                self.recent_attack_count += 1
+                self.recent_attacks.append(result)
     
     def bert_predict(self, text):
         """Prédiction avec le modèle DistilBERT"""
         if not self._model_loaded:
             return {'probability_attack': 0.3, 'confidence': 0.0}
         
+        cache_key = None
+        if self.prediction_cache is not None:
+            cache_key = self._cache_key(text)
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            import torch.nn.functional as F
-            
-            inputs = self.tokenizer(
-                text, 
-                return_tensors="pt", 
-                truncation=True, 
-                padding=True, 
-                max_length=256
-            )
-            
-            inputs = {key: value.to(self.device) for key, value in inputs.items()}
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                probabilities = F.softmax(outputs.logits, dim=-1)
-                
-            attack_prob = probabilities[0][1].item()
+            if self.batcher is not None:
+                prediction = self.batcher.submit(text)
+            else:
+                prediction = self._bert_forward([text])[0]
             
-            return {
-                'probability_attack': attack_prob,
-                'confidence': abs(attack_prob - 0.5) * 2,
-                'raw_probabilities': {
-                    'normal': probabilities[0][0].item(),
-                    'attack': probabilities[0][1].item()
-                }
-            }
+            if cache_key is not None:
+                self.prediction_cache.put(cache_key, prediction)
+            return prediction
             
         except Exception as e:
-            print(f"❌ Erreur prédiction BERT: {e}")
+            self.logger.error(f"❌ Erreur prédiction BERT: {e}")
             return {'probability_attack': 0.3, 'confidence': 0.0}
     
+    def bert_predict_batch(self, texts, chunk_size=64):
+        """Prédictions DistilBERT pour une liste de textes, dans l'ordre d'entrée"""
+        if not self._model_loaded:
+            return [{'probability_attack': 0.3, 'confidence': 0.0} for _ in texts]
+        
+        results = [None] * len(texts)
+        
+        # Textes absents du cache, dédupliqués au sein du lot
+        missing = {}
+        for index, text in enumerate(texts):
+            if self.prediction_cache is not None:
+                cached = self.prediction_cache.get(self._cache_key(text))
+                if cached is not None:
+                    results[index] = cached
+                    continue
+            missing.setdefault(text, []).append(index)
+        
+        unique_texts = list(missing)
+        for start in range(0, len(unique_texts), chunk_size):
+            chunk = unique_texts[start:start + chunk_size]
+            try:
+                predictions = self._bert_forward(chunk)
+            except Exception as e:
+                self.logger.error(f"❌ Erreur prédiction BERT (lot): {e}")
+                predictions = [{'probability_attack': 0.3, 'confidence': 0.0} for _ in chunk]
+            else:
+                if self.prediction_cache is not None:
+                    for text, prediction in zip(chunk, predictions):
+                        self.prediction_cache.put(self._cache_key(text), prediction)
+            
+            for text, prediction in zip(chunk, predictions):
+                for index in missing[text]:
+                    results[index] = prediction
+        
+        return results
+    
+    def _cache_key(self, text):
+        """Empreinte compacte (version du modèle + texte BERT) utilisée comme clé de cache"""
+        version = self.active_model.version if self.active_model else ''
+        return hashlib.blake2b(f"{version}\n{text}".encode('utf-8'), digest_size=16).digest()
+    
+    def _bert_forward(self, texts, bundle=None):
+        """Passage du modèle sur un lot de textes, regroupés par longueur"""
+        if bundle is None and self.inference_pool is not None:
+            return self.inference_pool.predict(texts)
+        
+        # Référence figée: une bascule de modèle n'affecte pas un appel en cours
+        return bert_forward(
+            bundle or self.active_model, texts, self.max_length, self.bucket_size,
+            record_lengths=self._record_token_lengths
+        )
+    
+    def _record_token_lengths(self, lengths):
+        """Met à jour la distribution des longueurs de tokens observées"""
+        with self._token_stats_lock:
+            for length in lengths:
+                self.token_lengths.append(length)
+                self.token_length_histogram[-(-length // PAD_MULTIPLE) * PAD_MULTIPLE] += 1
+    
+    def get_token_length_stats(self):
+        """Distribution des longueurs de tokens (pour régler MODEL_CONFIG['max_length'])"""
+        with self._token_stats_lock:
+            lengths = sorted(self.token_lengths)
+            histogram = dict(sorted(self.token_length_histogram.items()))
+        
+        if not lengths:
+            return {'samples': 0, 'max_length': self.max_length, 'histogram': {}}
+        
+        def percentile(q):
+            return lengths[min(len(lengths) - 1, int(q * len(lengths)))]
+        
+        return {
+            'samples': len(lengths),
+            'max_length': self.max_length,
+            'min': lengths[0],
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': lengths[-1],
+            'truncated': sum(1 for length in lengths if length >= self.max_length),
+            'histogram': histogram
+        }
+    
     def prepare_text_for_bert(self, log_data):
         """Prépare le texte pour BERT de façon optimisée"""
         parts = []
@@ -244,12 +864,14 @@ class FixedAttackDetector:
             score += 0.4
             flags.append('local_ip')
         
-        if country == 'Unknown':
-            score += 0.3
-            flags.append('unknown_country')
-        elif country in ['RU', 'CN', 'KP', 'IR']:
-            score += 0.2
-            flags.append('suspicious_country')
+        if country == 'Unknown' and log_data.get('Geo Pending'):
+            # Résolution en cours: pénalité de pays appliquée à son arrivée (backfill_geo)
+            flags.append('geo_pending')
+        else:
+            weight, flag = country_penalty(country)
+            if flag:
+                score += weight
+                flags.append(flag)
         
         if 'Unknown' in browser or 'python' in browser.lower():
             score += 0.3
@@ -263,15 +885,39 @@ class FixedAttackDetector:
             score += 0.2
             flags.append('suspicious_email')
         
-        return {'score': min(score, 1.0), 'flags': flags}
+        # Vitesse récente de l'IP et du compte (tentatives précédentes uniquement)
+        # Compte = email: connu dès l'analyse avant authentification, contrairement au User ID
+        account = account_key(log_data)
+        velocity = self.velocity.snapshot(ip_address, account)
+        for counter, limit, weight, flag in VELOCITY_RULES:
+            if velocity[counter] >= limit:
+                score += weight
+                flags.append(flag)
+        
+        # Credential stuffing distribué (estimations HyperLogLog / Count-Min)
+        sketch = self.sketches.snapshot(ip_address, account)
+        for estimate, limit, weight, flag in SKETCH_RULES:
+            if sketch[estimate] >= limit:
+                score += weight
+                flags.append(flag)
+        
+        return {'score': min(score, 1.0), 'flags': flags, 'velocity': velocity, 'sketch': sketch}
     
     def combine_predictions(self, bert_prediction, behavioral_analysis, log_data):
         """Combine les prédictions BERT et comportementales"""
         bert_score = bert_prediction['probability_attack']
         behavioral_score = behavioral_analysis['score']
         
-        if self._model_loaded:
-            combined_score = (bert_score * 0.7) + (behavioral_score * 0.3)
+        if bert_score is None:
+            # Cascade: BERT non évalué, la décision ne dépend pas de sa sortie
+            low, high = self._combined_score_bounds(behavioral_score)
+            is_attack = low > self.threshold
+            return is_attack, low if is_attack else high, "behavioral_anomaly" if is_attack else "normal"
+        
+        hashed_score = bert_prediction.get('source') == 'hashed'
+        
+        if self._model_loaded or hashed_score:
+            combined_score = (bert_score * self.bert_weight) + (behavioral_score * self.behavioral_weight)
         else:
             combined_score = behavioral_score
         
@@ -279,7 +925,11 @@ class FixedAttackDetector:
         
         attack_type = "normal"
         if is_attack:
-            if self._model_loaded and bert_score > 0.7:
+            if hashed_score and bert_score > 0.7:
+                attack_type = "fast_model_detected"
+            elif hashed_score and bert_score > 0.5:
+                attack_type = "fast_model_suspected"
+            elif self._model_loaded and bert_score > 0.7:
                 attack_type = "bert_detected"
             elif self._model_loaded and bert_score > 0.5:
                 attack_type = "bert_suspected"
@@ -290,26 +940,44 @@ class FixedAttackDetector:
     
     def update_activity_tracking(self, log_data):
         """Met à jour le suivi d'activité"""
+        now = time.time()
+        self._track_event(log_data, now, int(now * 1000))
+    
+    def update_activity_tracking_batch(self, log_entries, counters=True):
+        """Met à jour le suivi d'activité pour un lot complet"""
+        now = time.time()
+        timestamp_ms = int(now * 1000)
+        
+        for log_data in log_entries:
+            self._track_event(log_data, now, timestamp_ms, counters)
+    
+    def _track_event(self, log_data, now, timestamp_ms, counters=True):
+        """Enregistre un événement compact (horodatage ms, IP/email internés, succès)"""
         user_id = log_data.get('User ID')
         ip_address = log_data.get('IP Address')
-        timestamp = datetime.now()
-        
-        event_data = {
-            'timestamp': timestamp,
-            'ip': ip_address,
-            'success': log_data.get('Login Successful', False),
-            'email': log_data.get('email', 'unknown')
-        }
+        email = log_data.get('email', 'unknown')
+        success = bool(log_data.get('Login Successful', False))
         
         if user_id:
-            self.user_activity[user_id].append(event_data)
+            self.user_activity.append(user_id, timestamp_ms, ip_address, email, success, now=now)
         
         if ip_address:
-            self.ip_activity[ip_address].append(event_data)
+            self.ip_activity.append(ip_address, timestamp_ms, ip_address, email, success, now=now)
+        
+        self.recent_events.append(timestamp_ms, ip_address, email, success)
+        if counters:
+            self._record_counters(log_data, now)
+    
+    def _record_counters(self, log_data, now):
+        """Compteurs de vitesse et sketches lus par l'analyse comportementale (compte = email)"""
+        ip_address = log_data.get('IP Address')
+        account = account_key(log_data)
+        success = bool(log_data.get('Login Successful', False))
         
-        self.recent_events.append(event_data)
+        self.velocity.record(ip_address, account, account, success, now=now)
+        self.sketches.record(ip_address, account, success, now=now)
     
-    def log_attack(self, log_data, confidence, attack_type, bert_prediction):
+    def log_attack(self, log_data, confidence, attack_type, bert_prediction, escalated=False):
         """Log les attaques détectées - version améliorée"""
         log_entry = {
             'timestamp': datetime.now().isoformat(),
@@ -320,27 +988,125 @@ class FixedAttackDetector:
             'attack_type': attack_type,
             'confidence': confidence,
             'bert_probability': bert_prediction.get('probability_attack'),
-            'bert_used': self._model_loaded,
+            'bert_used': self._model_loaded and bert_prediction.get('probability_attack') is not None,
             'login_successful': log_data.get('Login Successful', False)
         }
+        if bert_prediction.get('source'):
+            log_entry['bert_used'] = False
+            log_entry['score_source'] = bert_prediction['source']
+        if bert_prediction.get('pending'):
+            log_entry['bert_pending'] = True
+        if escalated:
+            log_entry['escalated'] = True
         
-        # ✅ Log dans le fichier
-        self.logger.warning(f"🚨 ATTAQUE DÉTECTÉE: {json.dumps(log_entry)}")
+        # ✅ Log dans le fichier (résumé: l'enregistrement complet est dans le JSONL)
+        self.logger.warning(
+            f"🚨 ATTAQUE DÉTECTÉE: {attack_type} - IP {log_entry['ip_address']} - Confiance: {confidence:.2%}"
+        )
         
-        try:
-            # ✅ Fichier JSONL dans logs/
-            with open(self.logs_dir / 'detected_attacks.jsonl', 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry) + '\n')
-        except Exception as e:
-            self.logger.error(f"❌ Erreur écriture JSONL: {e}")
+        # ✅ Fichier JSONL dans logs/ (écriture groupée par le thread du writer)
+        self.attack_log.write(log_entry)
+    
+    def backfill_geo(self, ip_address, status, geo_info):
+        """Complète le pays des résultats récents d'une IP résolue en arrière-plan
+        
+        La pénalité de pays différée pendant la résolution (flag geo_pending)
+        est appliquée: un résultat qui dépasse alors le seuil est escaladé.
+        """
+        country = geo_info.get('country', 'Unknown') if status == 'resolved' else 'Unknown'
+        weight, flag = country_penalty(country)
+        updated = 0
+        rescored = []
+        with self._results_lock:
+            for result in self.recent_results:
+                if result['ip'] != ip_address or result['country'] not in (None, 'Unknown'):
+                    continue
+                result['country'] = country
+                updated += 1
+                if 'geo_pending' not in result['behavioral_flags']:
+                    continue
+                flags = [name for name in result['behavioral_flags'] if name != 'geo_pending']
+                if flag:
+                    flags.append(flag)
+                    result['behavioral_score'] = min(result['behavioral_score'] + weight, 1.0)
+                result['behavioral_flags'] = flags
+                if flag and not result['is_attack']:
+                    rescored.append(dict(result))
+        
+        for result in rescored:
+            self._rescore_backfilled(result)
+        return updated
+    
+    def _rescore_backfilled(self, result):
+        """Nouvelle décision d'un résultat après la pénalité de pays ; escalade si attaque"""
+        bert_prediction = {
+            'probability_attack': result['bert_probability'],
+            'confidence': 0.0,
+            'source': result['fallback_source'],
+            'skipped': result['bert_skipped'],
+            'pending': result['bert_pending']
+        }
+        behavioral_analysis = {
+            'score': result['behavioral_score'],
+            'flags': result['behavioral_flags'],
+            'velocity': result['velocity'],
+            'sketch': result['sketch']
+        }
+        log_data = {
+            'email': result['email'],
+            'IP Address': result['ip'],
+            'Country': result['country'],
+            'Login Successful': result['login_success']
+        }
+        is_attack, confidence, attack_type = self.combine_predictions(bert_prediction, behavioral_analysis, log_data)
+        if is_attack:
+            self.escalate(log_data, confidence, attack_type, bert_prediction, behavioral_analysis)
     
     def get_statistics(self):
         """Retourne les statistiques détaillées - version améliorée"""
         stats = self.stats.copy()
         stats['bert_available'] = self._model_loaded
+        stats['ready'] = self.is_ready()
+        stats['model_load_seconds'] = self.model_load_seconds
+        stats['warmup_seconds'] = self.warmup_seconds
+        stats['inference_backend'] = self.active_backend or self.inference_backend
+        stats['model_version'] = self.active_model.version if self.active_model else None
+        stats['quantization'] = self.quantization or 'none'
+        stats['token_lengths'] = self.get_token_length_stats()
         stats['active_users'] = len(self.user_activity)
         stats['active_ips'] = len(self.ip_activity)
+        stats['velocity'] = self.velocity.get_statistics()
+        stats['activity_expiry'] = {
+            'users': self.user_activity.get_statistics(),
+            'ips': self.ip_activity.get_statistics()
+        }
+        stats['sketches'] = self.sketches.get_statistics()
+        tracked = list(stats['activity_expiry'].values()) + [stats['velocity'], stats['sketches']]
+        stats['activity_memory'] = {
+            'approx_bytes': sum(part['approx_bytes'] for part in tracked) + self.recent_events.approx_bytes(),
+            'max_bytes': sum(part['max_bytes'] for part in tracked),
+            'lru_evictions': sum(part['lru_evictions'] for part in tracked)
+        }
         stats['bert_usage_rate'] = stats['bert_predictions'] / max(1, stats['total_requests'])
+        stats['cascade_enabled'] = self.cascade
+        stats['cascade_can_skip'] = self.cascade and self.cascade_can_skip()
+        stats['bert_skip_rate'] = stats['bert_skipped'] / max(1, stats['cascade_evaluations'])
+        stats['hashed_model_available'] = self.hashed_model is not None
+        stats['first_stage_enabled'] = self.first_stage
+        stats['batching'] = self.batcher.get_statistics() if self.batcher else {'enabled': False}
+        stats['inference_pool'] = (
+            self.inference_pool.get_statistics() if self.inference_pool is not None else {'enabled': False}
+        )
+        stats['async_scoring'] = (
+            self.async_scorer.get_statistics() if self.async_scorer is not None else {'enabled': False}
+        )
+        with self._blocked_lock:
+            stats['blocked_ips'] = len(self.blocked_ips)
+        stats['attack_log'] = self.attack_log.get_statistics()
+        stats['logging'] = self.log_pipeline.get_statistics()
+        stats['inference_cache'] = (
+            self.prediction_cache.get_statistics() if self.prediction_cache is not None else {'enabled': False}
+        )
         
         # ✅ Calculer les taux
         if stats['total_requests'] > 0:
@@ -351,15 +1117,22 @@ class FixedAttackDetector:
             stats['false_positive_rate'] = 0
         
         # ✅ Ajouter des informations sur les résultats récents
-        stats['recent_attack_count'] = sum(1 for r in self.recent_results if r['is_attack'])
-        stats['total_results'] = len(self.recent_results)
+        with self._results_lock:
+            stats['recent_attack_count'] = self.recent_attack_count
+            stats['total_results'] = len(self.recent_results)
+        stats['attack_types'] = self.attack_type_counts.snapshot()
+        stats['decision_paths'] = self.decision_path_counts.snapshot()
         
         return stats
     
     def get_recent_attacks(self, limit=10):
         """Retourne les attaques récentes pour l'interface"""
-        attacks = [r for r in self.recent_results if r['is_attack']]
-        return attacks[-limit:] if attacks else []
+        if limit <= 0:
+            return []
+        with self._results_lock:
+            attacks = list(islice(reversed(self.recent_attacks), limit))
+        attacks.reverse()
+        return attacks
     
     def get_detailed_stats(self):
         """Retourne des statistiques détaillées pour l'affichage"""
@@ -378,34 +1151,27 @@ class FixedAttackDetector:
         }
     
     def cleanup_old_events(self):
-        """Nettoie les événements anciens"""
-        now = datetime.now()
-        cutoff_time = now - self.time_window
-        
-        for user_id in list(self.user_activity.keys()):
-            self.user_activity[user_id] = deque(
-                [e for e in self.user_activity[user_id] if e['timestamp'] > cutoff_time],
-                maxlen=50
-            )
-            if not self.user_activity[user_id]:
-                del self.user_activity[user_id]
-        
-        for ip in list(self.ip_activity.keys()):
-            self.ip_activity[ip] = deque(
-                [e for e in self.ip_activity[ip] if e['timestamp'] > cutoff_time],
-                maxlen=100
-            )
-            if not self.ip_activity[ip]:
-                del self.ip_activity[ip]
+        """Tick d'expiration: seules les clés arrivées à échéance sont traitées"""
+        now = time.time()
+        return (
+            self.user_activity.expire(now)
+            + self.ip_activity.expire(now)
+            + self.velocity.expire(now)
+        )
 
-def start_fixed_cleanup_thread(detector, interval_minutes=5):
-    """Démarre le thread de nettoyage"""
+def start_fixed_cleanup_thread(detector, interval_seconds=1.0):
+    """Démarre le thread de nettoyage (tick d'expiration incrémentale)"""
     def cleanup_loop():
         while True:
-            time.sleep(interval_minutes * 60)
+            time.sleep(interval_seconds)
             detector.cleanup_old_events()
-            detector.logger.info("🧹 Nettoyage des anciens événements effectué")
     
     thread = threading.Thread(target=cleanup_loop, daemon=True)
     thread.start()
-    return thread
\ No newline at end of file
+    return thread
+
+def start_warmup_thread(detector, passes=3):
+    """Démarre le warmup du modèle en arrière-plan"""
+    thread = threading.Thread(target=detector.warmup, args=(passes,), daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,164 @@
+import os
+
+from security.model_manager import LoadedModel
+from security.onnx_export import default_onnx_path
+
+# Longueur de padding alignée (favorable aux noyaux matriciels)
+PAD_MULTIPLE = 8
+
+
+def quantize_dynamic_int8(model):
+    """Copie du modèle avec les couches Linear quantifiées en INT8 (poids) pour CPU"""
+    import torch
+
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def load_onnx_session(onnx_path):
+    """Ouvre une session ONNX Runtime CPU (None si indisponible -> torch)"""
+    if not os.path.exists(onnx_path):
+        print(f"⚠️ Fichier ONNX introuvable: {onnx_path} - utilisation de PyTorch")
+        return None
+
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        print("⚠️ onnxruntime non installé - utilisation de PyTorch")
+        return None
+
+    try:
+        return ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+    except Exception as e:
+        # Graphe corrompu, opset non supporté...: on ne bloque pas le démarrage
+        print(f"⚠️ Échec du chargement ONNX ({onnx_path}): {e} - utilisation de PyTorch")
+        return None
+
+
+def load_model_bundle(model_path, version, inference_backend='torch', onnx_path=None, quantization=None):
+    """Charge un modèle (torch, torch-int8 ou onnx) dans un LoadedModel, sans détecteur"""
+    # ⚠️ Import ici pour éviter le chargement au démarrage
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+    if inference_backend == 'onnx':
+        if quantization == 'int8':
+            # Le graphe exporté (security.onnx_export) est en fp32: int8 ne s'applique qu'à torch
+            print("⚠️ BERT_QUANTIZATION=int8 ignoré avec BERT_BACKEND=onnx (graphe fp32) - "
+                  "int8 reste appliqué en cas de repli sur PyTorch")
+        onnx_session = load_onnx_session(onnx_path or default_onnx_path(model_path))
+        if onnx_session is not None:
+            return LoadedModel(version, model_path, tokenizer, onnx_session=onnx_session, backend='onnx')
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+
+    if quantization == 'int8':
+        model = quantize_dynamic_int8(model)
+        device = torch.device('cpu')
+        backend = 'torch-int8'
+    else:
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        backend = 'torch'
+    model.to(device)
+
+    return LoadedModel(version, model_path, tokenizer, model=model, device=device, backend=backend)
+
+
+def bert_forward(bundle, texts, max_length=256, bucket_size=32, record_lengths=None):
+    """Passage du modèle sur un lot de textes, regroupés par longueur"""
+    results = [None] * len(texts)
+    run_bucket = onnx_run if bundle.onnx_session is not None else torch_run
+
+    for indices, inputs in length_buckets(texts, bundle, max_length, bucket_size, record_lengths):
+        probabilities = run_bucket(bundle, inputs)
+        for index, prediction in zip(indices, probabilities_to_predictions(probabilities)):
+            results[index] = prediction
+
+    return results
+
+
+def length_buckets(texts, bundle, max_length, bucket_size, record_lengths=None):
+    """Sous-lots triés par longueur, paddés au multiple de 8 (avec leurs indices d'origine)"""
+    return_tensors = "np" if bundle.onnx_session is not None else "pt"
+    encoded = bundle.tokenizer(texts, truncation=True, max_length=max_length)
+    lengths = [len(ids) for ids in encoded['input_ids']]
+    if record_lengths is not None:
+        record_lengths(lengths)
+
+    order = sorted(range(len(texts)), key=lengths.__getitem__)
+    bucket = []
+    bucket_length = None
+    for index in order:
+        padded_length = -(-lengths[index] // PAD_MULTIPLE) * PAD_MULTIPLE
+        if bucket and (padded_length != bucket_length or len(bucket) >= bucket_size):
+            yield bucket, pad_bucket(bundle.tokenizer, encoded, bucket, return_tensors)
+            bucket = []
+        bucket.append(index)
+        bucket_length = padded_length
+
+    if bucket:
+        yield bucket, pad_bucket(bundle.tokenizer, encoded, bucket, return_tensors)
+
+
+def pad_bucket(tokenizer, encoded, indices, return_tensors):
+    features = {
+        'input_ids': [encoded['input_ids'][i] for i in indices],
+        'attention_mask': [encoded['attention_mask'][i] for i in indices]
+    }
+    return tokenizer.pad(
+        features,
+        padding=True,
+        pad_to_multiple_of=PAD_MULTIPLE,
+        return_tensors=return_tensors
+    )
+
+
+def torch_run(bundle, inputs):
+    """Passage PyTorch sur un sous-lot déjà paddé"""
+    import torch
+    import torch.nn.functional as F
+
+    inputs = {key: value.to(bundle.device) for key, value in inputs.items()}
+
+    with torch.no_grad():
+        outputs = bundle.model(**inputs)
+        probabilities = F.softmax(outputs.logits, dim=-1)
+
+    return probabilities.tolist()
+
+
+def onnx_run(bundle, inputs):
+    """Passage du graphe ONNX exporté avec ONNX Runtime"""
+    import numpy as np
+
+    logits = bundle.onnx_session.run(
+        ['logits'],
+        {
+            'input_ids': inputs['input_ids'].astype(np.int64),
+            'attention_mask': inputs['attention_mask'].astype(np.int64)
+        }
+    )[0]
+
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    probabilities = exp / exp.sum(axis=-1, keepdims=True)
+
+    return probabilities.tolist()
+
+
+def probabilities_to_predictions(probabilities):
+    """Convertit les probabilités [normal, attaque] en dictionnaires de prédiction"""
+    results = []
+    for normal_prob, attack_prob in probabilities:
+        results.append({
+            'probability_attack': attack_prob,
+            'confidence': abs(attack_prob - 0.5) * 2,
+            'raw_probabilities': {
+                'normal': normal_prob,
+                'attack': attack_prob
+            }
+        })
+    return results
@@ -0,0 +1,82 @@
+import threading
+import weakref
+
+
+def stripe_index(key, stripes):
+    """Bande (verrou + données) responsable d'une clé"""
+    return hash(key) % stripes
+
+
+class _ShardOwner:
+    """Jeton attaché au thread: sa destruction (fin du thread) replie ses compteurs"""
+    __slots__ = ('__weakref__',)
+
+
+class ThreadLocalCounters:
+    """Compteurs par thread agrégés à la lecture
+
+    Chaque thread incrémente son propre dictionnaire, sans verrou ni course
+    sur `+=`. Une lecture additionne les dictionnaires de tous les threads ;
+    à la fin d'un thread ses compteurs sont repliés dans la base, la liste
+    des shards ne grossit donc pas avec les threads éphémères du serveur.
+    Les valeurs non numériques (ex: last_reset) restent dans la base.
+    """
+
+    def __init__(self, initial):
+        self._lock = threading.Lock()
+        self._base = dict(initial)
+        self._shards = {}
+        self._local = threading.local()
+        self._next_id = 0
+
+    def _shard(self):
+        counts = getattr(self._local, 'counts', None)
+        if counts is None:
+            counts = {}
+            owner = _ShardOwner()
+            with self._lock:
+                shard_id = self._next_id
+                self._next_id += 1
+                self._shards[shard_id] = counts
+            weakref.finalize(owner, self._retire, shard_id)
+            self._local.owner = owner
+            self._local.counts = counts
+        return counts
+
+    def _retire(self, shard_id):
+        with self._lock:
+            counts = self._shards.pop(shard_id, None)
+            if counts:
+                for name, value in counts.items():
+                    self._base[name] = self._base.get(name, 0) + value
+
+    def incr(self, name, amount=1):
+        counts = self._shard()
+        counts[name] = counts.get(name, 0) + amount
+
+    def __getitem__(self, name):
+        return self.snapshot()[name]
+
+    def __setitem__(self, name, value):
+        """Affectation directe (valeurs non cumulées, ou remise à zéro d'un compteur)"""
+        with self._lock:
+            for counts in self._shards.values():
+                counts.pop(name, None)
+            self._base[name] = value
+
+    def snapshot(self):
+        """Somme des compteurs de tous les threads (copie)"""
+        with self._lock:
+            totals = dict(self._base)
+            shards = [counts.copy() for counts in self._shards.values()]
+        for counts in shards:
+            for name, value in counts.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def copy(self):
+        return self.snapshot()
+
+    def active_shards(self):
+        with self._lock:
+            return len(self._shards)
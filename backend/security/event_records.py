@@ -0,0 +1,228 @@
+import sys
+import threading
+from array import array
+from datetime import datetime
+
+from security.concurrency import stripe_index
+
+
+class Interner:
+    """Table chaîne <-> identifiant entier avec compteur de références
+
+    Un email ou une IP n'est stocké qu'une fois quel que soit le nombre
+    d'événements qui le référencent ; l'identifiant est libéré (et réutilisé)
+    quand plus aucun événement ne le porte. Non thread-safe : protégé par le
+    verrou du conteneur propriétaire.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+        self.refcounts = array('I')
+        self.free_ids = []
+
+    def acquire(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            if self.free_ids:
+                value_id = self.free_ids.pop()
+                self.values[value_id] = value
+                self.refcounts[value_id] = 0
+            else:
+                value_id = len(self.values)
+                self.values.append(value)
+                self.refcounts.append(0)
+            self.ids[value] = value_id
+        self.refcounts[value_id] += 1
+        return value_id
+
+    def release(self, value_id):
+        self.refcounts[value_id] -= 1
+        if self.refcounts[value_id] == 0:
+            del self.ids[self.values[value_id]]
+            self.values[value_id] = None
+            self.free_ids.append(value_id)
+
+    def lookup(self, value_id):
+        return self.values[value_id]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def approx_bytes(self):
+        """Chaînes + entrées du dictionnaire et des listes"""
+        strings = sum(sys.getsizeof(value) for value in self.ids)
+        return strings + sys.getsizeof(self.ids) + 12 * len(self.values)
+
+
+class SharedInterner:
+    """Interner thread-safe partagé par les bandes d'un conteneur
+
+    Avec un Interner par bande, une IP ou un email vu dans plusieurs bandes
+    était interné autant de fois. Ici chaque valeur vit dans une seule
+    bande d'internement (hachage de la valeur, verrou propre) ;
+    identifiant = identifiant local * stripes + bande.
+    """
+
+    def __init__(self, stripes=16):
+        self.stripes = [Interner() for _ in range(stripes)]
+        self.locks = [threading.Lock() for _ in range(stripes)]
+
+    def acquire(self, value):
+        index = stripe_index(value, len(self.stripes))
+        with self.locks[index]:
+            return self.stripes[index].acquire(value) * len(self.stripes) + index
+
+    def release(self, value_id):
+        local_id, index = divmod(value_id, len(self.stripes))
+        with self.locks[index]:
+            self.stripes[index].release(local_id)
+
+    def lookup(self, value_id):
+        local_id, index = divmod(value_id, len(self.stripes))
+        with self.locks[index]:
+            return self.stripes[index].lookup(local_id)
+
+    def __len__(self):
+        return sum(len(interner) for interner in self.stripes)
+
+    def approx_bytes(self):
+        total = 0
+        for lock, interner in zip(self.locks, self.stripes):
+            with lock:
+                total += interner.approx_bytes()
+        return total
+
+
+class KeyEvents:
+    """Événements récents d'une clé en colonnes (horodatage ms, IP, email, succès)
+
+    File FIFO bornée à `maxlen` : ajout en fin, retrait en tête par simple
+    avance d'un index, compactage quand la moitié des colonnes est morte.
+    Identifiants IP / email entrelacés dans un seul tableau, succès sur un
+    octet (bytearray) : aucun objet Python par événement.
+    """
+    __slots__ = ('timestamps', 'ids', 'successes', 'head', 'maxlen')
+
+    def __init__(self, maxlen):
+        self.timestamps = array('q')
+        self.ids = array('I')
+        self.successes = bytearray()
+        self.head = 0
+        self.maxlen = maxlen
+
+    def __len__(self):
+        return len(self.timestamps) - self.head
+
+    def append(self, timestamp_ms, ip_id, email_id, success):
+        """Ajoute un événement ; retourne (ip_id, email_id) de l'événement évincé ou None"""
+        evicted = self.popleft() if len(self) >= self.maxlen else None
+        self.timestamps.append(timestamp_ms)
+        self.ids.append(ip_id)
+        self.ids.append(email_id)
+        self.successes.append(1 if success else 0)
+        return evicted
+
+    def oldest_timestamp_ms(self):
+        return self.timestamps[self.head]
+
+    def popleft(self):
+        """Retire l'événement le plus ancien ; retourne (ip_id, email_id)"""
+        head = self.head
+        ids = (self.ids[2 * head], self.ids[2 * head + 1])
+        self.head = head + 1
+        if self.head * 2 >= len(self.timestamps):
+            self._compact()
+        return ids
+
+    def _compact(self):
+        head = self.head
+        del self.timestamps[:head]
+        del self.ids[:2 * head]
+        del self.successes[:head]
+        self.head = 0
+
+    def records(self):
+        """(timestamp_ms, ip_id, email_id, succès) du plus ancien au plus récent"""
+        for position in range(self.head, len(self.timestamps)):
+            yield (
+                self.timestamps[position],
+                self.ids[2 * position],
+                self.ids[2 * position + 1],
+                bool(self.successes[position])
+            )
+
+    def id_pairs(self):
+        for position in range(self.head, len(self.timestamps)):
+            yield self.ids[2 * position], self.ids[2 * position + 1]
+
+
+class EventRing:
+    """Anneau colonnaire de taille fixe pour le flux des derniers événements"""
+
+    def __init__(self, capacity):
+        self._lock = threading.Lock()
+        self.capacity = capacity
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.ip_ids = array('I', bytes(4 * capacity))
+        self.email_ids = array('I', bytes(4 * capacity))
+        self.success_bits = bytearray((capacity + 7) // 8)
+        self.interner = Interner()
+        self.next_index = 0
+        self.size = 0
+
+    def append(self, timestamp_ms, ip_address, email, success):
+        with self._lock:
+            index = self.next_index
+            if self.size == self.capacity:
+                self.interner.release(self.ip_ids[index])
+                self.interner.release(self.email_ids[index])
+            else:
+                self.size += 1
+
+            self.timestamps[index] = timestamp_ms
+            self.ip_ids[index] = self.interner.acquire(ip_address)
+            self.email_ids[index] = self.interner.acquire(email)
+            if success:
+                self.success_bits[index >> 3] |= 1 << (index & 7)
+            else:
+                self.success_bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+            self.next_index = (index + 1) % self.capacity
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        with self._lock:
+            start = (self.next_index - self.size) % self.capacity
+            events = []
+            for offset in range(self.size):
+                index = (start + offset) % self.capacity
+                events.append(decode_event(
+                    self.timestamps[index],
+                    self.interner.lookup(self.ip_ids[index]),
+                    self.interner.lookup(self.email_ids[index]),
+                    bool(self.success_bits[index >> 3] & (1 << (index & 7)))
+                ))
+        return iter(events)
+
+    def approx_bytes(self):
+        columns = sum(sys.getsizeof(column) for column in (
+            self.timestamps, self.ip_ids, self.email_ids, self.success_bits
+        ))
+        with self._lock:
+            return columns + self.interner.approx_bytes()
+
+
+def decode_event(timestamp_ms, ip_address, email, success):
+    """Événement au format historique (dictionnaire) pour l'affichage / le débogage"""
+    return {
+        'timestamp': datetime.fromtimestamp(timestamp_ms / 1000),
+        'ip': ip_address,
+        'success': success,
+        'email': email
+    }
+
+
+# Coût par événement dans KeyEvents: horodatage (8) + deux identifiants (2 x 4) + succès (1)
+EVENT_BYTES = 8 + 4 + 4 + 1
@@ -0,0 +1,221 @@
+import queue
+import threading
+import time
+
+from security.lru_cache import LRUTTLCache
+
+UNKNOWN_GEO = {'country': 'Unknown', 'region': 'Unknown', 'city': 'Unknown', 'asn': 0}
+
+# Statut de géolocalisation d'une IP
+GEO_RESOLVED = 'resolved'        # trouvée par le backend
+GEO_NOT_FOUND = 'not_found'      # inconnue du backend (ou erreur) - cache négatif
+GEO_PENDING = 'pending'          # résolution en cours en arrière-plan
+GEO_UNAVAILABLE = 'unavailable'  # file pleine: pas de résolution pour cette requête
+
+
+class IpApiBackend:
+    """Géolocalisation en ligne via ip-api.com (appel bloquant, exécuté par les workers)"""
+
+    def __init__(self, timeout_seconds=2):
+        self.timeout = timeout_seconds
+
+    def __call__(self, ip):
+        import requests
+
+        response = requests.get(
+            f'http://ip-api.com/json/{ip}?fields=status,country,regionName,city,as', timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"ip-api.com HTTP {response.status_code}")
+        data = response.json()
+        if data.get('status') == 'fail':
+            return None
+        return {
+            'country': data.get('country', 'Unknown'),
+            'region': data.get('regionName', 'Unknown'),
+            'city': data.get('city', 'Unknown'),
+            'asn': data.get('as', 0)
+        }
+
+
+class StaticGeoBackend:
+    """Backend local de substitution (tests, démonstration hors ligne)
+
+    Table IP -> enregistrement, latence simulée, IP en erreur ; compte les
+    appels pour vérifier le cache et le budget.
+    """
+
+    def __init__(self, table=None, latency_seconds=0.0, failing_ips=()):
+        self.table = dict(table or {})
+        self.latency = latency_seconds
+        self.failing_ips = set(failing_ips)
+        self.calls = 0
+        self.call_times = []
+        self._lock = threading.Lock()
+
+    def __call__(self, ip):
+        with self._lock:
+            self.calls += 1
+            self.call_times.append(time.monotonic())
+        if self.latency:
+            time.sleep(self.latency)
+        if ip in self.failing_ips:
+            raise RuntimeError(f"backend indisponible pour {ip}")
+        record = self.table.get(ip)
+        return dict(record) if record is not None else None
+
+
+class GeoEnricher:
+    """Géolocalisation en arrière-plan, hors du chemin de la requête
+
+    `lookup` répond immédiatement depuis le cache (résultats positifs et
+    négatifs, TTL distincts) ; une IP froide est mise en file et la requête
+    continue avec le statut `pending`. Des workers interrogent le backend
+    sous un budget global de `lookups_per_second` (seau à jetons) : un
+    balayage d'IP uniques remplit la file bornée au lieu d'inonder le
+    backend, et les IP en excès repartent avec le statut `unavailable`.
+
+    Les requêtes concurrentes pour une même IP froide sont regroupées en
+    une seule résolution ; callbacks et listeners reçoivent le résultat
+    pour compléter les entrées déjà enregistrées.
+    """
+
+    def __init__(self, backend, workers=2, max_queue_size=1000, cache_size=100000,
+                 positive_ttl_seconds=86400, negative_ttl_seconds=900, lookups_per_second=0.75):
+        self.backend = backend
+        self.negative_ttl = negative_ttl_seconds
+        self.cache = LRUTTLCache(cache_size, positive_ttl_seconds)
+        self.rate = float(lookups_per_second)
+        self.burst = max(1.0, self.rate)
+
+        self._queue = queue.Queue(maxsize=int(max_queue_size))
+        self._pending = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._budget_lock = threading.Lock()
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self.stats = {
+            'lookups': 0,
+            'cache_hits': 0,
+            'negative_hits': 0,
+            'scheduled': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'resolved': 0,
+            'not_found': 0,
+            'errors': 0,
+            'throttled_seconds': 0.0,
+            'total_backend_ms': 0.0
+        }
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f'geo-enricher-{index}', daemon=True)
+            for index in range(max(1, int(workers)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def add_listener(self, listener):
+        """Appelé pour chaque IP résolue en arrière-plan: listener(ip, statut, geo)"""
+        self._listeners.append(listener)
+
+    def lookup(self, ip):
+        """(statut, geo) immédiat ; une IP absente du cache est planifiée (statut pending)"""
+        with self._lock:
+            self.stats['lookups'] += 1
+            cached = self.cache.get(ip)
+            if cached is not None:
+                self.stats['cache_hits' if cached[0] == GEO_RESOLVED else 'negative_hits'] += 1
+                return cached
+
+            if ip in self._pending:
+                self.stats['coalesced'] += 1
+                return GEO_PENDING, UNKNOWN_GEO
+            try:
+                self._queue.put_nowait(ip)
+            except queue.Full:
+                self.stats['dropped'] += 1
+                return GEO_UNAVAILABLE, UNKNOWN_GEO
+            self._pending[ip] = []
+            self.stats['scheduled'] += 1
+        return GEO_PENDING, UNKNOWN_GEO
+
+    def when_resolved(self, ip, callback):
+        """callback(ip, statut, geo) dès que l'IP est résolue (immédiatement si déjà en cache)
+
+        Retourne False si l'IP n'est ni en cours de résolution ni en cache:
+        le callback ne sera jamais appelé.
+        """
+        with self._lock:
+            callbacks = self._pending.get(ip)
+            if callbacks is not None:
+                callbacks.append(callback)
+                return True
+            cached = self.cache.get(ip)
+        if cached is None:
+            return False
+        callback(ip, *cached)
+        return True
+
+    def _acquire_budget(self):
+        """Attend un jeton du budget global de requêtes au backend"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._budget_lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            with self._lock:
+                self.stats['throttled_seconds'] += wait
+            time.sleep(wait)
+
+    def _run(self):
+        while True:
+            ip = self._queue.get()
+            self._acquire_budget()
+            self._resolve(ip)
+
+    def _resolve(self, ip):
+        started = time.perf_counter()
+        error = False
+        try:
+            geo = self.backend(ip)
+        except Exception:
+            geo = None
+            error = True
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        # Erreur backend: mise en cache négative aussi (pas de nouvel essai avant le TTL négatif)
+        result = (GEO_RESOLVED, geo) if geo is not None else (GEO_NOT_FOUND, UNKNOWN_GEO)
+
+        with self._lock:
+            self.cache.put(ip, result, ttl_seconds=None if geo is not None else self.negative_ttl)
+            callbacks = self._pending.pop(ip, [])
+            self.stats['total_backend_ms'] += elapsed_ms
+            self.stats[result[0]] += 1
+            if error:
+                self.stats['errors'] += 1
+
+        for callback in callbacks + self._listeners:
+            try:
+                callback(ip, *result)
+            except Exception:
+                pass
+
+    def get_statistics(self):
+        with self._lock:
+            stats = self.stats.copy()
+            stats['pending'] = len(self._pending)
+        stats['enabled'] = True
+        stats['queue_depth'] = self._queue.qsize()
+        stats['workers'] = len(self._threads)
+        stats['lookups_per_second'] = self.rate
+        stats['avg_backend_ms'] = stats.pop('total_backend_ms') / max(1, stats['resolved'] + stats['not_found'])
+        stats['cache'] = self.cache.get_statistics()
+        return stats
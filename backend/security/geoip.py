@@ -0,0 +1,310 @@
+"""
+Base GeoIP locale (hors ligne): réseaux CIDR -> pays / région / ville / ASN
+
+Les réseaux sont aplatis en plages disjointes triées (le plus spécifique
+gagne en cas de recouvrement) et écrits dans un fichier binaire lu par
+mmap : tableaux de bornes IPv4 (32 bits) et IPv6 (préfixe /64, 64 bits)
++ table des enregistrements. Une recherche = une dichotomie (bisect) sur
+le tableau des débuts de plage, quelques microsecondes, sans réseau.
+
+Sources CSV / TSV avec en-tête: une colonne `network` (CIDR) ou deux
+colonnes `start` / `end` (plage d'adresses), puis `country` et, en option,
+`region`, `city`, `asn`. Les lignes sans pays sont ignorées: l'IP reste
+inconnue de la base (lookup -> None) au lieu d'un faux pays 'Unknown'.
+Les exports GeoLite2 (pays dans un fichier de locations séparé) ou ip2asn
+(sans en-tête) doivent d'abord être convertis dans ce format.
+
+Usage (depuis backend/):
+    python -m security.geoip build <source.csv> [source2.csv ...] [-o ../data/geoip.bin]
+    python -m security.geoip lookup <ip> [base.bin]
+"""
+import csv
+import heapq
+import ipaddress
+import json
+import mmap
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+MAGIC = b'MSGEOIP1'
+HEADER = struct.Struct('<8sIII')
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent.parent / 'data' / 'geoip.bin'
+
+COLUMN_ALIASES = {
+    'network': ('network', 'cidr', 'prefix'),
+    'start': ('start', 'range_start', 'start_ip'),
+    'end': ('end', 'range_end', 'end_ip'),
+    'country': ('country', 'country_code', 'country_name'),
+    'region': ('region', 'region_name'),
+    'city': ('city', 'city_name'),
+    'asn': ('asn', 'as_number')
+}
+
+
+def _column(row, name):
+    for alias in COLUMN_ALIASES[name]:
+        value = row.get(alias)
+        if value not in (None, ''):
+            return value.strip()
+    return None
+
+
+def _parse_asn(value):
+    if not value:
+        return 0
+    value = value.upper()
+    value = value[2:] if value.startswith('AS') else value  # str.removeprefix: Python 3.9+
+    return int(value) if value.isdigit() else 0
+
+
+def read_source(path):
+    """Plages (version, début, fin, enregistrement) d'un fichier CSV / TSV"""
+    with open(path, newline='', encoding='utf-8') as f:
+        delimiter = '\t' if str(path).endswith('.tsv') else ','
+        for row in csv.DictReader(f, delimiter=delimiter):
+            row = {key.strip().lower(): value for key, value in row.items() if key}
+            try:
+                network = _column(row, 'network')
+                if network:
+                    network = ipaddress.ip_network(network, strict=False)
+                    first, last = network.network_address, network.broadcast_address
+                else:
+                    first = ipaddress.ip_address(_column(row, 'start'))
+                    last = ipaddress.ip_address(_column(row, 'end'))
+            except (TypeError, ValueError):
+                continue
+            if first.version != last.version:
+                continue
+
+            # Sans pays, la plage n'apporte rien: ne pas la stocker comme un résultat
+            country = _column(row, 'country')
+            if not country:
+                continue
+
+            record = (
+                country,
+                _column(row, 'region') or 'Unknown',
+                _column(row, 'city') or 'Unknown',
+                _parse_asn(_column(row, 'asn'))
+            )
+            start, end = int(first), int(last)
+            if first.version == 6:
+                # Granularité /64: suffisante pour la géolocalisation
+                start, end = start >> 64, end >> 64
+            yield first.version, start, end, record
+
+
+def flatten_ranges(ranges):
+    """Plages disjointes triées [(début, fin, id)] ; le réseau le plus petit couvre les autres"""
+    if not ranges:
+        return []
+    ranges = sorted(ranges)
+    points = sorted({start for start, _, _ in ranges} | {end + 1 for _, end, _ in ranges})
+
+    flattened = []
+    active = []
+    position = 0
+    for point, next_point in zip(points, points[1:]):
+        while position < len(ranges) and ranges[position][0] <= point:
+            start, end, record_id = ranges[position]
+            heapq.heappush(active, (end - start, end, record_id))
+            position += 1
+        while active and active[0][1] < point:
+            heapq.heappop(active)
+        if not active:
+            continue
+
+        record_id = active[0][2]
+        if flattened and flattened[-1][1] == point - 1 and flattened[-1][2] == record_id:
+            flattened[-1] = (flattened[-1][0], next_point - 1, record_id)
+        else:
+            flattened.append((point, next_point - 1, record_id))
+    return flattened
+
+
+def build_database(sources, output=DEFAULT_DB_PATH):
+    """Construit le fichier binaire (remplacement atomique: les lecteurs voient l'ancien ou le nouveau)"""
+    records = []
+    record_ids = {}
+    ranges = {4: [], 6: []}
+    for source in sources:
+        for version, start, end, record in read_source(source):
+            record_id = record_ids.get(record)
+            if record_id is None:
+                record_id = record_ids[record] = len(records)
+                records.append(record)
+            ranges[version].append((start, end, record_id))
+
+    flat = {version: flatten_ranges(items) for version, items in ranges.items()}
+    payload = json.dumps(records, ensure_ascii=False).encode('utf-8')
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    temporary = output.with_suffix(output.suffix + '.tmp')
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(flat[4]), len(flat[6]), len(payload)))
+        for version, code in ((4, 'I'), (6, 'Q')):
+            for column in range(3):
+                values = array('I' if column == 2 else code, (item[column] for item in flat[version]))
+                if sys.byteorder != 'little':
+                    values.byteswap()
+                f.write(values.tobytes())
+        f.write(payload)
+    os.replace(temporary, output)
+
+    return {'records': len(records), 'ipv4_ranges': len(flat[4]), 'ipv6_ranges': len(flat[6])}
+
+
+class GeoIPDatabase:
+    """Fichier GeoIP projeté en mémoire ; recherches sans copie des tableaux"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count4, count6, payload_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Fichier GeoIP invalide: {self.path}")
+
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        columns = []
+        for count, code, size in ((count4, 'I', 4), (count4, 'I', 4), (count4, 'I', 4),
+                                  (count6, 'Q', 8), (count6, 'Q', 8), (count6, 'I', 4)):
+            column = view[offset:offset + count * size]
+            if sys.byteorder == 'little':
+                column = column.cast(code)
+            else:
+                column = array(code, column.tobytes())
+                column.byteswap()
+            columns.append(column)
+            offset += count * size
+
+        self.v4_starts, self.v4_ends, self.v4_ids, self.v6_starts, self.v6_ends, self.v6_ids = columns
+        self.records = [
+            {'country': country, 'region': region, 'city': city, 'asn': asn}
+            for country, region, city, asn in json.loads(bytes(view[offset:offset + payload_size]))
+        ]
+
+    def lookup(self, ip):
+        """Enregistrement {'country', 'region', 'city', 'asn'} de l'IP, ou None"""
+        try:
+            key = int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+            starts, ends, ids = self.v4_starts, self.v4_ends, self.v4_ids
+        except (OSError, TypeError):
+            try:
+                key = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big') >> 64
+            except (OSError, TypeError):
+                return None
+            starts, ends, ids = self.v6_starts, self.v6_ends, self.v6_ids
+
+        index = bisect_right(starts, key) - 1
+        if index >= 0 and key <= ends[index]:
+            return dict(self.records[ids[index]])
+        return None
+
+    def get_statistics(self):
+        return {
+            'path': str(self.path),
+            'ipv4_ranges': len(self.v4_starts),
+            'ipv6_ranges': len(self.v6_starts),
+            'records': len(self.records),
+            'file_bytes': len(self._mmap)
+        }
+
+
+class LocalGeoProvider:
+    """Base GeoIP courante + rechargement quand le fichier est reconstruit
+
+    La date de modification est vérifiée au plus toutes les
+    `check_interval_seconds` ; la nouvelle base remplace l'ancienne d'un
+    bloc (les recherches en cours gardent leur référence).
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, check_interval_seconds=60):
+        self.path = Path(path)
+        self.check_interval = check_interval_seconds
+        self.database = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {'lookups': 0, 'hits': 0, 'reloads': 0, 'total_lookup_us': 0.0}
+        self.refresh()
+
+    def refresh(self):
+        """Charge la base si le fichier a changé ; retourne True si une base est disponible"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = self.path.stat().st_mtime
+            except OSError:
+                return self.database is not None
+            if mtime != self._mtime:
+                try:
+                    self.database = GeoIPDatabase(self.path)
+                    self._mtime = mtime
+                    self.stats['reloads'] += 1
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Base GeoIP illisible ({self.path}): {e}")
+            return self.database is not None
+
+    @property
+    def available(self):
+        return self.database is not None
+
+    def lookup(self, ip):
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        database = self.database
+        if database is None:
+            return None
+
+        started = time.perf_counter()
+        record = database.lookup(ip)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        with self._lock:
+            self.stats['lookups'] += 1
+            self.stats['hits'] += record is not None
+            self.stats['total_lookup_us'] += elapsed_us
+        return record
+
+    def get_statistics(self):
+        with self._lock:
+            stats = self.stats.copy()
+        stats['available'] = self.database is not None
+        stats['avg_lookup_us'] = stats.pop('total_lookup_us') / max(1, stats['lookups'])
+        if self.database is not None:
+            stats.update(self.database.get_statistics())
+        return stats
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('build', 'lookup'):
+        print(__doc__)
+        sys.exit(1)
+
+    if sys.argv[1] == 'lookup':
+        database = GeoIPDatabase(sys.argv[3] if len(sys.argv) > 3 else DEFAULT_DB_PATH)
+        print(database.lookup(sys.argv[2]))
+        sys.exit(0)
+
+    arguments = sys.argv[2:]
+    output = DEFAULT_DB_PATH
+    if '-o' in arguments:
+        index = arguments.index('-o')
+        output = arguments[index + 1]
+        del arguments[index:index + 2]
+
+    started = time.perf_counter()
+    summary = build_database(arguments, output)
+    print(f"✅ Base GeoIP construite en {time.perf_counter() - started:.1f}s: {output}")
+    print(f"   🌍 {summary['ipv4_ranges']} plages IPv4, {summary['ipv6_ranges']} plages IPv6, "
+          f"{summary['records']} enregistrements")
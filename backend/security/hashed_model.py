@@ -0,0 +1,157 @@
+"""
+Modèle linéaire léger sur caractéristiques hachées (repli / premier filtre)
+
+Régression logistique sur les mêmes champs que prepare_text_for_bert,
+projetés par hachage dans un vecteur de taille fixe. Le scoring d'un
+événement coûte quelques microsecondes ; seule NumPy est requise.
+
+Usage (depuis backend/):
+    python -m security.hashed_model <logs.csv|logs.jsonl> [modele.npz]
+"""
+import math
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+SUSPICIOUS_COUNTRIES = ('Unknown', 'RU', 'CN', 'KP', 'IR')
+SUSPICIOUS_EMAIL_KEYWORDS = ('admin', 'root', 'test', 'hacker')
+
+
+def extract_features(log_data):
+    """Caractéristiques catégorielles d'un log (mêmes champs que prepare_text_for_bert)"""
+    email = str(log_data.get('email', 'unknown') or 'unknown')
+    ip = str(log_data.get('IP Address', '0.0.0.0') or '0.0.0.0')
+    country = str(log_data.get('Country', 'unknown') or 'unknown')
+    success = bool(log_data.get('Login Successful', False))
+    browser = str(log_data.get('Browser Name and Version', 'unknown') or 'unknown')
+    os_info = str(log_data.get('OS Name and Version', 'unknown') or 'unknown')
+    user_id = str(log_data.get('User ID', 'unknown') or 'unknown')
+
+    browser_family = browser.split(' ')[0].lower()
+    os_family = os_info.split(' ')[0].lower()
+    outcome = 'ok' if success else 'fail'
+
+    features = [
+        f"user={user_id}",
+        f"ip={ip}",
+        f"ip24={ip.rsplit('.', 1)[0]}",
+        f"country={country}",
+        f"browser={browser.lower()}",
+        f"browser_family={browser_family}",
+        f"os={os_info.lower()}",
+        f"os_family={os_family}",
+        f"email_domain={email.rsplit('@', 1)[-1].lower()}",
+        f"success={outcome}",
+        f"country_x_success={country}|{outcome}",
+        f"browser_x_success={browser_family}|{outcome}"
+    ]
+
+    if country in SUSPICIOUS_COUNTRIES:
+        features.append("suspicious_country")
+    if ip in ('127.0.0.1', 'localhost', '0.0.0.0'):
+        features.append("local_ip")
+    if 'Unknown' in browser or 'python' in browser.lower():
+        features.append("suspicious_browser")
+    for keyword in SUSPICIOUS_EMAIL_KEYWORDS:
+        if keyword in email:
+            features.append(f"email_kw={keyword}")
+
+    return features
+
+
+class HashedFeatureModel:
+    """Régression logistique sur caractéristiques hachées (hashing trick signé)"""
+
+    def __init__(self, n_features=2 ** 18):
+        self.n_features = int(n_features)
+        self.weights = np.zeros(self.n_features, dtype=np.float32)
+        self.bias = 0.0
+
+    def _indices(self, log_data):
+        """Indices et signes des caractéristiques (crc32: stable entre processus)"""
+        hashed = []
+        for feature in extract_features(log_data):
+            h = zlib.crc32(feature.encode('utf-8'))
+            hashed.append((h % self.n_features, 1.0 if (h >> 31) & 1 else -1.0))
+        return hashed
+
+    def predict_proba(self, log_data):
+        """Probabilité d'attaque pour une entrée de log"""
+        z = self.bias
+        weights = self.weights
+        for index, sign in self._indices(log_data):
+            z += sign * float(weights[index])
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        exp_z = math.exp(z)
+        return exp_z / (1.0 + exp_z)
+
+    def predict(self, log_data):
+        """Prédiction au même format que bert_predict"""
+        probability = self.predict_proba(log_data)
+        return {
+            'probability_attack': probability,
+            'confidence': abs(probability - 0.5) * 2,
+            'source': 'hashed'
+        }
+
+    def fit(self, log_entries, labels, epochs=3, learning_rate=0.1, l2=1e-6, seed=42):
+        """Entraînement SGD (log-loss), classes rééquilibrées"""
+        rows = [self._indices(entry) for entry in log_entries]
+        targets = np.asarray(labels, dtype=np.float32)
+
+        positives = max(1.0, float(targets.sum()))
+        negatives = max(1.0, float(len(targets) - targets.sum()))
+        class_weight = {1.0: len(targets) / (2 * positives), 0.0: len(targets) / (2 * negatives)}
+
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            rate = learning_rate / (1 + epoch)
+            for i in rng.permutation(len(rows)):
+                indices = np.fromiter((index for index, _ in rows[i]), dtype=np.int64)
+                signs = np.fromiter((sign for _, sign in rows[i]), dtype=np.float32)
+
+                z = self.bias + float(np.dot(self.weights[indices], signs))
+                prediction = 1.0 / (1.0 + math.exp(-max(-35.0, min(35.0, z))))
+                gradient = (prediction - targets[i]) * class_weight[float(targets[i])]
+
+                self.weights[indices] -= rate * (gradient * signs + l2 * self.weights[indices])
+                self.bias -= rate * gradient
+        return self
+
+    def save(self, path):
+        """Sauvegarde compacte (.npz)"""
+        np.savez_compressed(path, weights=self.weights, bias=np.float32(self.bias))
+
+    @classmethod
+    def load(cls, path):
+        """Charge un modèle sauvegardé par save()"""
+        data = np.load(path)
+        model = cls(n_features=len(data['weights']))
+        model.weights = data['weights'].astype(np.float32)
+        model.bias = float(data['bias'])
+        return model
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    from security.log_sets import attack_label, load_log_set
+
+    default_output = Path(__file__).resolve().parent.parent.parent / 'models' / 'hashed_fallback.npz'
+    output = sys.argv[2] if len(sys.argv) > 2 else str(default_output)
+
+    entries = [entry for entry in load_log_set(sys.argv[1]) if attack_label(entry) is not None]
+    split = int(len(entries) * 0.9)
+    train, held_out = entries[:split], entries[split:]
+
+    model = HashedFeatureModel().fit(train, [attack_label(entry) for entry in train])
+    model.save(output)
+
+    correct = sum(1 for entry in held_out if (model.predict_proba(entry) > 0.5) == attack_label(entry))
+    print(f"✅ Modèle haché entraîné sur {len(train)} événements: {output}")
+    print(f"   🎯 Exactitude (10% réservés): {correct / max(1, len(held_out)):.2%}")
@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+
+
+class _PendingPrediction:
+    """Requête en attente d'un résultat de prédiction"""
+    __slots__ = ('text', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, text):
+        self.text = text
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatchScheduler:
+    """Regroupe les prédictions concurrentes en un seul passage du modèle
+
+    Les threads Flask déposent leur texte dans une file bornée ; un thread
+    unique collecte les requêtes pendant au plus `max_wait_ms` (ou jusqu'à
+    `max_batch_size`), appelle `predict_batch_fn` une seule fois puis
+    réveille chaque appelant avec son propre résultat.
+    """
+
+    def __init__(self, predict_batch_fn, max_batch_size=16, max_wait_ms=5.0, max_queue_size=1024):
+        self.predict_batch_fn = predict_batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_queue_size = int(max_queue_size)
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'batches': 0,
+            'batched_requests': 0,
+            'max_batch_seen': 0,
+            'max_queue_depth_seen': 0,
+            'total_wait_ms': 0.0
+        }
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='bert-micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, text, timeout=None):
+        """Soumet un texte et attend le résultat de son lot"""
+        pending = _PendingPrediction(text)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            with self._stats_lock:
+                self.stats['rejected'] += 1
+            raise RuntimeError("File d'inférence pleine")
+
+        with self._stats_lock:
+            self.stats['submitted'] += 1
+            depth = self._queue.qsize()
+            if depth > self.stats['max_queue_depth_seen']:
+                self.stats['max_queue_depth_seen'] = depth
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Délai dépassé en attente du lot d'inférence")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect_batch(self):
+        """Attend une première requête puis remplit le lot jusqu'à l'échéance"""
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = self.predict_batch_fn([p.text for p in batch])
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+
+            with self._stats_lock:
+                self.stats['batches'] += 1
+                self.stats['batched_requests'] += len(batch)
+                self.stats['max_batch_seen'] = max(self.stats['max_batch_seen'], len(batch))
+                self.stats['total_wait_ms'] += sum(
+                    (started - p.enqueued_at) * 1000 for p in batch
+                )
+
+            for pending in batch:
+                pending.done.set()
+
+    def stop(self):
+        """Arrête le thread de traitement"""
+        self._running = False
+        self._thread.join(timeout=1)
+
+    def get_statistics(self):
+        """Retourne les statistiques du regroupement"""
+        with self._stats_lock:
+            stats = self.stats.copy()
+        stats['enabled'] = True
+        stats['max_batch_size'] = self.max_batch_size
+        stats['max_wait_ms'] = self.max_wait * 1000
+        stats['max_queue_size'] = self.max_queue_size
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_batch_size'] = stats['batched_requests'] / max(1, stats['batches'])
+        stats['avg_wait_ms'] = stats['total_wait_ms'] / max(1, stats['batched_requests'])
+        return stats
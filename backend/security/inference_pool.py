@@ -0,0 +1,250 @@
+import itertools
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import AuthenticationError, Client, Listener
+from pathlib import Path
+
+from security.inference_worker import AUTHKEY_ENV
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class _PendingRequest:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _WorkerHandle:
+    """Côté serveur d'un processus d'inférence (canal, requêtes en vol, compteurs)"""
+
+    def __init__(self, worker_id, process, conn):
+        self.worker_id = worker_id
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.pending = {}
+        self.alive = True
+        self.model_loaded = False
+        self.ready = threading.Event()
+        self.started_at = time.perf_counter()
+        self.completed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+
+class InferencePool:
+    """Pool de processus d'inférence DistilBERT
+
+    Chaque processus charge son propre modèle avec un nombre fixe de threads
+    torch. Les processus sont lancés via le module dédié
+    security.inference_worker (le module principal du serveur n'est pas
+    ré-exécuté) et se connectent au pool par un canal authentifié. Les
+    textes circulent avec un identifiant de requête, ce qui permet de
+    multiplexer plusieurs requêtes en vol par processus ; un thread lecteur
+    par processus réveille les appelants.
+    """
+
+    def __init__(self, model_path, num_workers=2, threads_per_worker=1, inference_backend='torch',
+                 onnx_path=None, quantization=None, max_length=256, bucket_size=32, warmup_texts=()):
+        self.model_path = model_path
+        self.num_workers = max(1, int(num_workers))
+        self.threads_per_worker = max(1, int(threads_per_worker))
+        self.worker_options = {
+            'model_path': model_path,
+            'threads_per_worker': self.threads_per_worker,
+            'inference_backend': inference_backend,
+            'onnx_path': onnx_path,
+            'quantization': quantization,
+            'max_length': max_length,
+            'bucket_size': bucket_size,
+            'warmup_texts': list(warmup_texts)
+        }
+
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+        self.workers = []
+
+    def start(self, timeout=300):
+        """Démarre les processus et attend qu'ils aient chargé le modèle"""
+        authkey = secrets.token_bytes(32)
+        listener = Listener(authkey=authkey)
+        env = dict(os.environ, **{AUTHKEY_ENV: authkey.hex()})
+        processes = {
+            worker_id: subprocess.Popen(
+                [sys.executable, '-m', 'security.inference_worker', listener.address, str(worker_id)],
+                cwd=BACKEND_DIR, env=env
+            )
+            for worker_id in range(self.num_workers)
+        }
+
+        stop = threading.Event()
+        accepter = threading.Thread(
+            target=self._accept_workers, args=(listener, processes, stop),
+            name='bert-inference-accept', daemon=True
+        )
+        accepter.start()
+
+        # Attente des connexions, sauf si tous les processus manquants sont déjà arrêtés
+        deadline = time.monotonic() + timeout
+        while accepter.is_alive() and time.monotonic() < deadline:
+            accepter.join(0.1)
+            with self._lock:
+                connected = {worker.worker_id for worker in self.workers}
+            waiting = [process for worker_id, process in processes.items() if worker_id not in connected]
+            if waiting and all(process.poll() is not None for process in waiting):
+                break
+
+        with self._lock:
+            stop.set()
+            connected = {worker.worker_id for worker in self.workers}
+        if accepter.is_alive():
+            try:
+                # Connexion vide: réveille accept() pour que le thread constate l'arrêt
+                Client(listener.address).close()
+            except OSError:
+                pass
+            accepter.join(5)
+        listener.close()
+        for worker_id, process in processes.items():
+            if worker_id not in connected:
+                process.kill()
+
+        for worker in self.workers:
+            worker.ready.wait(max(0.0, deadline - time.monotonic()))
+
+        return any(worker.model_loaded for worker in self.workers)
+
+    def _accept_workers(self, listener, processes, stop):
+        """Associe chaque connexion à son processus (message ('hello', id)) et lui envoie sa configuration"""
+        while not stop.is_set():
+            try:
+                conn = listener.accept()
+                kind, worker_id = conn.recv()
+            except (OSError, EOFError, AuthenticationError, ValueError, TypeError):
+                continue
+
+            with self._lock:
+                known = {worker.worker_id for worker in self.workers}
+                if stop.is_set() or kind != 'hello' or worker_id not in processes or worker_id in known:
+                    conn.close()
+                    continue
+                worker = _WorkerHandle(worker_id, processes[worker_id], conn)
+                self.workers.append(worker)
+
+            threading.Thread(
+                target=self._reader_loop, args=(worker,),
+                name=f'bert-inference-reader-{worker_id}', daemon=True
+            ).start()
+            try:
+                conn.send(self.worker_options)
+            except OSError:
+                pass
+            if len(known) + 1 == len(processes):
+                return
+
+    def _reader_loop(self, worker):
+        """Reçoit les réponses d'un processus et réveille les requêtes correspondantes"""
+        try:
+            while True:
+                message = worker.conn.recv()
+                if message[0] == 'ready':
+                    worker.model_loaded = bool(message[2])
+                    worker.ready.set()
+                    continue
+
+                request_id, predictions, error, busy = message
+                with self._lock:
+                    pending = worker.pending.pop(request_id, None)
+                    worker.busy_seconds += busy
+                    if error is None:
+                        worker.completed += 1
+                    else:
+                        worker.errors += 1
+
+                if pending is not None:
+                    pending.result = predictions
+                    pending.error = RuntimeError(error) if error else None
+                    pending.done.set()
+        except (EOFError, OSError):
+            pass
+
+        # Processus terminé: échouer les requêtes encore en vol
+        with self._lock:
+            worker.alive = False
+            orphans = list(worker.pending.values())
+            worker.pending.clear()
+        worker.ready.set()
+        for pending in orphans:
+            pending.error = RuntimeError(f"Processus d'inférence {worker.worker_id} arrêté")
+            pending.done.set()
+
+    def predict(self, texts, timeout=30):
+        """Envoie les textes au processus le moins chargé et attend ses prédictions"""
+        pending = _PendingRequest()
+
+        with self._lock:
+            candidates = [w for w in self.workers if w.alive and w.model_loaded]
+            if not candidates:
+                raise RuntimeError("Aucun processus d'inférence disponible")
+            worker = min(candidates, key=lambda w: len(w.pending))
+            request_id = next(self._request_ids)
+            worker.pending[request_id] = pending
+
+        with worker.send_lock:
+            worker.conn.send((request_id, list(texts)))
+
+        if not pending.done.wait(timeout):
+            with self._lock:
+                worker.pending.pop(request_id, None)
+            raise TimeoutError(f"Processus d'inférence {worker.worker_id} sans réponse")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stop(self):
+        """Arrête proprement les processus"""
+        for worker in self.workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+        for worker in self.workers:
+            try:
+                worker.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+
+    def get_statistics(self):
+        """Profondeur de file et taux d'utilisation par processus"""
+        now = time.perf_counter()
+        with self._lock:
+            workers = [
+                {
+                    'worker_id': w.worker_id,
+                    'pid': w.process.pid,
+                    'alive': w.alive,
+                    'model_loaded': w.model_loaded,
+                    'queue_depth': len(w.pending),
+                    'completed': w.completed,
+                    'errors': w.errors,
+                    'utilization': w.busy_seconds / max(1e-9, now - w.started_at)
+                }
+                for w in self.workers
+            ]
+
+        return {
+            'enabled': True,
+            'num_workers': self.num_workers,
+            'threads_per_worker': self.threads_per_worker,
+            'queue_depth': sum(w['queue_depth'] for w in workers),
+            'workers': workers
+        }
@@ -0,0 +1,69 @@
+"""
+Processus d'inférence DistilBERT du pool (point d'entrée dédié)
+
+Lancé par InferencePool (python -m security.inference_worker <adresse> <id>)
+plutôt que par multiprocessing 'spawn', qui ré-exécute le module principal
+du serveur (app.py) dans chaque processus. Le processus ne charge qu'un
+LoadedModel : ni détecteur, ni journalisation, ni threads d'arrière-plan.
+La clé d'authentification du canal est transmise par variable d'environnement.
+"""
+import os
+import sys
+import time
+from multiprocessing.connection import Client
+
+from security.bert_inference import bert_forward, load_model_bundle
+
+AUTHKEY_ENV = 'INFERENCE_POOL_AUTHKEY'
+
+
+def serve(conn, worker_id, options):
+    """Boucle d'un processus d'inférence: un modèle par processus, hors du GIL du serveur"""
+    import torch
+
+    torch.set_num_threads(options['threads_per_worker'])
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    max_length, bucket_size = options['max_length'], options['bucket_size']
+    try:
+        bundle = load_model_bundle(
+            options['model_path'], 'default',
+            inference_backend=options['inference_backend'],
+            onnx_path=options['onnx_path'],
+            quantization=options['quantization']
+        )
+        warmup_texts = options['warmup_texts']
+        for _ in range(2):
+            if warmup_texts:
+                bert_forward(bundle, warmup_texts[:1], max_length, bucket_size)
+                bert_forward(bundle, warmup_texts * 4, max_length, bucket_size)
+    except Exception as e:
+        print(f"❌ Processus d'inférence {worker_id}: erreur chargement modèle: {e}")
+        bundle = None
+    conn.send(('ready', worker_id, bundle is not None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        request_id, texts = message
+        started = time.perf_counter()
+        try:
+            predictions = bert_forward(bundle, texts, max_length, bucket_size)
+            conn.send((request_id, predictions, None, time.perf_counter() - started))
+        except Exception as e:
+            conn.send((request_id, None, str(e), time.perf_counter() - started))
+
+
+if __name__ == '__main__':
+    address, worker_id = sys.argv[1], int(sys.argv[2])
+    conn = Client(address, authkey=bytes.fromhex(os.environ.pop(AUTHKEY_ENV)))
+    conn.send(('hello', worker_id))
+    serve(conn, worker_id, conn.recv())
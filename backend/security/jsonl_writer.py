@@ -0,0 +1,221 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+
+class _Marker:
+    """Élément de contrôle dans la file (vidage forcé ou arrêt)"""
+    __slots__ = ('done', 'stop')
+
+    def __init__(self, stop=False):
+        self.done = threading.Event()
+        self.stop = stop
+
+
+class BufferedJsonlWriter:
+    """Écriture JSONL en arrière-plan par lots (group commit)
+
+    Les threads de requête déposent l'enregistrement dans une file bornée
+    et repartent ; un thread unique sérialise et écrit les lignes par lots,
+    dès que `batch_size` lignes sont prêtes ou que `flush_interval_ms`
+    s'est écoulé depuis la première ligne du lot, avec un seul write() +
+    flush() par lot sur un fichier gardé ouvert.
+
+    Politique fsync:
+    - 'always'   : fsync après chaque lot (aucune perte si la machine tombe)
+    - 'interval' : au plus un fsync toutes les `fsync_interval_seconds`
+    - 'never'    : le système d'exploitation décide
+
+    File pleine: attente d'au plus `block_timeout_ms` (compteur `blocked`),
+    puis abandon de la ligne (compteur `dropped`). Avec 0, abandon immédiat.
+    """
+
+    def __init__(self, path, max_queue_size=10000, batch_size=256, flush_interval_ms=200,
+                 fsync='interval', fsync_interval_seconds=1.0, block_timeout_ms=0, logger=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique fsync inconnue: {fsync} (attendu: {', '.join(FSYNC_POLICIES)})")
+
+        self.path = Path(path)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_seconds
+        self.block_timeout = max(0.0, block_timeout_ms) / 1000
+        self.logger = logger
+
+        self._queue = queue.Queue(maxsize=int(max_queue_size))
+        self._file = None
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'dropped': 0,
+            'blocked': 0,
+            'write_errors': 0,
+            'fsyncs': 0,
+            'total_batch_ms': 0.0,
+            'max_batch_ms': 0.0
+        }
+
+        self._thread = threading.Thread(target=self._run, name='jsonl-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def write(self, record):
+        """Met l'enregistrement en file ; False s'il a été abandonné (file pleine ou writer fermé)"""
+        if self._closed:
+            self._count('dropped')
+            return False
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            if not self.block_timeout:
+                self._count('dropped')
+                return False
+            self._count('blocked')
+            try:
+                self._queue.put(record, timeout=self.block_timeout)
+            except queue.Full:
+                self._count('dropped')
+                return False
+
+        self._count('enqueued')
+        return True
+
+    def flush(self, timeout=5.0):
+        """Attend l'écriture (et le fsync selon la politique) de tout ce qui est déjà en file"""
+        if self._closed:
+            return True
+        marker = _Marker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Vide la file, ferme le fichier et arrête le thread d'écriture"""
+        if self._closed:
+            return
+        self._closed = True
+        marker = _Marker(stop=True)
+        self._queue.put(marker)
+        marker.done.wait(timeout)
+
+    def _next_batch(self):
+        """Lot de lignes + marqueur éventuel qui l'a interrompu"""
+        # Données écrites mais pas encore synchronisées: fsync différé si la file reste vide
+        while self._unsynced and self.fsync == 'interval':
+            remaining = self._last_fsync + self.fsync_interval - time.monotonic()
+            try:
+                first = self._queue.get(timeout=max(0.0, remaining))
+                break
+            except queue.Empty:
+                self._sync()
+        else:
+            first = self._queue.get()
+        if isinstance(first, _Marker):
+            return [], first
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _Marker):
+                return batch, item
+            batch.append(item)
+        return batch, None
+
+    def _run(self):
+        while True:
+            batch, marker = self._next_batch()
+            if batch:
+                self._commit(batch)
+            if marker is not None:
+                if marker.stop:
+                    self._close_file()
+                    marker.done.set()
+                    return
+                self._sync()
+                marker.done.set()
+
+    def _commit(self, batch):
+        started = time.perf_counter()
+        try:
+            data = ''.join(json.dumps(record) + '\n' for record in batch)
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(data)
+            self._file.flush()
+            self._unsynced = True
+            if self.fsync == 'always' or (
+                self.fsync == 'interval' and time.monotonic() - self._last_fsync >= self.fsync_interval
+            ):
+                self._sync()
+        except Exception as e:
+            self._count('write_errors', len(batch))
+            self._close_file()
+            if self.logger is not None:
+                self.logger.error(f"❌ Erreur écriture JSONL ({self.path}): {e}")
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['total_batch_ms'] += elapsed_ms
+            self.stats['max_batch_ms'] = max(self.stats['max_batch_ms'], elapsed_ms)
+
+    def _sync(self):
+        if self._file is None or self.fsync == 'never':
+            return
+        self._unsynced = False
+        try:
+            os.fsync(self._file.fileno())
+        except Exception as e:
+            self._count('write_errors')
+            if self.logger is not None:
+                self.logger.error(f"❌ Erreur fsync JSONL ({self.path}): {e}")
+            return
+        self._last_fsync = time.monotonic()
+        self._count('fsyncs')
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            if self.fsync != 'never':
+                os.fsync(self._file.fileno())
+            self._file.close()
+        except Exception:
+            pass
+        self._file = None
+
+    def get_statistics(self):
+        """Compteurs de la file d'écriture"""
+        with self._stats_lock:
+            stats = self.stats.copy()
+        stats['enabled'] = True
+        stats['path'] = str(self.path)
+        stats['fsync'] = self.fsync
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_batch_size'] = stats['written'] / max(1, stats['batches'])
+        stats['avg_batch_ms'] = stats['total_batch_ms'] / max(1, stats['batches'])
+        return stats
@@ -0,0 +1,200 @@
+import atexit
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class RateLimitedStreamHandler(logging.StreamHandler):
+    """Sortie console limitée par seau à jetons (`rate` messages/s, rafale `burst`)
+
+    Les messages au-delà du débit sont comptés puis résumés en une ligne
+    quand la console redevient disponible. Les niveaux >= `always_level`
+    passent toujours. rate=0 désactive la limitation.
+    """
+
+    def __init__(self, stream=None, rate=20.0, burst=50, always_level=logging.ERROR):
+        super().__init__(stream)
+        self.always_level = always_level
+        self.suppressed = 0
+        self.total_suppressed = 0
+        self.configure(rate, burst)
+
+    def configure(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.refilled_at = time.monotonic()
+
+    def _allow(self, record):
+        if self.rate <= 0 or record.levelno >= self.always_level:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def emit(self, record):
+        if not self._allow(record):
+            self.suppressed += 1
+            self.total_suppressed += 1
+            return
+        if self.suppressed:
+            try:
+                self.stream.write(f"⚠️ {self.suppressed} messages console omis (débit limité){self.terminator}")
+            except Exception:
+                pass
+            self.suppressed = 0
+        super().emit(record)
+
+
+class _ChannelQueueHandler(QueueHandler):
+    """QueueHandler qui étiquette l'enregistrement et n'attend jamais sur une file pleine"""
+
+    def __init__(self, pipeline, channel):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+        self.channel = channel
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.log_channel = self.channel
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.pipeline._count_drop(self.channel, record.levelname)
+            return
+        self.pipeline._count('enqueued')
+
+
+class _Dispatcher(logging.Handler):
+    """Côté listener: aiguille chaque enregistrement vers les sorties de son canal"""
+
+    def __init__(self, pipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def handle(self, record):
+        for handler in self.pipeline.routes.get(getattr(record, 'log_channel', None), ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # File bornée: le marqueur d'arrêt doit attendre une place au lieu d'échouer
+        self.queue.put(self._sentinel)
+
+
+class AsyncLogPipeline:
+    """Journalisation non bloquante partagée par le détecteur et le SecurityLogger
+
+    Les threads de requête ne font que déposer l'enregistrement dans une
+    file bornée (QueueHandler) ; un unique thread listener écrit les
+    fichiers et la console. File pleine: l'enregistrement est abandonné et
+    compté (par canal et par niveau) plutôt que de bloquer la requête.
+
+    Un canal = un fichier optionnel + la console commune (à débit limité).
+    """
+
+    def __init__(self, max_queue_size=10000, console_rate=20.0, console_burst=50):
+        self.queue = queue.Queue(maxsize=int(max_queue_size))
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.console = RateLimitedStreamHandler(sys.stderr, console_rate, console_burst)
+        self.console.setFormatter(self.formatter)
+        self.routes = {}
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self.stats = {'enqueued': 0, 'dropped': 0, 'dropped_by_channel': {}, 'dropped_by_level': {}}
+
+        self.listener = _Listener(self.queue, _Dispatcher(self))
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def configure(self, max_queue_size=None, console_rate=None, console_burst=None):
+        """Ajuste la taille de la file et le débit console (instance partagée déjà créée)"""
+        if max_queue_size is not None:
+            with self.queue.mutex:
+                self.queue.maxsize = int(max_queue_size)
+        if console_rate is not None or console_burst is not None:
+            self.console.configure(
+                self.console.rate if console_rate is None else console_rate,
+                self.console.burst if console_burst is None else console_burst
+            )
+
+    def handler(self, channel, file_path=None, level=logging.INFO, console=True):
+        """QueueHandler du canal (créé une fois) ; le fichier est écrit par le listener"""
+        with self._lock:
+            if channel not in self._handlers:
+                outputs = []
+                if file_path is not None:
+                    file_handler = logging.FileHandler(file_path, mode='a', encoding='utf-8')
+                    file_handler.setLevel(level)
+                    file_handler.setFormatter(self.formatter)
+                    outputs.append(file_handler)
+                if console:
+                    outputs.append(self.console)
+                self.routes[channel] = tuple(outputs)
+                self._handlers[channel] = _ChannelQueueHandler(self, channel)
+            return self._handlers[channel]
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _count_drop(self, channel, level_name):
+        with self._lock:
+            self.stats['dropped'] += 1
+            by_channel = self.stats['dropped_by_channel']
+            by_channel[channel] = by_channel.get(channel, 0) + 1
+            by_level = self.stats['dropped_by_level']
+            by_level[level_name] = by_level.get(level_name, 0) + 1
+
+    def stop(self):
+        """Vide la file et arrête le listener (appelé à la sortie du processus)"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def get_statistics(self):
+        with self._lock:
+            stats = {
+                'enqueued': self.stats['enqueued'],
+                'dropped': self.stats['dropped'],
+                'dropped_by_channel': dict(self.stats['dropped_by_channel']),
+                'dropped_by_level': dict(self.stats['dropped_by_level'])
+            }
+        stats['queue_depth'] = self.queue.qsize()
+        stats['max_queue_size'] = self.queue.maxsize
+        stats['console_suppressed'] = self.console.total_suppressed
+        stats['console_rate'] = self.console.rate
+        return stats
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_log_pipeline():
+    """Pipeline de journalisation du processus (créé au premier appel)"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = AsyncLogPipeline()
+        return _pipeline
+
+
+def configure_log_pipeline(max_queue_size=None, console_rate=None, console_burst=None):
+    pipeline = get_log_pipeline()
+    pipeline.configure(max_queue_size, console_rate, console_burst)
+    return pipeline
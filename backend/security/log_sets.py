@@ -0,0 +1,46 @@
+"""
+Jeux de logs étiquetés (CSV au format RBA ou JSONL de dictionnaires de log)
+
+Partagé par les outils hors ligne (rapport de quantification, entraînement
+du modèle haché): chargement avec booléens normalisés et label d'attaque.
+"""
+import csv
+import json
+from pathlib import Path
+
+BOOLEAN_FIELDS = ('Login Successful', 'Is Attack IP', 'Is Account Takeover', 'label')
+LABEL_FIELDS = ('label', 'Is Attack IP', 'Is Account Takeover')
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    return bool(value)
+
+
+def load_log_set(path, limit=None):
+    """Charge les entrées de log (CSV ou JSONL) en normalisant les booléens"""
+    path = Path(path)
+    entries = []
+
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix == '.csv':
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        for row in rows:
+            for field in BOOLEAN_FIELDS:
+                if field in row:
+                    row[field] = _to_bool(row[field])
+            entries.append(row)
+            if limit and len(entries) >= limit:
+                break
+
+    return entries
+
+
+def attack_label(entry):
+    """Label attaque (True/False) ou None si absent"""
+    present = [entry[field] for field in LABEL_FIELDS if field in entry]
+    return any(present) if present else None
@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUTTLCache:
+    """Cache LRU borné avec expiration (TTL), sûr entre threads"""
+
+    def __init__(self, max_entries=4096, ttl_seconds=300):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+    def get(self, key, default=None):
+        """Retourne la valeur en cache (et la marque comme récente)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key, value, ttl_seconds=None):
+        """Ajoute une valeur et évince la plus ancienne si le cache est plein"""
+        ttl = self.ttl if ttl_seconds is None else float(ttl_seconds)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, time.monotonic() + ttl)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_statistics(self):
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            stats = self.stats.copy()
+            stats['size'] = len(self._data)
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl
+        stats['hit_rate'] = stats['hits'] / max(1, stats['hits'] + stats['misses'])
+        return stats
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class LoadedModel:
+    """Modèle chargé et prêt à l'inférence (remplacé d'un bloc lors d'un hot-swap)"""
+    __slots__ = ('version', 'path', 'tokenizer', 'model', 'device', 'onnx_session', 'backend', 'loaded_at')
+
+    def __init__(self, version, path, tokenizer, model=None, device=None, onnx_session=None, backend='torch'):
+        self.version = version
+        self.path = path
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+        self.onnx_session = onnx_session
+        self.backend = backend
+        self.loaded_at = datetime.now().isoformat()
+
+
+class ModelManager:
+    """Registre versionné de modèles et remplacement à chaud du modèle actif
+
+    Chaque version est un dossier HuggingFace dans `registry_dir`
+    (ex: models/registry/v2/). Une nouvelle version est chargée et chauffée
+    en arrière-plan puis installée atomiquement dans le détecteur ; les
+    requêtes en cours terminent sur l'ancienne instance.
+    """
+
+    def __init__(self, detector, registry_dir, warmup_passes=2):
+        self.detector = detector
+        self.registry_dir = registry_dir
+        self.warmup_passes = warmup_passes
+
+        self._swap_lock = threading.Lock()
+        self.pending_version = None
+        self.last_error = None
+        self.swap_history = deque(maxlen=20)
+
+    def list_versions(self):
+        """Versions disponibles dans le registre (+ le modèle de base)"""
+        versions = {'default': self.detector.model_path}
+        if self.registry_dir and os.path.isdir(self.registry_dir):
+            for name in sorted(os.listdir(self.registry_dir)):
+                path = os.path.join(self.registry_dir, name)
+                if os.path.isfile(os.path.join(path, 'config.json')):
+                    versions[name] = path
+        return versions
+
+    def swap_async(self, version):
+        """Lance le chargement + warmup + bascule d'une version en arrière-plan"""
+        if self.detector.inference_pool is not None:
+            raise RuntimeError("Bascule à chaud non supportée en mode pool de processus")
+
+        versions = self.list_versions()
+        if version not in versions:
+            raise ValueError(f"Version de modèle inconnue: {version}")
+
+        if not self._swap_lock.acquire(blocking=False):
+            raise RuntimeError(f"Bascule déjà en cours vers {self.pending_version}")
+
+        self.pending_version = version
+        thread = threading.Thread(
+            target=self._swap, args=(version, versions[version]), daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _swap(self, version, path):
+        try:
+            started = time.perf_counter()
+            bundle = self.detector.load_model_bundle(path, version)
+            loaded = time.perf_counter()
+
+            self.detector.warmup_bundle(bundle, passes=self.warmup_passes)
+            warmed = time.perf_counter()
+
+            previous = self.detector.swap_model(bundle)
+            swapped = time.perf_counter()
+
+            self.swap_history.append({
+                'from_version': previous.version if previous else None,
+                'to_version': version,
+                'load_seconds': loaded - started,
+                'warmup_seconds': warmed - loaded,
+                'swap_ms': (swapped - warmed) * 1000,
+                'completed_at': datetime.now().isoformat()
+            })
+            self.last_error = None
+            self.detector.logger.info(f"🔁 Modèle basculé vers la version {version}")
+
+        except Exception as e:
+            self.last_error = f"{version}: {e}"
+            self.detector.logger.error(f"❌ Échec de la bascule vers {version}: {e}")
+        finally:
+            self.pending_version = None
+            self._swap_lock.release()
+
+    def get_statistics(self):
+        """Version active, bascule en cours et durées des dernières bascules"""
+        active = self.detector.active_model
+        return {
+            'active_version': active.version if active else None,
+            'active_loaded_at': active.loaded_at if active else None,
+            'pending_version': self.pending_version,
+            'available_versions': list(self.list_versions()),
+            'last_swap': self.swap_history[-1] if self.swap_history else None,
+            'swap_history': list(self.swap_history),
+            'last_error': self.last_error
+        }
@@ -0,0 +1,61 @@
+"""
+Export du modèle DistilBERT de détection d'attaques vers ONNX
+
+Usage (depuis backend/):
+    python -m security.onnx_export [chemin_modele] [fichier_sortie.onnx]
+"""
+import os
+import sys
+from pathlib import Path
+
+ONNX_FILENAME = 'model.onnx'
+
+
+def default_onnx_path(model_path):
+    """Chemin ONNX par défaut : à côté des poids du modèle"""
+    return os.path.join(model_path, ONNX_FILENAME)
+
+
+def export_to_onnx(model_path, output_path=None, opset_version=14):
+    """Exporte le modèle HuggingFace en graphe ONNX (batch et longueur dynamiques)"""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    output_path = output_path or default_onnx_path(model_path)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+
+    sample = tokenizer(
+        ["User 1 from 127.0.0.1 in Unknown. Login failed"],
+        return_tensors="pt",
+        truncation=True,
+        padding=True,
+        max_length=256
+    )
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample['input_ids'], sample['attention_mask']),
+            output_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=opset_version
+        )
+
+    print(f"✅ Modèle exporté en ONNX: {output_path}")
+    return output_path
+
+
+if __name__ == '__main__':
+    default_model = Path(__file__).resolve().parent.parent.parent / 'models' / 'distilbert_attack_detector'
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else str(default_model)
+    output = sys.argv[2] if len(sys.argv) > 2 else None
+    export_to_onnx(model_dir, output)
@@ -0,0 +1,115 @@
+"""
+Rapport de parité fp32 / INT8 du détecteur DistilBERT
+
+Compare le modèle fp32 et sa copie quantifiée dynamiquement (INT8) sur un jeu
+de logs de test (CSV au format RBA ou JSONL de dictionnaires de log) :
+accord des décisions, écart des probabilités, métriques vs labels, latence
+et taille des poids.
+
+Usage (depuis backend/):
+    python -m security.quantization_report <logs.csv|logs.jsonl> [rapport.json]
+"""
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+from security.log_sets import attack_label, load_log_set
+
+
+def _model_size_mb(model):
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def _score(detector, texts, batch_size):
+    start = time.perf_counter()
+    predictions = detector.bert_predict_batch(texts, chunk_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return [p['probability_attack'] for p in predictions], elapsed
+
+
+def _classification_metrics(probabilities, labels, threshold):
+    pairs = [(p > threshold, y) for p, y in zip(probabilities, labels) if y is not None]
+    if not pairs:
+        return None
+
+    tp = sum(1 for pred, y in pairs if pred and y)
+    fp = sum(1 for pred, y in pairs if pred and not y)
+    fn = sum(1 for pred, y in pairs if not pred and y)
+    tn = sum(1 for pred, y in pairs if not pred and not y)
+    precision = tp / max(1, tp + fp)
+    recall = tp / max(1, tp + fn)
+
+    return {
+        'accuracy': (tp + tn) / len(pairs),
+        'precision': precision,
+        'recall': recall,
+        'f1': 2 * precision * recall / max(1e-12, precision + recall),
+        'labelled_events': len(pairs)
+    }
+
+
+def build_parity_report(model_path, entries, threshold=0.5, batch_size=32):
+    """Calcule le rapport de parité entre le modèle fp32 et le modèle INT8"""
+    from security.attack_detector import FixedAttackDetector
+
+    fp32 = FixedAttackDetector(model_path, threshold=threshold, cache_size=0)
+    int8 = FixedAttackDetector(model_path, threshold=threshold, cache_size=0, quantization='int8')
+    if not (fp32._load_model_if_needed() and int8._load_model_if_needed()):
+        raise RuntimeError(f"Impossible de charger le modèle: {model_path}")
+
+    texts = [fp32.prepare_text_for_bert(entry) for entry in entries]
+    labels = [attack_label(entry) for entry in entries]
+
+    # Passage de chauffe pour ne pas mesurer l'initialisation
+    fp32.bert_predict_batch(texts[:batch_size], chunk_size=batch_size)
+    int8.bert_predict_batch(texts[:batch_size], chunk_size=batch_size)
+
+    fp32_probs, fp32_time = _score(fp32, texts, batch_size)
+    int8_probs, int8_time = _score(int8, texts, batch_size)
+
+    diffs = [abs(a - b) for a, b in zip(fp32_probs, int8_probs)]
+    agreements = sum(1 for a, b in zip(fp32_probs, int8_probs) if (a > threshold) == (b > threshold))
+    count = max(1, len(texts))
+
+    return {
+        'model_path': str(model_path),
+        'events': len(texts),
+        'threshold': threshold,
+        'decision_agreement': agreements / count,
+        'decision_flips': len(texts) - agreements,
+        'mean_abs_probability_diff': sum(diffs) / count,
+        'max_abs_probability_diff': max(diffs) if diffs else 0.0,
+        'fp32': {
+            'metrics': _classification_metrics(fp32_probs, labels, threshold),
+            'ms_per_event': fp32_time * 1000 / count,
+            'weights_mb': _model_size_mb(fp32.model)
+        },
+        'int8': {
+            'metrics': _classification_metrics(int8_probs, labels, threshold),
+            'ms_per_event': int8_time * 1000 / count,
+            'weights_mb': _model_size_mb(int8.model)
+        },
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    default_model = Path(__file__).resolve().parent.parent.parent / 'models' / 'distilbert_attack_detector'
+    log_entries = load_log_set(sys.argv[1])
+    report = build_parity_report(str(default_model), log_entries)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if len(sys.argv) > 2:
+        Path(sys.argv[2]).write_text(output, encoding='utf-8')
+        print(f"✅ Rapport de parité écrit: {sys.argv[2]}")
+    print(output)
@@ -3,11 +3,14 @@ import csv
 import logging
 from datetime import datetime
 from pathlib import Path
-import requests
-import user_agents
-from flask import request
+from flask import request, g, has_request_context
 import hashlib
+import threading
 from collections import deque
+from security.log_pipeline import get_log_pipeline
+from security.geoip import LocalGeoProvider
+from security.ua_parser import UserAgentParser, device_type
+from security.geo_enrichment import GEO_NOT_FOUND, GEO_PENDING, GEO_RESOLVED, GeoEnricher, IpApiBackend
 
 class SecurityLogger:
     def __init__(self, log_file='security_logs.json', csv_file='security_logs.csv'):
@@ -25,22 +28,70 @@ class SecurityLogger:
         self.stats_cache = None
         self.last_stats_update = None
         
+        # ✅ Enrichissement client (UA + géo) mémoïsé par requête sur flask.g
+        self._client_info_lock = threading.Lock()
+        self.client_info_stats = {
+            'enrichments': 0,
+            'request_hits': 0,
+            'max_enrichments_per_request': 0
+        }
+        
+        # ✅ Géolocalisation locale (base GeoIP hors ligne), API en ligne en dernier recours
+        self.geo_provider = None
+        self.geo_online_lookup = True
+        self.geo_enricher = None
+        
+        # ✅ Cache LRU+TTL du parsing User-Agent (peu de chaînes distinctes en pratique)
+        self.ua_parser = UserAgentParser()
+        
         self.setup_logging()
         
     def setup_logging(self):
         """Configuration du système de logging"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(self.logs_dir / 'security_events.log', encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        # ✅ Même comportement que basicConfig (logger racine, si non configuré) mais
+        # fichier et console écrits par le thread du pipeline, hors thread de requête
+        self.log_pipeline = get_log_pipeline()
+        root = logging.getLogger()
+        if not root.handlers:
+            root.setLevel(logging.INFO)
+            root.addHandler(self.log_pipeline.handler('security', self.logs_dir / 'security_events.log'))
         self.logger = logging.getLogger('security')
         
+        # Résumés « interface » : console seulement (remplace print)
+        self.console = logging.getLogger('security.console')
+        self.console.setLevel(logging.INFO)
+        if not self.console.handlers:
+            self.console.addHandler(self.log_pipeline.handler('console'))
+        self.console.propagate = False
+        
     def get_client_info(self):
-        """Récupère les informations du client"""
+        """Récupère les informations du client (une seule fois par requête Flask)"""
+        if not has_request_context():
+            return self._compute_client_info()
+        
+        client_info = g.get('security_client_info')
+        if client_info is not None:
+            with self._client_info_lock:
+                self.client_info_stats['request_hits'] += 1
+            return client_info
+        
+        client_info = self._compute_client_info()
+        g.security_client_info = client_info
+        return client_info
+    
+    def _compute_client_info(self):
+        """Enrichissement complet: IP, parsing User-Agent, géolocalisation"""
+        # Compté à chaque calcul, mémo ou non: un second enrichissement dans
+        # la même requête (appel direct, mémo contourné) apparaît dans le maximum
+        enrichments = None
+        if has_request_context():
+            enrichments = g.security_client_info_enrichments = g.get('security_client_info_enrichments', 0) + 1
+        with self._client_info_lock:
+            self.client_info_stats['enrichments'] += 1
+            if enrichments is not None:
+                self.client_info_stats['max_enrichments_per_request'] = max(
+                    self.client_info_stats['max_enrichments_per_request'], enrichments
+                )
         try:
             # Adresse IP (gère les proxies)
             if request.headers.get('X-Forwarded-For'):
@@ -53,8 +104,8 @@ class SecurityLogger:
             # User Agent
             user_agent_str = request.headers.get('User-Agent', 'Unknown')
             
-            # Parse User Agent
-            ua = user_agents.parse(user_agent_str)
+            # Parse User Agent (cache par chaîne brute)
+            ua_info = self.ua_parser.parse(user_agent_str)
             
             # Géolocalisation (simplifiée)
             geo_info = self.get_geo_info(ip)
@@ -68,10 +119,11 @@ class SecurityLogger:
                 'region': geo_info.get('region', 'Unknown'),
                 'city': geo_info.get('city', 'Unknown'),
                 'asn': geo_info.get('asn', 0),
+                'geo_status': geo_info.get('geo_status', GEO_RESOLVED),
                 'user_agent_string': user_agent_str,
-                'os_name_version': f"{ua.os.family} {ua.os.version_string}",
-                'browser_name_version': f"{ua.browser.family} {ua.browser.version_string}",
-                'device_type': self.get_device_type(ua),
+                'os_name_version': ua_info['os_name_version'],
+                'browser_name_version': ua_info['browser_name_version'],
+                'device_type': ua_info['device_type'],
                 'round_trip_time': rtt,
                 'timestamp': int(datetime.now().timestamp() * 1000),
                 'human_timestamp': datetime.now().isoformat()
@@ -80,27 +132,57 @@ class SecurityLogger:
             self.logger.error(f"Erreur récupération info client: {e}")
             return self.get_fallback_client_info()
     
+    def get_client_info_stats(self):
+        """Compteurs d'enrichissement (max_enrichments_per_request doit rester à 1)"""
+        with self._client_info_lock:
+            stats = self.client_info_stats.copy()
+        stats['reuse_ratio'] = stats['request_hits'] / max(1, stats['enrichments'] + stats['request_hits'])
+        stats['geoip'] = self.geo_provider.get_statistics() if self.geo_provider else {'available': False}
+        stats['geo_online_lookup'] = self.geo_online_lookup
+        stats['user_agent_cache'] = self.ua_parser.get_statistics()
+        stats['geo_enrichment'] = self.geo_enricher.get_statistics() if self.geo_enricher else {'enabled': False}
+        return stats
+    
+    def configure_geoip(self, db_path, online_lookup=True, check_interval_seconds=60):
+        """Active la base GeoIP locale (python -m security.geoip build ...)"""
+        self.geo_provider = LocalGeoProvider(db_path, check_interval_seconds)
+        self.geo_online_lookup = online_lookup
+        if self.geo_provider.available:
+            self.logger.info(f"Base GeoIP locale chargée: {db_path}")
+        return self.geo_provider.available
+    
+    def configure_geo_enrichment(self, backend=None, **options):
+        """Géolocalisation en ligne en arrière-plan (backend par défaut: ip-api.com)"""
+        self.geo_enricher = GeoEnricher(backend or IpApiBackend(), **options)
+        return self.geo_enricher
+    
     def get_geo_info(self, ip):
-        """Récupère les informations géographiques (version simplifiée)"""
+        """Récupère les informations géographiques (base locale, puis API si autorisée)"""
         try:
             if ip in ['127.0.0.1', 'localhost', '0.0.0.0']:
                 return {'country': 'Local', 'region': 'Local', 'city': 'Local', 'asn': 0}
             
-            # Tentative de géolocalisation basique
-            if not ip.startswith('192.168.') and not ip.startswith('10.'):
-                try:
-                    # API gratuite pour test - limiter les appels
-                    response = requests.get(f'http://ip-api.com/json/{ip}?fields=country,regionName,city,as', timeout=2)
-                    if response.status_code == 200:
-                        data = response.json()
-                        return {
-                            'country': data.get('country', 'Unknown'),
-                            'region': data.get('regionName', 'Unknown'),
-                            'city': data.get('city', 'Unknown'),
-                            'asn': data.get('as', 0)
-                        }
-                except:
-                    pass
+            if self.geo_provider is not None:
+                geo_info = self.geo_provider.lookup(ip)
+                if geo_info is not None:
+                    return geo_info
+            
+            if not self.geo_online_lookup or ip.startswith('192.168.') or ip.startswith('10.'):
+                return {'country': 'Unknown', 'region': 'Unknown', 'city': 'Unknown', 'asn': 0,
+                        'geo_status': GEO_NOT_FOUND}
+            
+            # ✅ Résolution en arrière-plan: la requête n'attend jamais le réseau
+            if self.geo_enricher is not None:
+                status, geo_info = self.geo_enricher.lookup(ip)
+                return {**geo_info, 'geo_status': status}
+            
+            # Sans enrichissement en arrière-plan: appel synchrone (API gratuite, timeout 2s)
+            try:
+                geo_info = IpApiBackend(timeout_seconds=2)(ip)
+                if geo_info is not None:
+                    return geo_info
+            except Exception:
+                pass
             
             return {
                 'country': 'Unknown',
@@ -111,18 +193,13 @@ class SecurityLogger:
         except:
             return {'country': 'Unknown', 'region': 'Unknown', 'city': 'Unknown', 'asn': 0}
     
+    def configure_user_agent_cache(self, max_entries=1024, ttl_seconds=3600):
+        """Dimensionne le cache du parsing User-Agent (0 = désactivé)"""
+        self.ua_parser = UserAgentParser(max_entries, ttl_seconds)
+    
     def get_device_type(self, ua):
         """Détermine le type d'appareil"""
-        if ua.is_mobile:
-            return 'mobile'
-        elif ua.is_tablet:
-            return 'tablet'
-        elif ua.is_pc:
-            return 'desktop'
-        elif ua.is_bot:
-            return 'bot'
-        else:
-            return 'unknown'
+        return device_type(ua)
     
     def estimate_rtt(self):
         """Estime le temps de réponse (simplifié)"""
@@ -145,10 +222,11 @@ class SecurityLogger:
             'human_timestamp': datetime.now().isoformat()
         }
     
-    def log_login_attempt(self, user_id, email, successful, failure_reason=None, is_attack_ip=False, is_account_takeover=False, attack_detection_result=None):
-        """Log une tentative de connexion - version améliorée"""
+    def log_login_attempt(self, user_id, email, successful, failure_reason=None, is_attack_ip=False, is_account_takeover=False, attack_detection_result=None, client_info=None):
+        """Log une tentative de connexion - version améliorée (client_info: déjà calculé par l'appelant)"""
         try:
-            client_info = self.get_client_info()
+            if client_info is None:
+                client_info = self.get_client_info()
             
             log_entry = {
                 **client_info,
@@ -171,15 +249,22 @@ class SecurityLogger:
                     'bert_used': attack_detection_result.get('bert_used', False)
                 }
             
-            # Sauvegarde JSON
-            self.save_json_log(log_entry)
-            
-            # Sauvegarde CSV
-            self.save_csv_log(log_entry)
-            
             # ✅ Stocker en mémoire pour l'interface
             self.recent_logs.append(log_entry)
             
+            # ✅ Géolocalisation en cours: l'entrée est complétée à la résolution puis
+            # écrite (JSON / CSV) - les fichiers ne gardent jamais le pays provisoire.
+            # Une entrée encore en attente à l'arrêt du serveur n'est pas écrite.
+            deferred = (
+                log_entry.get('geo_status') == GEO_PENDING and self.geo_enricher is not None
+                and self.geo_enricher.when_resolved(
+                    log_entry['ip_address'],
+                    lambda ip, status, geo_info: self.backfill_geo(log_entry, status, geo_info)
+                )
+            )
+            if not deferred:
+                self.save_log_files(log_entry)
+            
             # ✅ Invalider le cache des stats
             self.stats_cache = None
             
@@ -198,10 +283,27 @@ class SecurityLogger:
             self.logger.error(f"Erreur logging tentative connexion: {e}")
             return None
     
+    def backfill_geo(self, log_entry, status, geo_info):
+        """Complète une entrée en attente de géolocalisation puis l'écrit dans les fichiers"""
+        log_entry.update(geo_info)
+        log_entry['geo_status'] = status
+        self.stats_cache = None
+        self.save_log_files(log_entry)
+        if status == GEO_RESOLVED:
+            self.logger.info(
+                f"GEO_BACKFILL - Log:{log_entry['log_id']} - IP:{log_entry['ip_address']} - "
+                f"Country:{log_entry['country']}"
+            )
+    
     def anonymize_user_id(self, user_id):
         """Anonymise l'ID utilisateur pour la privacy"""
         return hashlib.sha256(str(user_id).encode()).hexdigest()[:16]
     
+    def save_log_files(self, log_entry):
+        """Sauvegarde JSON + CSV d'une entrée complète"""
+        self.save_json_log(log_entry)
+        self.save_csv_log(log_entry)
+    
     def save_json_log(self, log_entry):
         """Sauvegarde en format JSON"""
         try:
@@ -219,6 +321,8 @@ class SecurityLogger:
             with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
                 # Créer une copie sans nested dict pour CSV
                 csv_entry = log_entry.copy()
+                # Colonnes stables: le statut de géolocalisation reste dans le JSON
+                csv_entry.pop('geo_status', None)
                 if 'attack_detection' in csv_entry:
                     csv_entry['is_attack'] = csv_entry['attack_detection'].get('is_attack', False)
                     csv_entry['attack_confidence'] = csv_entry['attack_detection'].get('confidence', 0)
@@ -256,7 +360,9 @@ class SecurityLogger:
         if 'attack_detection' in log_entry and log_entry['attack_detection'].get('is_attack', False):
             attack_status = f" | 🚨 ATTACK: {log_entry['attack_detection']['attack_type']}"
         
-        print(f"[{log_entry['human_timestamp']}] {status} - {log_entry['email']} from {log_entry['ip_address']} ({log_entry['country']}){attack_status}")
+        self.console.info(
+            f"{status} - {log_entry['email']} from {log_entry['ip_address']} ({log_entry['country']}){attack_status}"
+        )
     
     def detect_anomalies(self, log_entry):
         """Détection basique d'anomalies"""
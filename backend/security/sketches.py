@@ -0,0 +1,283 @@
+import hashlib
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from security.concurrency import stripe_index
+
+
+def hash64(value):
+    """Hachage 64 bits stable (indépendant de PYTHONHASHSEED)"""
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class HyperLogLog:
+    """Compteur de valeurs distinctes à mémoire fixe (2^precision registres d'un octet)
+
+    Erreur relative ~1.04 / sqrt(2^precision) ; correction par comptage
+    linéaire pour les petites cardinalités (cas le plus fréquent).
+    """
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision=8):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add_hash(self, hashed):
+        index = hashed & ((1 << self.precision) - 1)
+        remaining = hashed >> self.precision
+        rank = 1
+        max_rank = 64 - self.precision + 1
+        while rank < max_rank and not remaining & 1:
+            remaining >>= 1
+            rank += 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Union (nouvel objet) de deux compteurs de même précision"""
+        merged = HyperLogLog(self.precision)
+        merged.registers = bytearray(map(max, self.registers, other.registers))
+        return merged
+
+    def estimate(self):
+        m = len(self.registers)
+        zeros = self.registers.count(0)
+        if zeros == m:
+            return 0.0
+
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return raw
+
+
+class CountMinSketch:
+    """Fréquences approximatives (sur-estimation bornée) en mémoire fixe width x depth
+
+    L'erreur croît avec le total N des ajouts (<= e * N / width avec forte
+    probabilité): une clé jamais vue peut être estimée à plusieurs dizaines
+    pendant une campagne. estimate_hash retranche donc le bruit moyen par
+    case (N / width) et ne garde que l'excédent.
+    """
+
+    def __init__(self, width=4096, depth=4):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+
+    def _indexes(self, hashed):
+        # Double hachage: h1 + i * h2
+        h1 = hashed & 0xFFFFFFFF
+        h2 = (hashed >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add_hash(self, hashed, count=1):
+        self.total += count
+        for row, index in zip(self.rows, self._indexes(hashed)):
+            row[index] += count
+
+    def raw_estimate_hash(self, hashed):
+        return min(row[index] for row, index in zip(self.rows, self._indexes(hashed)))
+
+    def noise(self):
+        """Collisions attendues par case (N / width)"""
+        return self.total / self.width
+
+    def estimate_hash(self, hashed):
+        """Estimation corrigée du bruit de collision (0 pour une clé jamais vue)"""
+        return max(0, round(self.raw_estimate_hash(hashed) - self.noise()))
+
+    def size_bytes(self):
+        return self.width * self.depth * 4
+
+
+# Un Count-Min par type de clé: les IP ne gonflent pas le bruit des comptes
+KEY_KINDS = ('ip', 'account')
+
+
+class _Generation:
+    """Sketches d'une tranche de temps (remplacée d'un bloc à la rotation)"""
+
+    def __init__(self, cms_width, cms_depth):
+        self.distinct = OrderedDict()
+        self.attempts = {kind: CountMinSketch(cms_width, cms_depth) for kind in KEY_KINDS}
+        self.failures = {kind: CountMinSketch(cms_width, cms_depth) for kind in KEY_KINDS}
+
+
+class _SketchShard:
+    """Bande de SketchTracker: générations, verrou et horloge de rotation propres"""
+
+    def __init__(self, window_seconds, max_keys, precision, cms_width, cms_depth):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.precision = precision
+        self.cms_width = cms_width
+        self.cms_depth = cms_depth
+
+        self.lock = threading.Lock()
+        self.current = _Generation(cms_width, cms_depth)
+        self.previous = None
+        self.rotated_at = time.time()
+        self.stats = {'rotations': 0, 'lru_evictions': 0}
+
+    def _maybe_rotate(self, now):
+        if now - self.rotated_at >= self.window_seconds:
+            self.previous = self.current
+            self.current = _Generation(self.cms_width, self.cms_depth)
+            self.rotated_at = now
+            self.stats['rotations'] += 1
+
+    def record(self, key, key_hash, other_hash, success, now):
+        """Tentative pour une clé: valeur distincte associée (other_hash) + fréquences"""
+        with self.lock:
+            self._maybe_rotate(now)
+            generation = self.current
+            if other_hash is not None:
+                table = generation.distinct
+                counter = table.get(key)
+                if counter is None:
+                    counter = HyperLogLog(self.precision)
+                    table[key] = counter
+                    if len(table) > self.max_keys:
+                        table.popitem(last=False)
+                        self.stats['lru_evictions'] += 1
+                else:
+                    table.move_to_end(key)
+                counter.add_hash(other_hash)
+
+            kind = key[0]
+            generation.attempts[kind].add_hash(key_hash)
+            if not success:
+                generation.failures[kind].add_hash(key_hash)
+
+    def estimates(self, key, key_hash, now):
+        """(valeurs distinctes, tentatives, échecs) sur la génération courante + précédente"""
+        kind = key[0]
+        with self.lock:
+            self._maybe_rotate(now)
+            generations = [g for g in (self.current, self.previous) if g is not None]
+            counters = [g.distinct[key] for g in generations if key in g.distinct]
+            attempts = sum(g.attempts[kind].estimate_hash(key_hash) for g in generations)
+            failures = sum(g.failures[kind].estimate_hash(key_hash) for g in generations)
+
+        if not counters:
+            distinct = 0
+        elif len(counters) == 1:
+            distinct = round(counters[0].estimate())
+        else:
+            distinct = round(counters[0].merge(counters[1]).estimate())
+        return distinct, attempts, failures
+
+
+class SketchTracker:
+    """Détection de credential stuffing distribué par sketches probabilistes
+
+    - HyperLogLog par utilisateur: nombre d'IP distinctes (un compte, beaucoup d'IP)
+    - HyperLogLog par IP: nombre de comptes distincts (une IP, beaucoup de comptes)
+    - Count-Min Sketch: tentatives et échecs par IP / par compte (un sketch
+      par type de clé, estimations diminuées du bruit N / width)
+
+    Fenêtre glissante par deux générations : les estimations couvrent la
+    génération courante et la précédente, la rotation jette la plus ancienne
+    en O(1). Le nombre de HLL par génération est plafonné (LRU), la mémoire
+    totale est donc fixe.
+
+    Les clés (IP ou compte) sont réparties sur `stripes` bandes ayant chacune
+    son verrou, ses HLL et ses Count-Min pleine largeur: une bande ne voit
+    qu'environ 1 / stripes des tentatives, son bruit N / width aussi.
+    """
+
+    def __init__(self, window_seconds=3600, max_keys=50000, precision=8, cms_width=4096, cms_depth=4,
+                 stripes=16):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.precision = precision
+        self.cms_width = cms_width
+        self.cms_depth = cms_depth
+
+        # Chaque bande porte des clés IP et compte: plafond LRU de 2 x max_keys / stripes
+        self.shards = [
+            _SketchShard(window_seconds, -(-2 * max_keys // stripes), precision, cms_width, cms_depth)
+            for _ in range(stripes)
+        ]
+
+    def _shard(self, key):
+        return self.shards[stripe_index(key, len(self.shards))]
+
+    def record(self, ip_address, account, success, now=None):
+        """Enregistre une tentative (account = email du compte)"""
+        now = time.time() if now is None else now
+        ip_hash = hash64(f"ip:{ip_address}") if ip_address else None
+        account_hash = hash64(f"account:{account}") if account else None
+
+        if ip_hash is not None:
+            key = ('ip', ip_address)
+            self._shard(key).record(key, ip_hash, account_hash, success, now)
+        if account_hash is not None:
+            key = ('account', account)
+            self._shard(key).record(key, account_hash, ip_hash, success, now)
+
+    def snapshot(self, ip_address, account, now=None):
+        """Estimations pour une IP et un compte (tentatives précédentes)"""
+        now = time.time() if now is None else now
+        ip_estimates = account_estimates = (0, 0, 0)
+        if ip_address:
+            key = ('ip', ip_address)
+            ip_estimates = self._shard(key).estimates(key, hash64(f"ip:{ip_address}"), now)
+        if account:
+            key = ('account', account)
+            account_estimates = self._shard(key).estimates(key, hash64(f"account:{account}"), now)
+
+        return {
+            'ip_distinct_accounts': ip_estimates[0],
+            'account_distinct_ips': account_estimates[0],
+            'ip_attempts_estimate': ip_estimates[1],
+            'ip_failures_estimate': ip_estimates[2],
+            'account_attempts_estimate': account_estimates[1],
+            'account_failures_estimate': account_estimates[2]
+        }
+
+    def get_statistics(self):
+        dense = 1 << self.precision
+        tracked = {'ip': 0, 'account': 0}
+        recorded = dict.fromkeys(KEY_KINDS, 0)
+        hll_count = cms_bytes = rotations = lru_evictions = 0
+        for shard in self.shards:
+            with shard.lock:
+                generations = [g for g in (shard.current, shard.previous) if g is not None]
+                for kind, _ in shard.current.distinct:
+                    tracked[kind] += 1
+                hll_count += sum(len(g.distinct) for g in generations)
+                for kind in KEY_KINDS:
+                    recorded[kind] += sum(g.attempts[kind].total for g in generations)
+                cms_bytes += sum(
+                    sketch.size_bytes()
+                    for g in generations for sketch in (*g.attempts.values(), *g.failures.values())
+                )
+                rotations = max(rotations, shard.stats['rotations'])
+                lru_evictions += shard.stats['lru_evictions']
+
+        max_cms_bytes = sum(2 * 2 * len(KEY_KINDS) * s.cms_width * s.cms_depth * 4 for s in self.shards)
+        return {
+            'window_seconds': self.window_seconds,
+            'stripes': len(self.shards),
+            'tracked_accounts': tracked['account'],
+            'tracked_ips': tracked['ip'],
+            'rotations': rotations,
+            'lru_evictions': lru_evictions,
+            # Tentatives dans la fenêtre (exact): le bruit des Count-Min en découle
+            'recorded_attempts': recorded,
+            'hll_relative_error': 1.04 / math.sqrt(dense),
+            'approx_bytes': hll_count * (dense + HLL_OVERHEAD_BYTES) + cms_bytes,
+            'max_bytes': 2 * 2 * self.max_keys * (dense + HLL_OVERHEAD_BYTES) + max_cms_bytes
+        }
+
+
+# Objet HyperLogLog + en-tête du bytearray + entrée du dictionnaire ordonné
+HLL_OVERHEAD_BYTES = 250
@@ -0,0 +1,82 @@
+import math
+from collections import deque
+
+
+class TimingWheel:
+    """Roue temporelle à un niveau pour l'expiration incrémentale de clés
+
+    Chaque clé est rangée dans le créneau de sa date d'expiration
+    (résolution `resolution_seconds`, horizon `horizon_seconds`). Avancer la
+    roue ne touche que les créneaux écoulés ; les clés échues sont rendues
+    par petits lots (`pop_due`) pour que l'appelant re-vérifie leur état et
+    les replanifie si besoin.
+    """
+
+    def __init__(self, horizon_seconds, resolution_seconds=1.0):
+        self.resolution = resolution_seconds
+        self.num_slots = int(math.ceil(horizon_seconds / resolution_seconds)) + 2
+        # Créneaux créés à la demande: une roue vide ne coûte qu'une liste
+        self.slots = [None] * self.num_slots
+        self.scheduled = {}
+        self.cursor = None
+        self._due = deque()
+
+    def _tick(self, timestamp):
+        return int(math.ceil(timestamp / self.resolution))
+
+    def is_scheduled(self, key):
+        return key in self.scheduled
+
+    def schedule(self, key, expires_at):
+        """Planifie l'expiration d'une clé (sans effet si elle l'est déjà)"""
+        if key in self.scheduled:
+            return
+        tick = self._tick(expires_at)
+        if self.cursor is not None:
+            # Borné à l'horizon de la roue: la clé sera re-vérifiée plus tôt si besoin
+            tick = min(max(tick, self.cursor + 1), self.cursor + self.num_slots - 1)
+        index = tick % self.num_slots
+        if self.slots[index] is None:
+            self.slots[index] = set()
+        self.slots[index].add(key)
+        self.scheduled[key] = tick
+
+    def cancel(self, key):
+        tick = self.scheduled.pop(key, None)
+        if tick is not None:
+            index = tick % self.num_slots
+            self.slots[index].discard(key)
+            if not self.slots[index]:
+                self.slots[index] = None
+
+    def advance(self, now):
+        """Déplace les clés des créneaux écoulés vers la file des échéances"""
+        current = self._tick(now) - 1
+        if self.cursor is None:
+            self.cursor = current
+            return
+        if current <= self.cursor:
+            return
+
+        start = max(self.cursor + 1, current - self.num_slots + 1)
+        for tick in range(start, current + 1):
+            index = tick % self.num_slots
+            if self.slots[index] is not None:
+                self._due.extend(self.slots[index])
+                self.slots[index] = None
+        self.cursor = current
+
+    def pop_due(self, budget):
+        """Rend au plus `budget` clés échues (retirées de la planification)"""
+        keys = []
+        while self._due and len(keys) < budget:
+            key = self._due.popleft()
+            if self.scheduled.pop(key, None) is not None:
+                keys.append(key)
+        return keys
+
+    def pending_due(self):
+        return len(self._due)
+
+    def __len__(self):
+        return len(self.scheduled)
@@ -0,0 +1,108 @@
+"""
+Parsing des User-Agent avec cache LRU+TTL
+
+`user_agents.parse` enchaîne un grand nombre d'expressions régulières,
+alors que le trafic ne présente qu'une poignée de chaînes distinctes : le
+résultat dérivé (OS, navigateur, type d'appareil) est mis en cache par
+chaîne brute.
+
+Ré-enrichissement hors ligne de logs historiques (depuis backend/):
+    python -m security.ua_parser <security_logs.json|.csv> [sortie]
+"""
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+import user_agents
+
+from security.lru_cache import LRUTTLCache
+
+
+def device_type(ua):
+    """Détermine le type d'appareil"""
+    if ua.is_mobile:
+        return 'mobile'
+    elif ua.is_tablet:
+        return 'tablet'
+    elif ua.is_pc:
+        return 'desktop'
+    elif ua.is_bot:
+        return 'bot'
+    else:
+        return 'unknown'
+
+
+class UserAgentParser:
+    """Champs dérivés d'un User-Agent, mis en cache par chaîne brute"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600):
+        self.cache = LRUTTLCache(max_entries, ttl_seconds) if max_entries > 0 else None
+
+    def parse(self, user_agent_str):
+        """{'os_name_version', 'browser_name_version', 'device_type'} (dictionnaire partagé: lecture seule)"""
+        if self.cache is not None:
+            parsed = self.cache.get(user_agent_str)
+            if parsed is not None:
+                return parsed
+
+        ua = user_agents.parse(user_agent_str)
+        parsed = {
+            'os_name_version': f"{ua.os.family} {ua.os.version_string}",
+            'browser_name_version': f"{ua.browser.family} {ua.browser.version_string}",
+            'device_type': device_type(ua)
+        }
+        if self.cache is not None:
+            self.cache.put(user_agent_str, parsed)
+        return parsed
+
+    def get_statistics(self):
+        if self.cache is None:
+            return {'enabled': False}
+        stats = self.cache.get_statistics()
+        stats['enabled'] = True
+        return stats
+
+
+def reenrich_file(source, output=None, parser=None):
+    """Recalcule les champs User-Agent d'un fichier de logs (JSONL ou CSV) ; retourne (nombre d'entrées, fichier écrit)"""
+    source = Path(source)
+    output = Path(output) if output else source.with_name(f"{source.stem}_reenriched{source.suffix}")
+    parser = parser or UserAgentParser(max_entries=65536, ttl_seconds=float('inf'))
+
+    with open(source, newline='', encoding='utf-8') as f:
+        if source.suffix == '.csv':
+            entries = list(csv.DictReader(f))
+        else:
+            entries = [json.loads(line) for line in f if line.strip()]
+
+    for entry in entries:
+        user_agent_str = entry.get('user_agent_string')
+        if user_agent_str and user_agent_str != 'Unknown':
+            entry.update(parser.parse(user_agent_str))
+
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        if source.suffix == '.csv':
+            fieldnames = list(dict.fromkeys(key for entry in entries for key in entry))
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(entries)
+        else:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    return len(entries), output
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    parser = UserAgentParser(max_entries=65536, ttl_seconds=float('inf'))
+    started = time.perf_counter()
+    count, output = reenrich_file(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None, parser)
+    stats = parser.get_statistics()
+    print(f"✅ {count} entrées ré-enrichies en {time.perf_counter() - started:.2f}s: {output}")
+    print(f"   🎯 Cache User-Agent: {stats['size']} chaînes distinctes, taux de hit {stats['hit_rate']:.2%}")
@@ -0,0 +1,285 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from security.concurrency import stripe_index
+from security.timing_wheel import TimingWheel
+
+# Emails distincts retenus au plus par IP (DistinctWindowCounter)
+MAX_DISTINCT_VALUES = 256
+
+
+class SlidingWindowCounter:
+    """Compteur sur fenêtre glissante découpée en seaux (ajout/lecture en O(1) amorti)
+
+    Le total courant est maintenu à jour : avancer dans le temps ne fait que
+    soustraire les seaux sortis de la fenêtre, sans jamais parcourir d'événements.
+    """
+    __slots__ = ('bucket_seconds', 'counts', 'total', 'head')
+
+    def __init__(self, window_seconds, num_buckets=12):
+        self.bucket_seconds = window_seconds / num_buckets
+        self.counts = [0] * num_buckets
+        self.total = 0
+        self.head = None
+
+    def _advance(self, now):
+        index = int(now // self.bucket_seconds)
+        if self.head is None or index - self.head >= len(self.counts):
+            # Fenêtre entièrement expirée
+            for slot in range(len(self.counts)):
+                self.counts[slot] = 0
+            self.total = 0
+        else:
+            for absolute in range(self.head + 1, index + 1):
+                slot = absolute % len(self.counts)
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+        if self.head is None or index > self.head:
+            self.head = index
+
+    def add(self, now, amount=1):
+        self._advance(now)
+        self.counts[self.head % len(self.counts)] += amount
+        self.total += amount
+
+    def value(self, now):
+        self._advance(now)
+        return self.total
+
+
+class DistinctWindowCounter:
+    """Nombre de valeurs distinctes vues sur la fenêtre (ordre de dernière apparition)"""
+    __slots__ = ('window_seconds', 'max_values', 'last_seen')
+
+    def __init__(self, window_seconds, max_values=MAX_DISTINCT_VALUES):
+        self.window_seconds = window_seconds
+        self.max_values = max_values
+        self.last_seen = OrderedDict()
+
+    def _expire(self, now):
+        cutoff = now - self.window_seconds
+        last_seen = self.last_seen
+        while last_seen:
+            value, seen_at = next(iter(last_seen.items()))
+            if seen_at > cutoff:
+                break
+            last_seen.popitem(last=False)
+
+    def add(self, value, now):
+        self.last_seen[value] = now
+        self.last_seen.move_to_end(value)
+        if len(self.last_seen) > self.max_values:
+            self.last_seen.popitem(last=False)
+        self._expire(now)
+
+    def value(self, now):
+        self._expire(now)
+        return len(self.last_seen)
+
+
+class _KeyVelocity:
+    __slots__ = ('attempts', 'failures', 'distinct_emails', 'last_seen')
+
+    def __init__(self, window_seconds, num_buckets, track_emails):
+        self.attempts = SlidingWindowCounter(window_seconds, num_buckets)
+        self.failures = SlidingWindowCounter(window_seconds, num_buckets)
+        self.distinct_emails = DistinctWindowCounter(window_seconds) if track_emails else None
+        self.last_seen = 0.0
+
+
+class _VelocityShard:
+    """Bande du VelocityTracker: tables, roue d'expiration et verrou propres"""
+
+    def __init__(self, window_seconds, num_buckets, max_ips, max_users):
+        self.window_seconds = window_seconds
+        self.num_buckets = num_buckets
+        self.max_keys = {'ip': max_ips, 'user': max_users}
+        self.lock = threading.Lock()
+        self.tables = {'ip': OrderedDict(), 'user': OrderedDict()}
+        self.wheel = TimingWheel(window_seconds)
+        self.stats = {'evicted_keys': 0, 'lru_evictions': 0, 'expiry_steps': 0, 'expiry_seconds': 0.0}
+
+    def _entry(self, kind, key):
+        table = self.tables[kind]
+        entry = table.get(key)
+        if entry is None:
+            entry = _KeyVelocity(self.window_seconds, self.num_buckets, track_emails=(kind == 'ip'))
+            table[key] = entry
+            if len(table) > self.max_keys[kind]:
+                coldest, _ = table.popitem(last=False)
+                self.wheel.cancel((kind, coldest))
+                self.stats['lru_evictions'] += 1
+        else:
+            table.move_to_end(key)
+        return entry
+
+    def expire_step(self, now, budget):
+        """Supprime au plus `budget` clés inactives échues ; retourne le nombre traité (sous verrou)"""
+        started = time.perf_counter()
+        self.wheel.advance(now)
+        due = self.wheel.pop_due(budget)
+        if not due:
+            return 0
+
+        for kind, key in due:
+            table = self.tables[kind]
+            entry = table.get(key)
+            if entry is None:
+                continue
+            if entry.last_seen + self.window_seconds <= now:
+                del table[key]
+                self.stats['evicted_keys'] += 1
+            else:
+                self.wheel.schedule((kind, key), entry.last_seen + self.window_seconds)
+
+        self.stats['expiry_steps'] += 1
+        self.stats['expiry_seconds'] += time.perf_counter() - started
+        return len(due)
+
+    def record(self, kind, key, email, success, now, budget):
+        with self.lock:
+            self.expire_step(now, budget)
+            entry = self._entry(kind, key)
+            entry.attempts.add(now)
+            if not success:
+                entry.failures.add(now)
+            if not success and email and entry.distinct_emails is not None:
+                entry.distinct_emails.add(email, now)
+            entry.last_seen = now
+            self.wheel.schedule((kind, key), now + self.window_seconds)
+
+    def counters(self, kind, key, now):
+        """(tentatives, échecs, emails distincts en échec) d'une clé"""
+        with self.lock:
+            entry = self.tables[kind].get(key)
+            if entry is None:
+                return 0, 0, 0
+            distinct = entry.distinct_emails.value(now) if entry.distinct_emails is not None else 0
+            return entry.attempts.value(now), entry.failures.value(now), distinct
+
+
+class VelocityTracker:
+    """Vitesses de connexion par IP et par compte sur les N dernières secondes
+
+    Par IP: tentatives, échecs et emails distincts en échec (une IP partagée
+    où plusieurs comptes se connectent avec succès n'est pas du credential
+    spraying) ; par compte (email normalisé, connu avant l'authentification):
+    tentatives et échecs. Lecture en temps constant, sans parcourir les
+    historiques d'événements ; les clés inactives expirent par la roue
+    temporelle, quelques-unes à chaque enregistrement. Chaque table est
+    plafonnée (`max_ips`, `max_users`) avec éviction LRU.
+
+    Les clés sont réparties sur `stripes` bandes indépendantes (verrou,
+    tables et roue propres) : deux requêtes sur des IP différentes ne se
+    bloquent pas.
+    """
+
+    def __init__(self, window_seconds=60, num_buckets=12, expire_budget=256,
+                 max_ips=200000, max_users=100000, stripes=16):
+        self.window_seconds = window_seconds
+        self.expire_budget = expire_budget
+        self.max_keys = {'ip': max_ips, 'user': max_users}
+        self.shards = [
+            _VelocityShard(window_seconds, num_buckets, -(-max_ips // stripes), -(-max_users // stripes))
+            for _ in range(stripes)
+        ]
+
+    def _shard(self, kind, key):
+        return self.shards[stripe_index((kind, key), len(self.shards))]
+
+    def record(self, ip_address, account, email, success, now=None):
+        """Enregistre une tentative de connexion (account = email normalisé du compte)"""
+        now = time.time() if now is None else now
+        if ip_address:
+            self._shard('ip', ip_address).record('ip', ip_address, email, success, now, self.expire_budget)
+        if account:
+            self._shard('user', account).record('user', account, None, success, now, self.expire_budget)
+
+    def snapshot(self, ip_address, account, now=None):
+        """Compteurs courants pour une IP et un compte"""
+        now = time.time() if now is None else now
+        ip_attempts, ip_failures, ip_emails = (
+            self._shard('ip', ip_address).counters('ip', ip_address, now) if ip_address else (0, 0, 0)
+        )
+        user_attempts, user_failures, _ = (
+            self._shard('user', account).counters('user', account, now) if account else (0, 0, 0)
+        )
+        return {
+            'ip_attempts': ip_attempts,
+            'ip_failures': ip_failures,
+            'ip_distinct_emails': ip_emails,
+            'user_attempts': user_attempts,
+            'user_failures': user_failures,
+            'window_seconds': self.window_seconds
+        }
+
+    def expire(self, now=None, budget=None):
+        """Tick: supprime les clés inactives par lots en relâchant le verrou de chaque bande"""
+        now = time.time() if now is None else now
+        budget = budget or self.expire_budget
+        processed = 0
+        for shard in self.shards:
+            while True:
+                with shard.lock:
+                    step = shard.expire_step(now, budget)
+                processed += step
+                if step < budget:
+                    break
+        return processed
+
+    def get_statistics(self):
+        totals = {'evicted_keys': 0, 'lru_evictions': 0, 'expiry_steps': 0, 'expiry_seconds': 0.0}
+        tracked_ips = tracked_users = distinct_values = 0
+        for shard in self.shards:
+            with shard.lock:
+                tracked_ips += len(shard.tables['ip'])
+                tracked_users += len(shard.tables['user'])
+                distinct_values += sum(len(entry.distinct_emails.last_seen) for entry in shard.tables['ip'].values())
+                for name in totals:
+                    totals[name] += shard.stats[name]
+
+        return {
+            'window_seconds': self.window_seconds,
+            'stripes': len(self.shards),
+            'tracked_ips': tracked_ips,
+            'tracked_users': tracked_users,
+            'max_ips': self.max_keys['ip'],
+            'max_users': self.max_keys['user'],
+            'evicted_keys': totals['evicted_keys'],
+            'lru_evictions': totals['lru_evictions'],
+            'distinct_emails': distinct_values,
+            'approx_bytes': (
+                tracked_ips * IP_ENTRY_BYTES + tracked_users * USER_ENTRY_BYTES
+                + distinct_values * DISTINCT_VALUE_BYTES
+            ),
+            # Plafond: chaque IP peut retenir MAX_DISTINCT_VALUES emails
+            'max_bytes': (
+                self.max_keys['ip'] * (IP_ENTRY_BYTES + MAX_DISTINCT_VALUES * DISTINCT_VALUE_BYTES)
+                + self.max_keys['user'] * USER_ENTRY_BYTES
+            ),
+            'expiry_steps': totals['expiry_steps'],
+            'expiry_ms': totals['expiry_seconds'] * 1000
+        }
+
+
+def _entry_size(entry):
+    """Taille approximative d'une entrée vide (objet + compteurs + dictionnaire)"""
+    size = sys.getsizeof(entry) + 2 * (sys.getsizeof(entry.attempts) + sys.getsizeof(entry.attempts.counts))
+    if entry.distinct_emails is not None:
+        size += sys.getsizeof(entry.distinct_emails) + sys.getsizeof(entry.distinct_emails.last_seen)
+    return size + 200
+
+
+def _distinct_value_size(max_values=MAX_DISTINCT_VALUES):
+    """Coût d'un email retenu par DistinctWindowCounter (entrée OrderedDict + chaîne + horodatage)"""
+    emails = [f"user{i:06d}@mediconnect.fr" for i in range(max_values)]
+    last_seen = OrderedDict((email, float(i)) for i, email in enumerate(emails))
+    per_entry = (sys.getsizeof(last_seen) - sys.getsizeof(OrderedDict())) / max_values
+    return int(per_entry + sys.getsizeof(emails[0]) + sys.getsizeof(0.0))
+
+
+DISTINCT_VALUE_BYTES = _distinct_value_size()
+IP_ENTRY_BYTES = _entry_size(_KeyVelocity(60, 12, track_emails=True))
+USER_ENTRY_BYTES = _entry_size(_KeyVelocity(60, 12, track_emails=False))
@@ -0,0 +1,126 @@
+"""
+Benchmark mémoire: octets par événement suivi (dictionnaires vs colonnes)
+
+Compare l'ancien stockage (dict + datetime dans recent_events, user_activity
+et ip_activity) au stockage compact (ActivityStore + EventRing) pour le même
+flux d'événements. Échoue (code 1) si la réduction est inférieure à
+MIN_REDUCTION dès 50000 événements ; en deçà, les coûts fixes (bandes,
+tables d'internement) ne sont pas encore amortis.
+
+Usage (depuis la racine du projet):
+    python test/benchmark_event_memory.py [nombre_evenements]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from security.activity_store import ActivityStore
+from security.event_records import EventRing
+
+MIN_REDUCTION = 2.0
+MIN_EVENTS_FOR_ASSERT = 50000
+
+
+def generate_events(count, users=2000, ips=5000, seed=42):
+    """Flux de connexions synthétique (emails / IP / utilisateurs répétés)"""
+    rng = random.Random(seed)
+    ip_pool = [f"10.{i // 256}.{i % 256}.{rng.randrange(1, 255)}" for i in range(ips)]
+    events = []
+    for _ in range(count):
+        user = rng.randrange(users)
+        events.append({
+            'User ID': str(user),
+            'IP Address': rng.choice(ip_pool),
+            'email': f"user{user}@mediconnect.fr",
+            'Login Successful': rng.random() > 0.3
+        })
+    return events
+
+
+def legacy_store(events):
+    """Structures d'origine: un dict (+ datetime) par événement dans trois conteneurs"""
+    recent_events = deque(maxlen=10000)
+    user_activity = defaultdict(lambda: deque(maxlen=50))
+    ip_activity = defaultdict(lambda: deque(maxlen=100))
+
+    for log_data in events:
+        event_data = {
+            'timestamp': datetime.now(),
+            'ip': log_data['IP Address'],
+            'success': log_data['Login Successful'],
+            'email': log_data['email']
+        }
+        user_activity[log_data['User ID']].append(event_data)
+        ip_activity[log_data['IP Address']].append(event_data)
+        recent_events.append(event_data)
+
+    return recent_events, user_activity, ip_activity
+
+
+def compact_store(events):
+    """Structures compactes du détecteur"""
+    recent_events = EventRing(capacity=10000)
+    user_activity = ActivityStore(120, max_events_per_key=50)
+    ip_activity = ActivityStore(120, max_events_per_key=100)
+
+    now = time.time()
+    for log_data in events:
+        timestamp_ms = int(now * 1000)
+        ip_address = log_data['IP Address']
+        email = log_data['email']
+        success = log_data['Login Successful']
+        user_activity.append(log_data['User ID'], timestamp_ms, ip_address, email, success, now=now)
+        ip_activity.append(ip_address, timestamp_ms, ip_address, email, success, now=now)
+        recent_events.append(timestamp_ms, ip_address, email, success)
+
+    return recent_events, user_activity, ip_activity
+
+
+def tracked_events(containers):
+    recent_events, user_activity, ip_activity = containers
+    if isinstance(user_activity, ActivityStore):
+        return len(recent_events) + user_activity.event_count + ip_activity.event_count
+    return (
+        len(recent_events)
+        + sum(len(d) for d in user_activity.values())
+        + sum(len(d) for d in ip_activity.values())
+    )
+
+
+def measure(build, events):
+    """Mémoire retenue par les structures construites (tracemalloc)"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    containers = build(events)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return retained, tracked_events(containers)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    events = generate_events(count)
+
+    print(f"📊 Benchmark mémoire sur {count} événements")
+    results = {}
+    for name, build in (('dict + datetime', legacy_store), ('colonnes compactes', compact_store)):
+        retained, tracked = measure(build, events)
+        results[name] = retained / max(1, tracked)
+        print(f"   {name:<20} {retained / 1024 / 1024:8.2f} Mo  "
+              f"{tracked:>8} événements suivis  {results[name]:7.1f} octets/événement")
+
+    legacy, compact = results.values()
+    reduction = legacy / max(1e-9, compact)
+    if count >= MIN_EVENTS_FOR_ASSERT and reduction < MIN_REDUCTION:
+        print(f"❌ Réduction: x{reduction:.1f} (attendu >= x{MIN_REDUCTION:.1f})")
+        sys.exit(1)
+    print(f"✅ Réduction: x{reduction:.1f}")
@@ -0,0 +1,136 @@
+"""
+Simulation de la géolocalisation en arrière-plan avec un backend local
+
+Vérifie, sans réseau (StaticGeoBackend avec latence simulée):
+- une IP froide répond immédiatement `pending`, puis est complétée par callback
+- les requêtes concurrentes pour une même IP ne font qu'un appel au backend
+- résultats négatifs (IP inconnue, erreur backend) mis en cache
+- un balayage d'IP uniques respecte le budget par seconde (file bornée, excès abandonné)
+
+Usage (depuis la racine du projet):
+    python test/simulate_geo_enrichment.py
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from security.geo_enrichment import (
+    GEO_NOT_FOUND, GEO_PENDING, GEO_RESOLVED, GEO_UNAVAILABLE, GeoEnricher, StaticGeoBackend
+)
+
+PARIS = {'country': 'France', 'region': 'Île-de-France', 'city': 'Paris', 'asn': 'AS3215 Orange'}
+
+
+def check(problems, condition, message):
+    status = "✅" if condition else "❌"
+    print(f"   {status} {message}")
+    if not condition:
+        problems.append(message)
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def scenario_cold_ip(problems):
+    print("🧪 IP froide: réponse immédiate puis complément")
+    backend = StaticGeoBackend({'81.2.3.4': PARIS}, latency_seconds=0.2)
+    enricher = GeoEnricher(backend, workers=2, lookups_per_second=0)
+
+    started = time.perf_counter()
+    status, geo = enricher.lookup('81.2.3.4')
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    check(problems, status == GEO_PENDING and geo['country'] == 'Unknown', f"statut initial {status}")
+    check(problems, elapsed_ms < 5, f"lookup non bloquant ({elapsed_ms:.2f} ms, backend 200 ms)")
+
+    entry = {'ip_address': '81.2.3.4', 'country': 'Unknown', 'geo_status': status}
+    enricher.when_resolved('81.2.3.4', lambda ip, status, geo: entry.update(geo, geo_status=status))
+    check(problems, wait_until(lambda: entry['geo_status'] == GEO_RESOLVED), "entrée complétée par callback")
+    check(problems, entry['country'] == 'France', f"pays complété: {entry['country']}")
+
+    status, geo = enricher.lookup('81.2.3.4')
+    check(problems, status == GEO_RESOLVED and backend.calls == 1, "seconde requête servie par le cache")
+
+
+def scenario_coalescing(problems):
+    print("🧪 Requêtes concurrentes pour la même IP")
+    backend = StaticGeoBackend({'81.2.3.4': PARIS}, latency_seconds=0.1)
+    enricher = GeoEnricher(backend, workers=4, lookups_per_second=0)
+    resolved = []
+
+    def request():
+        enricher.lookup('81.2.3.4')
+        enricher.when_resolved('81.2.3.4', lambda ip, status, geo: resolved.append(status))
+
+    threads = [threading.Thread(target=request) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    check(problems, wait_until(lambda: len(resolved) == 50), f"{len(resolved)}/50 callbacks reçus")
+    check(problems, backend.calls == 1, f"{backend.calls} appel(s) au backend pour 50 requêtes")
+
+
+def scenario_negative_cache(problems):
+    print("🧪 Cache négatif (IP inconnue, erreur backend)")
+    backend = StaticGeoBackend({}, failing_ips={'203.0.113.9'})
+    enricher = GeoEnricher(backend, workers=1, lookups_per_second=0, negative_ttl_seconds=0.3)
+
+    for ip in ('198.51.100.7', '203.0.113.9'):
+        enricher.lookup(ip)
+    check(problems, wait_until(lambda: enricher.get_statistics()['pending'] == 0), "résolutions terminées")
+
+    statuses = [enricher.lookup(ip)[0] for ip in ('198.51.100.7', '203.0.113.9')]
+    check(problems, statuses == [GEO_NOT_FOUND, GEO_NOT_FOUND], f"statuts en cache: {statuses}")
+    check(problems, backend.calls == 2, f"pas de nouvel appel avant le TTL négatif ({backend.calls})")
+
+    time.sleep(0.35)
+    enricher.lookup('198.51.100.7')
+    check(problems, wait_until(lambda: backend.calls == 3), "nouvel essai après expiration du TTL négatif")
+
+
+def scenario_spray(problems, rate=20, duration=1.5):
+    print(f"🧪 Balayage d'IP uniques (budget {rate}/s)")
+    backend = StaticGeoBackend({}, latency_seconds=0.01)
+    enricher = GeoEnricher(backend, workers=4, max_queue_size=50, lookups_per_second=rate)
+
+    started = time.monotonic()
+    statuses = {}
+    latencies_ms = []
+    for index in range(2000):
+        before = time.perf_counter()
+        status, _ = enricher.lookup(f"100.{index // 65536}.{index // 256 % 256}.{index % 256}")
+        latencies_ms.append((time.perf_counter() - before) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+    time.sleep(max(0.0, duration - (time.monotonic() - started)))
+
+    calls = [t - started for t in backend.call_times if t - started <= duration]
+    allowed = enricher.burst + rate * duration + 1
+    check(problems, len(calls) <= allowed, f"{len(calls)} appels en {duration}s (max {allowed:.0f})")
+    check(problems, statuses.get(GEO_UNAVAILABLE, 0) > 0,
+          f"excès abandonné sans bloquer: {statuses.get(GEO_UNAVAILABLE, 0)} IP 'unavailable'")
+    latencies_ms.sort()
+    p99_ms = latencies_ms[int(len(latencies_ms) * 0.99)]
+    check(problems, p99_ms < 1, f"lookup côté requête: p99 {p99_ms:.3f} ms (max {latencies_ms[-1]:.2f} ms)")
+    stats = enricher.get_statistics()
+    print(f"      file={stats['queue_depth']} en attente={stats['pending']} "
+          f"attente budget={stats['throttled_seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    problems = []
+    scenario_cold_ip(problems)
+    scenario_coalescing(problems)
+    scenario_negative_cache(problems)
+    scenario_spray(problems)
+    print("✅ Tous les scénarios passent" if not problems else f"❌ {len(problems)} échec(s)")
+    sys.exit(1 if problems else 0)
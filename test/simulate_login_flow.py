@@ -0,0 +1,224 @@
+"""
+Rejeu du parcours de connexion de /api/login sur le détecteur (mode fallback)
+
+Reproduit les appels du détecteur faits par app.login(): analyse avant
+authentification non comptée (track=False), puis enregistrement de l'issue
+réelle (analyse finale, ou record_login_outcome pour un blocage / un
+utilisateur inconnu). Vérifie:
+- des soignants qui se connectent avec succès depuis une IP partagée ne sont pas bloqués
+- une attaque par force brute sur un compte est bloquée avant l'authentification (429)
+  une fois le seuil d'échecs du compte dépassé, même depuis des IP toutes différentes
+- un credential spraying depuis une IP est bloqué avant l'authentification
+- un lot (process_log_entries) détecte autant d'attaques que le même flux entrée par entrée
+- une IP en cours de géolocalisation n'échappe pas à la pénalité 'pays inconnu':
+  appliquée au backfill (escalade), comme pour une IP non résolue (file pleine)
+- pendant une campagne de stuffing, une IP et un compte jamais vus restent sous les
+  seuils des sketches (bruit du Count-Min retranché)
+
+Usage (depuis la racine du projet):
+    python test/simulate_login_flow.py
+"""
+import contextlib
+import io
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from security.attack_detector import SKETCH_RULES, VELOCITY_RULES, FixedAttackDetector
+
+USERS = {f"soignant{index}@mediconnect.fr": str(index) for index in range(1, 13)}
+PASSWORD = 'Medecin123!'
+
+
+def check(problems, condition, message):
+    status = "✅" if condition else "❌"
+    print(f"   {status} {message}")
+    if not condition:
+        problems.append(message)
+
+
+def make_detector():
+    # Modèle absent: mode fallback (score comportemental seul), seuil de app.py
+    with contextlib.redirect_stdout(io.StringIO()):
+        detector = FixedAttackDetector('/nonexistent', threshold=0.6, cache_size=0)
+    detector.logger.setLevel(logging.ERROR)
+    return detector
+
+
+def client(ip_address):
+    return {
+        'IP Address': ip_address,
+        'Country': 'France',
+        'Browser Name and Version': 'Chrome 120',
+        'OS Name and Version': 'Windows 10',
+        'Device Type': 'desktop'
+    }
+
+
+def login(detector, email, password, ip_address):
+    """Mêmes appels au détecteur que app.login() ; retourne le code HTTP"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        failed = {**client(ip_address), 'email': email, 'Login Successful': False}
+        if detector.process_log_entry(failed, track=False)['is_attack']:
+            detector.update_activity_tracking(failed)
+            return 429
+
+        user_id = USERS.get(email)
+        if user_id is None:
+            detector.update_activity_tracking(failed)
+            return 401
+
+        successful = password == PASSWORD
+        detector.process_log_entry({**failed, 'User ID': user_id, 'Login Successful': successful})
+        return 200 if successful else 401
+
+
+def scenario_shared_ip(problems):
+    print("🧪 Soignants connectés avec succès depuis une IP partagée")
+    detector = make_detector()
+    statuses = [login(detector, email, PASSWORD, '10.20.0.1') for email in USERS]
+    check(problems, statuses.count(200) == len(USERS), f"{statuses.count(200)}/{len(USERS)} connexions acceptées")
+
+    velocity = detector.velocity.snapshot('10.20.0.1', None)
+    check(problems, velocity['ip_attempts'] == len(USERS) and velocity['ip_failures'] == 0,
+          f"une tentative par connexion, aucun échec ({velocity['ip_attempts']}/{velocity['ip_failures']})")
+    sketch = detector.sketches.snapshot('10.20.0.1', None)
+    check(problems, sketch['ip_distinct_accounts'] <= len(USERS),
+          f"comptes distincts estimés: {sketch['ip_distinct_accounts']} pour {len(USERS)} comptes")
+
+
+def scenario_brute_force(problems):
+    print("🧪 Force brute sur un compte")
+    detector = make_detector()
+    statuses = [
+        login(detector, 'soignant1@mediconnect.fr', f"essai{index}", '198.51.100.23') for index in range(10)
+    ]
+    recent = detector.get_recent_attacks(limit=100)
+    limit = next(limit for counter, limit, _, _ in VELOCITY_RULES if counter == 'user_failures')
+    check(problems, statuses.count(200) == 0, f"statuts: {statuses}")
+    check(problems, all(status == 429 for status in statuses[limit:]),
+          f"bloqué (429) après {limit} échecs du compte")
+    check(problems, any(result['login_success'] is False for result in recent),
+          f"{len(recent)} tentative(s) signalée(s) comme attaque")
+
+    # Compte identifié par l'email: visible dès l'analyse avant authentification (sans User ID)
+    sketch = detector.sketches.snapshot(None, 'soignant1@mediconnect.fr')
+    check(problems, sketch['account_failures_estimate'] >= len(statuses),
+          f"échecs estimés pour le compte: {sketch['account_failures_estimate']}")
+
+    # Une IP différente par essai: seuls les compteurs du compte peuvent bloquer
+    detector = make_detector()
+    statuses = [
+        login(detector, 'soignant2@mediconnect.fr', f"essai{index}", f"198.51.100.{index + 1}")
+        for index in range(10)
+    ]
+    check(problems, all(status == 429 for status in statuses[limit:]),
+          f"IP tournantes: {statuses}")
+    analysis = detector.analyze_behavioral_patterns(
+        {**client('198.51.100.99'), 'email': 'Soignant2@MediConnect.fr', 'Login Successful': False}
+    )
+    check(problems, 'account_brute_force' in analysis['flags'],
+          f"compteurs du compte indexés par email normalisé ({analysis['velocity']['user_failures']} échecs)")
+
+
+def scenario_spraying(problems):
+    print("🧪 Credential spraying depuis une IP")
+    detector = make_detector()
+    emails = [f"compte{index}@mediconnect.fr" for index in range(20)]
+    statuses = [login(detector, email, 'Printemps2024', '203.0.113.50') for email in emails]
+    first_blocked = statuses.index(429) if 429 in statuses else '-'
+    check(problems, 429 in statuses, f"bloqué avant authentification après {first_blocked} essais")
+    check(problems, statuses[-1] == 429, "toujours bloqué en fin de balayage")
+
+    velocity = detector.velocity.snapshot('203.0.113.50', None)
+    check(problems, velocity['ip_attempts'] == len(emails),
+          f"tentatives bloquées comptées: {velocity['ip_attempts']}/{len(emails)}")
+
+
+def scenario_batch(problems, count=500):
+    print(f"🧪 Lot de {count} échecs depuis une IP (lot vs flux)")
+    events = [
+        {**client('192.0.2.77'), 'email': f"cible{index % 50}@mediconnect.fr", 'Login Successful': False}
+        for index in range(count)
+    ]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        streamed = make_detector()
+        stream_attacks = sum(streamed.process_log_entry(dict(event))['is_attack'] for event in events)
+        batched = make_detector()
+        batch_results = batched.process_log_entries([dict(event) for event in events])
+    batch_attacks = sum(result['is_attack'] for result in batch_results)
+
+    check(problems, stream_attacks > 0, f"flux: {stream_attacks} attaques")
+    check(problems, batch_attacks == stream_attacks, f"lot: {batch_attacks} attaques")
+    check(problems, batched.velocity.snapshot('192.0.2.77', None)['ip_failures'] == count,
+          "compteurs du lot complets")
+
+
+def scenario_geo_backfill(problems):
+    print("🧪 Géolocalisation en arrière-plan: pénalité différée puis appliquée")
+    detector = make_detector()
+    attempt = {**client('198.51.100.200'), 'Country': 'Unknown', 'Browser Name and Version': 'Unknown',
+               'email': 'soignant3@mediconnect.fr', 'Login Successful': False}
+    with contextlib.redirect_stdout(io.StringIO()):
+        unavailable = detector.process_log_entry(dict(attempt))
+        pending = detector.process_log_entry({**attempt, 'IP Address': '198.51.100.201', 'Geo Pending': True})
+    check(problems, unavailable['is_attack'] and 'unknown_country' in unavailable['behavioral_flags'],
+          f"file pleine (non résolue): pénalisée ({unavailable['behavioral_score']:.1f})")
+    check(problems, not pending['is_attack'] and 'geo_pending' in pending['behavioral_flags'],
+          f"résolution en cours: pénalité différée ({pending['behavioral_score']:.1f})")
+
+    escalations = []
+    detector.add_escalation_callback(lambda log_data, escalation: escalations.append(log_data['IP Address']))
+    with contextlib.redirect_stdout(io.StringIO()):
+        detector.backfill_geo('198.51.100.201', 'not_found', {'country': 'Unknown'})
+    check(problems, escalations == ['198.51.100.201'], f"IP introuvable au backfill: escaladée {escalations}")
+    check(problems, detector.is_ip_blocked('198.51.100.201'), "IP bloquée après l'escalade")
+
+
+def scenario_stuffing_noise(problems, count=200000):
+    print(f"🧪 Campagne de stuffing: {count} échecs aléatoires, IP et compte jamais vus")
+    detector = make_detector()
+    rng = random.Random(7)
+    now = time.time()
+    for _ in range(count):
+        ip_address = f"100.{rng.randrange(64)}.{rng.randrange(256)}.{rng.randrange(256)}"
+        detector.sketches.record(ip_address, f"cible{rng.randrange(10 ** 6)}@exemple.fr", False, now)
+
+    limits = {estimate: limit for estimate, limit, _, _ in SKETCH_RULES}
+    worst = {'ip_failures_estimate': 0, 'account_failures_estimate': 0}
+    for index in range(200):
+        sketch = detector.sketches.snapshot(f"10.30.{index}.1", f"nouveau{index}@mediconnect.fr", now)
+        for estimate in worst:
+            worst[estimate] = max(worst[estimate], sketch[estimate])
+    for estimate, value in worst.items():
+        check(problems, value < limits[estimate],
+              f"{estimate}: pire estimation {value} (seuil {limits[estimate]})")
+
+    analysis = detector.analyze_behavioral_patterns(
+        {**client('10.30.0.1'), 'email': 'nouveau0@mediconnect.fr', 'Login Successful': True}
+    )
+    check(problems, not {'ip_failure_frequency', 'account_failure_frequency'} & set(analysis['flags']),
+          f"connexion légitime: flags {analysis['flags']}")
+
+    for _ in range(2 * limits['account_failures_estimate']):
+        detector.sketches.record('10.30.99.1', 'victime@mediconnect.fr', False, now)
+    sketch = detector.sketches.snapshot('10.30.99.1', 'victime@mediconnect.fr', now)
+    check(problems, sketch['account_failures_estimate'] >= limits['account_failures_estimate'],
+          f"compte réellement visé toujours détecté ({sketch['account_failures_estimate']} échecs estimés)")
+
+
+if __name__ == '__main__':
+    problems = []
+    scenario_shared_ip(problems)
+    scenario_brute_force(problems)
+    scenario_spraying(problems)
+    scenario_batch(problems)
+    scenario_geo_backfill(problems)
+    scenario_stuffing_noise(problems)
+    print("✅ Tous les scénarios passent" if not problems else f"❌ {len(problems)} échec(s)")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,134 @@
+"""
+Test de charge concurrent de l'état partagé du détecteur
+
+Plusieurs threads enregistrent des tentatives de connexion en parallèle
+(analyse comportementale + suivi d'activité + compteurs), pendant qu'un
+thread de nettoyage et un lecteur de statistiques tournent en continu. On
+vérifie ensuite que les compteurs, historiques et vitesses sont exacts, et
+on mesure le débit selon le nombre de threads. BERT n'intervient pas.
+
+Usage (depuis la racine du projet):
+    python test/stress_detector_concurrency.py [evenements_par_thread]
+"""
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from security.attack_detector import FixedAttackDetector
+
+
+def generate_events(seed, count, ips=200, users=100):
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        user = rng.randrange(users)
+        events.append({
+            'IP Address': f"10.0.{rng.randrange(ips) // 250}.{rng.randrange(ips) % 250 + 1}",
+            'User ID': f"user{user}",
+            'email': f"user{user}@mediconnect.fr",
+            'Country': 'FR',
+            'Browser Name and Version': 'Chrome 120',
+            'Login Successful': rng.random() > 0.4
+        })
+    return events
+
+
+def run(num_threads, events_per_thread):
+    detector = FixedAttackDetector('/nonexistent', cache_size=0, velocity_window_seconds=600)
+    workloads = [generate_events(seed, events_per_thread) for seed in range(num_threads)]
+    stop = threading.Event()
+    errors = []
+
+    def worker(events):
+        try:
+            for log_data in events:
+                detector.stats.incr('total_requests')
+                detector.analyze_behavioral_patterns(log_data)
+                detector.update_activity_tracking(log_data)
+        except Exception as e:
+            errors.append(e)
+
+    def background():
+        try:
+            while not stop.is_set():
+                detector.cleanup_old_events()
+                detector.get_statistics()
+                time.sleep(0.01)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(events,)) for events in workloads]
+    monitor = threading.Thread(target=background)
+    monitor.start()
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    monitor.join()
+    return detector, workloads, elapsed, errors
+
+
+def verify(detector, workloads, errors):
+    """Compare l'état du détecteur aux comptes exacts ; retourne la liste des écarts"""
+    problems = [f"exception: {e!r}" for e in errors]
+    events = [log_data for workload in workloads for log_data in workload]
+    per_ip = Counter(log_data['IP Address'] for log_data in events)
+    per_ip_failures = Counter(log_data['IP Address'] for log_data in events if not log_data['Login Successful'])
+    per_user = Counter(log_data['User ID'] for log_data in events)
+
+    stats = detector.get_statistics()
+    if stats['total_requests'] != len(events):
+        problems.append(f"total_requests={stats['total_requests']} attendu {len(events)}")
+    if len(detector.recent_events) != min(len(events), detector.recent_events.capacity):
+        problems.append(f"recent_events={len(detector.recent_events)}")
+    if stats['active_ips'] != len(per_ip) or stats['active_users'] != len(per_user):
+        problems.append(f"clés actives ips={stats['active_ips']} users={stats['active_users']}")
+    recorded = stats['sketches']['recorded_attempts']
+    if recorded['ip'] != len(events):
+        problems.append(f"count-min: {recorded['ip']} tentatives enregistrées, attendu {len(events)}")
+
+    for ip, count in per_ip.items():
+        history = len(detector.ip_activity.get(ip))
+        if history != min(count, 100):
+            problems.append(f"historique {ip}: {history} attendu {min(count, 100)}")
+        velocity = detector.velocity.snapshot(ip, None)
+        if velocity['ip_attempts'] != count or velocity['ip_failures'] != per_ip_failures[ip]:
+            problems.append(f"vitesse {ip}: {velocity['ip_attempts']}/{velocity['ip_failures']}")
+
+    for user, count in per_user.items():
+        history = len(detector.user_activity.get(user))
+        if history != min(count, 50):
+            problems.append(f"historique {user}: {history} attendu {min(count, 50)}")
+        if detector.velocity.snapshot(None, f"{user}@mediconnect.fr")['user_attempts'] != count:
+            problems.append(f"vitesse {user}")
+
+    return problems
+
+
+if __name__ == '__main__':
+    events_per_thread = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    failed = False
+
+    print(f"🧪 Test de charge concurrent ({events_per_thread} événements par thread)")
+    for num_threads in (1, 4, 16, 32):
+        detector, workloads, elapsed, errors = run(num_threads, events_per_thread)
+        problems = verify(detector, workloads, errors)
+        total = num_threads * events_per_thread
+        status = "✅" if not problems else "❌"
+        print(f"   {status} {num_threads:>2} threads: {total:>7} événements en {elapsed:6.2f}s "
+              f"({total / elapsed:9.0f} evt/s)")
+        for problem in problems[:10]:
+            print(f"      - {problem}")
+        failed = failed or bool(problems)
+
+    sys.exit(1 if failed else 0)